@@ -16,5 +16,7 @@ echo   - ReDoc: http://localhost:8000/redoc
 echo.
 echo Appuyez sur CTRL+C pour arreter le serveur
 echo.
+REM Cle JWT jetable si JWT_KEYS n'est pas defini (developpement)
+if not defined JWT_KEYS set JWT_DEV_KEYS=1
 uvicorn run:app --host 0.0.0.0 --port 8000 --reload
 
@@ -19,6 +19,9 @@ Write-Host ""
 Write-Host "Appuyez sur CTRL+C pour arrêter le serveur" -ForegroundColor Yellow
 Write-Host ""
 
+# Clé JWT jetable si JWT_KEYS n'est pas défini (développement)
+if (-not $env:JWT_KEYS) { $env:JWT_DEV_KEYS = "1" }
+
 # Lancer le serveur
 uvicorn run:app --host 0.0.0.0 --port 8000 --reload
 
@@ -0,0 +1,48 @@
+# benchmarks/conftest.py - Fixtures des microbenchmarks (pytest-benchmark).
+# Pour un débutant : une base SQLite (fichier temporaire) est remplie une fois par session
+# avec benchmarks.seed ; chaque benchmark mesure une fonction de service sur ces données.
+#
+# Usage (depuis backend/) :
+#   python -m pytest benchmarks --benchmark-json=benchmarks/results/bench-$(git rev-parse --short HEAD).json
+#   pytest-benchmark compare benchmarks/results/bench-*.json --columns=median,iqr,ops
+import os
+
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "1024")
+os.environ.setdefault("JWT_DEV_KEYS", "1")
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("pytest_benchmark")
+
+from models.database import Base, build_engine
+from benchmarks.seed import seed
+
+# Volume seedé (surchargable) : utilisateurs et années d'historique.
+BENCH_USERS = int(os.getenv("BENCH_USERS", "20"))
+BENCH_YEARS = float(os.getenv("BENCH_YEARS", "3"))
+
+
+@pytest.fixture(scope="session")
+def bench_session_factory(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "bench.db"
+    engine = build_engine("sqlite-tuned", f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        seed(db, BENCH_USERS, BENCH_YEARS)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def bench_db(bench_session_factory):
+    with bench_session_factory() as db:
+        yield db
+
+
+@pytest.fixture
+def bench_user_id():
+    # Un utilisateur seedé au milieu de la table (ni le premier, ni le dernier).
+    return max(1, BENCH_USERS // 2)
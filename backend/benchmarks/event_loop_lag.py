@@ -0,0 +1,135 @@
+# benchmarks/event_loop_lag.py - Mesure le blocage de la boucle d'événements par les accès DB.
+# Pour un débutant : lance N requêtes concurrentes sur /v1/series et mesure, en parallèle,
+# le retard maximal d'un "battement" asyncio toutes les 5 ms.
+#
+# Usage (depuis backend/) : python -m benchmarks.event_loop_lag [--requests 200] [--days 1095] [--window 90]
+#
+# Modes comparés :
+# - blocking : service appelé directement dans la route async (comportement d'origine)
+# - sync     : run_db + Session classique exécutée dans un thread
+# - async    : run_db + AsyncSession (aiosqlite)
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from models.database import Base, run_db
+from models.metric_model import DailyMetric
+from models.user_model import User
+import models.notification_model  # noqa: F401
+from services.aggregation_service import aggregate_series
+
+
+def _seed(url: str, days: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id=1, email="bench@example.com", name="Bench", hashed_password="x"))
+        today = date.today()
+        db.bulk_save_objects([
+            DailyMetric(user_id=1, date=today - timedelta(days=i),
+                        sales=random.uniform(0, 1000), cash=random.uniform(0, 800))
+            for i in range(days)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+def _build_app(mode: str, path: str, window: int, concurrency: int) -> FastAPI:
+    app = FastAPI()
+    end = date.today()
+    start = end - timedelta(days=window)
+
+    if mode == "async":
+        factory = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)
+
+        async def get_session():
+            async with factory() as session:
+                yield session
+    else:
+        factory = sessionmaker(bind=create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=concurrency
+        ))
+
+        # Même cycle de vie que models.database.get_db en mode sync.
+        async def get_session():
+            session = factory()
+            try:
+                yield session
+            finally:
+                await run_in_threadpool(session.close)
+
+    @app.get("/v1/series")
+    async def series(db=Depends(get_session)):
+        if mode == "blocking":
+            points = aggregate_series(db, 1, start, end, "day")
+        else:
+            points = await run_db(db, aggregate_series, 1, start, end, "day")
+        return {"points": len(points)}
+
+    return app
+
+
+async def _run(app: FastAPI, requests: int, concurrency: int) -> dict:
+    lags = []
+    done = False
+
+    async def heartbeat():
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - before - 0.005)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get("/v1/series")
+                response.raise_for_status()
+
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        done = True
+        await beat
+
+    lags.sort()
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(requests / elapsed, 1),
+        "heartbeats": len(lags),
+        "loop_lag_p50_ms": round(lags[len(lags) // 2] * 1000, 2),
+        "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--days", type=int, default=1095, help="Historique généré (jours)")
+    parser.add_argument("--window", type=int, default=90, help="Plage lue par requête (jours)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        _seed(f"sqlite:///{path}", args.days)
+        for mode in ("blocking", "sync", "async"):
+            result = asyncio.run(_run(_build_app(mode, path, args.window, args.concurrency), args.requests, args.concurrency))
+            print(f"{mode:>8}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/load_driver.py - Test de charge scripté sur l'application ASGI réelle (run.app).
+# Pour un débutant : N utilisateurs virtuels se connectent (comptes créés par benchmarks.seed),
+# puis répètent le parcours de l'app mobile : dashboard, graphiques, saisie du jour,
+# notifications et badge. Les requêtes passent par httpx.ASGITransport (pas de réseau) :
+# on mesure l'API, ses middlewares et la base. Résultat : p50/p95/p99 et débit par endpoint,
+# écrits en JSON (voir benchmarks/results.py pour comparer deux commits).
+#
+# Usage (depuis backend/) :
+#   DB_FILE=bench.db python -m benchmarks.seed --users 200
+#   DB_FILE=bench.db python -m benchmarks.load_driver [--virtual-users 50] [--iterations 20] [--output fichier.json]
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date
+
+import httpx
+
+from benchmarks.results import summarize, write_results
+from benchmarks.seed import EMAIL, PASSWORD
+
+
+# Parcours d'un utilisateur virtuel : une connexion puis `iterations` passages sur les écrans principaux.
+async def _virtual_user(client: httpx.AsyncClient, account: int, iterations: int, think: float,
+                        samples: dict, errors: dict):
+    async def call(name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "transport"
+        samples[name].append(time.perf_counter() - started)
+        if response is None or status >= 400:
+            errors[name][str(status)] += 1
+        return response
+
+    login = await call("POST /login", "POST", "/login", json={"email": EMAIL.format(account), "password": PASSWORD})
+    if login is None or login.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    rng = random.Random(account)
+
+    for _ in range(iterations):
+        await call("GET /v1/dashboard", "GET", "/v1/dashboard", headers=headers)
+        await call("GET /v1/graphs", "GET", "/v1/graphs", headers=headers)
+        await call("POST /v1/metrics", "POST", "/v1/metrics", headers=headers, json={
+            "date": date.today().isoformat(),
+            "sales": float(rng.randrange(50_000, 200_000, 10)),
+            "cash": float(rng.randrange(20_000, 100_000, 10))
+        })
+        await call("GET /notifications", "GET", "/notifications", headers=headers)
+        await call("GET /notifications/unread-count", "GET", "/notifications/unread-count", headers=headers)
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def run_load(app, accounts: int, virtual_users: int, iterations: int, think: float = 0.0) -> dict:
+    samples = defaultdict(list)
+    errors = defaultdict(lambda: defaultdict(int))  # endpoint -> statut -> nombre
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport n'exécute pas le lifespan : on le démarre comme uvicorn (worker, scheduler, préchauffage).
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _virtual_user(client, 1 + i % accounts, iterations, think, samples, errors)
+            for i in range(virtual_users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    every = [latency for values in samples.values() for latency in values]
+    return {
+        "params": {"accounts": accounts, "virtual_users": virtual_users, "iterations": iterations, "think_s": think},
+        "elapsed_s": round(elapsed, 2),
+        "total": summarize(every, sum(sum(codes.values()) for codes in errors.values()), elapsed),
+        "endpoints": {name: summarize(values, sum(errors[name].values()), elapsed) for name, values in sorted(samples.items())},
+        "error_statuses": {name: dict(codes) for name, codes in errors.items() if codes}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge scripté de l'API (ASGI, sans réseau)")
+    parser.add_argument("--virtual-users", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20, help="Parcours par utilisateur virtuel")
+    parser.add_argument("--accounts", type=int, default=None, help="Comptes seedés utilisés (défaut : tous)")
+    parser.add_argument("--think", type=float, default=0.0, help="Pause moyenne entre parcours (s)")
+    parser.add_argument("--output", default=None, help="Fichier JSON (défaut : benchmarks/results/)")
+    args = parser.parse_args()
+
+    # Tokens signés par une clé jetable si JWT_KEYS n'est pas défini (comptes de benchmark).
+    os.environ.setdefault("JWT_DEV_KEYS", "1")
+    # Import tardif : l'application lit DB_PROFILE / DB_FILE / DATABASE_URL à l'import.
+    from models.database import SessionLocal
+    from models.user_model import User
+    from run import app
+
+    # Une ligne de log par requête du client fausserait la mesure.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with SessionLocal() as db:
+        seeded = db.query(User).filter(User.email.like(EMAIL.format("%"))).count()
+    accounts = min(args.accounts or seeded, seeded)
+    if not accounts:
+        parser.error("aucun compte de benchmark : lancer d'abord python -m benchmarks.seed")
+
+    result = asyncio.run(run_load(app, accounts, args.virtual_users, args.iterations, args.think))
+    for name, stats in {**result["endpoints"], "total": result["total"]}.items():
+        print(f"{name:<32} {stats}")
+    if result["error_statuses"]:
+        print(f"Erreurs : {result['error_statuses']}")
+    print(f"Résultats : {write_results('load', result, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/login_throughput.py - Débit de /login (vérifications argon2 par seconde et par cœur).
+# Pour un débutant : simule un pic de connexions (N requêtes concurrentes) et mesure le débit,
+# la latence et les refus 503 selon la taille du pool de hachage. Le coût argon2 est celui
+# de l'environnement (ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM).
+#
+# Usage (depuis backend/) : python -m benchmarks.login_throughput [--requests 200] [--concurrency 50] [--workers 1,2,4]
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, get_db
+from models.user_model import User
+import models.metric_model  # noqa: F401
+import models.notification_model  # noqa: F401
+import routes.auth
+from services.password_hasher import HashingExecutor, pwd_context, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+
+PASSWORD = "bench-password"
+
+
+def _build_app(path: str) -> FastAPI:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(User(email="bench@example.com", name="Bench", hashed_password=pwd_context.hash(PASSWORD)))
+        db.commit()
+
+    async def get_session():
+        with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(routes.auth.router)
+    app.dependency_overrides[get_db] = get_session
+    return app
+
+
+async def _run(app: FastAPI, requests: int, concurrency: int) -> dict:
+    latencies, statuses = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                before = time.perf_counter()
+                response = await client.post("/login", json={"email": "bench@example.com", "password": PASSWORD})
+                latencies.append(time.perf_counter() - before)
+                statuses.append(response.status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    ok = statuses.count(200)
+    latencies.sort()
+    return {
+        "ok": ok,
+        "busy_503": statuses.count(503),
+        "logins_per_s": round(ok / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de /login selon la taille du pool de hachage")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, os.cpu_count() or 1})),
+                        help="Tailles de pool à comparer (e.g., 1,2,4)")
+    parser.add_argument("--queue-limit", type=int, default=None, help="File d'attente (défaut : illimitée)")
+    parser.add_argument("--kind", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    print(f"argon2 time_cost={ARGON2_TIME_COST} memory_cost={ARGON2_MEMORY_COST} KiB "
+          f"parallelism={ARGON2_PARALLELISM} - {os.cpu_count()} cœur(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _build_app(os.path.join(tmp, "bench.db"))
+        for workers in (int(n) for n in args.workers.split(",")):
+            queue_limit = args.queue_limit if args.queue_limit is not None else args.requests
+            routes.auth.password_hasher = HashingExecutor(workers=workers, queue_limit=queue_limit, kind=args.kind)
+            try:
+                result = asyncio.run(_run(app, args.requests, args.concurrency))
+            finally:
+                routes.auth.password_hasher.shutdown()
+            result["logins_per_s_per_core"] = round(result["logins_per_s"] / min(workers, os.cpu_count() or 1), 1)
+            print(f"workers={workers:>2}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/results.py - Résultats de benchmark en JSON, comparables d'un commit à l'autre.
+# Pour un débutant : chaque run écrit un fichier benchmarks/results/<type>-<commit>-<horodatage>.json
+# avec le contexte (commit, Python, profil DB, cœurs) et, par endpoint, p50/p95/p99 et débit.
+#
+# Comparer deux runs (depuis backend/) :
+#   python -m benchmarks.results compare benchmarks/results/load-abc1234-....json benchmarks/results/load-def5678-....json
+# (les microbenchmarks pytest-benchmark se comparent avec `pytest-benchmark compare`.)
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from typing import Dict, List
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# Contexte du run : à vérifier avant de comparer deux fichiers.
+def metadata() -> dict:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "db_profile": os.getenv("DB_PROFILE", "sqlite"),
+        "db_mode": os.getenv("DB_MODE", "sync"),
+    }
+
+
+# Percentile par rang le plus proche sur une liste triée.
+def _percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+# Statistiques d'un endpoint : latences en secondes -> ms, débit sur la durée totale du run.
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+# Écrit un résultat ; retourne le chemin du fichier.
+def write_results(kind: str, payload: dict, output: str = None) -> str:
+    meta = metadata()
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = meta["timestamp"].replace(":", "").replace("-", "")
+        output = os.path.join(RESULTS_DIR, f"{kind}-{meta['commit']}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "meta": meta, **payload}, f, indent=2, ensure_ascii=False)
+    return output
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+# Tableau des écarts par endpoint (latences : négatif = plus rapide ; débit : positif = mieux).
+def compare(old: dict, new: dict) -> str:
+    lines = [
+        f"{old['meta']['commit']} -> {new['meta']['commit']}",
+        f"{'endpoint':<24}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}"
+    ]
+    endpoints: Dict[str, dict] = new.get("endpoints", {})
+    for name, after in endpoints.items():
+        before = old.get("endpoints", {}).get(name)
+        if not before or not after.get("requests"):
+            continue
+        cells = [
+            f"{after[key]:>9} {_delta(before.get(key, 0), after[key])}"
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+        ]
+        lines.append(f"{name:<24}" + "".join(f"{cell:>18}" for cell in cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deux résultats de benchmark")
+    parser.add_argument("command", choices=["compare"])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    with open(args.old, encoding="utf-8") as f_old, open(args.new, encoding="utf-8") as f_new:
+        print(compare(json.load(f_old), json.load(f_new)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/seed.py - Génère une base réaliste pour les benchmarks (utilisateurs, historiques, notifications).
+# Pour un débutant : crée N utilisateurs (bench1@example.com ... mot de passe "bench-password"),
+# chacun avec plusieurs années de saisies journalières (tendance, saisonnalité semaine/année,
+# bruit, ~5 % de jours sans saisie) et un historique de notifications. Les lignes sont générées
+# par NumPy et insérées par lots (executemany), puis les rollups sont construits en une passe.
+# La base visée est celle de l'API (DB_PROFILE, DB_FILE, DATABASE_URL).
+#
+# Usage (depuis backend/) : DB_FILE=bench.db python -m benchmarks.seed [--users 200] [--years 3] [--notifications 100]
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.data_version_model import DataVersion
+from models.metric_model import DailyMetric
+from models.notification_model import Notification, NotificationCounter
+from models.user_model import User
+import models.job_model  # noqa: F401
+import models.rollup_model  # noqa: F401
+from services.password_hasher import pwd_context
+from services.rollup_service import rebuild_rollups
+
+PASSWORD = "bench-password"
+EMAIL = "bench{}@example.com"
+# Lignes par INSERT executemany.
+BATCH_SIZE = 5000
+# Part des jours sans saisie.
+MISSING_DAYS = 0.05
+# Notifications non lues laissées à chaque utilisateur.
+UNREAD = 5
+
+_NOTIFICATION_TYPES = (
+    ("entry_saved", "Saisie enregistrée", "Vos ventes du jour sont enregistrées.", "success"),
+    ("sales_drop", "Baisse des ventes", "Vos ventes sont en baisse par rapport à hier.", "warning"),
+    ("cash_low", "Cash faible", "Votre cash est inférieur à la moitié de vos ventes.", "warning"),
+    ("weekly_summary", "Résumé de la semaine", "Votre résumé hebdomadaire est disponible.", "info"),
+)
+
+
+def _insert(db: Session, model, rows: List[dict]):
+    for offset in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(model), rows[offset:offset + BATCH_SIZE])
+
+
+# Historique d'un utilisateur : ventes (XOF) avec tendance, saisonnalités et bruit ; cash = part des ventes.
+def _daily_rows(rng: np.random.Generator, user_id: int, days: np.ndarray) -> List[dict]:
+    n = days.size
+    t = np.arange(n)
+    level = rng.lognormal(mean=11.5, sigma=0.6)  # ~100 000 XOF / jour en moyenne
+    trend = 1 + rng.uniform(-0.1, 0.4) * t / 365
+    weekday = days.astype("datetime64[D]").view("int64") % 7  # 0 = jeudi (1970-01-01)
+    weekly = np.array([1.0, 1.1, 1.25, 0.6, 0.9, 0.95, 1.0])[weekday]
+    month = days.astype("datetime64[M]").astype(int) % 12
+    yearly = np.where(month == 11, 1.4, 1.0) * np.where(month == 0, 0.8, 1.0)
+    sales = np.round(level * trend * weekly * yearly * rng.lognormal(0, 0.25, n), -1)
+    cash = np.round(sales * rng.uniform(0.35, 0.9, n), -1)
+    kept = rng.random(n) >= MISSING_DAYS
+    return [
+        {"user_id": user_id, "date": d, "sales": float(s), "cash": float(c), "source": "APP"}
+        for d, s, c in zip(days[kept].astype(object).tolist(), sales[kept], cash[kept])
+    ]
+
+
+def _notification_rows(rng: np.random.Generator, user_id: int, first: date, last: date, count: int) -> List[dict]:
+    span = (last - first).days + 1
+    offsets = np.sort(rng.choice(span, size=min(count, span), replace=False))
+    kinds = rng.integers(len(_NOTIFICATION_TYPES), size=offsets.size)
+    rows = []
+    for i, (offset, kind) in enumerate(zip(offsets.tolist(), kinds.tolist())):
+        rule_key, title, message, type_ = _NOTIFICATION_TYPES[kind]
+        day = first + timedelta(days=offset)
+        rows.append({
+            "user_id": user_id, "title": title, "message": message, "type": type_,
+            "is_read": i < offsets.size - UNREAD,
+            "created_at": datetime.combine(day, datetime.min.time()) + timedelta(hours=20),
+            "rule_key": rule_key, "period": day.isoformat()
+        })
+    return rows
+
+
+# Crée `users` utilisateurs avec `years` années d'historique se terminant à `end`.
+def seed(db: Session, users: int, years: float = 3, notifications: int = 100,
+         end: date = None, random_seed: int = 42) -> dict:
+    rng = np.random.default_rng(random_seed)
+    end = end or date.today()
+    first = end - timedelta(days=int(years * 365) - 1)
+    days = np.arange(np.datetime64(first, "D"), np.datetime64(end, "D") + 1)
+    # Un seul hachage argon2 partagé : le coût du seed reste celui des insertions.
+    hashed = pwd_context.hash(PASSWORD)
+
+    start_index = db.query(User).count() + 1
+    user_rows = [
+        {"email": EMAIL.format(i), "name": f"Bench {i}", "hashed_password": hashed, "locale": "FR",
+         "fcm_token": f"bench-token-{i}"}
+        for i in range(start_index, start_index + users)
+    ]
+    user_ids = list(db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), user_rows))
+
+    stats = {"users": users, "metrics": 0, "notifications": 0}
+    for user_id in user_ids:
+        metric_rows = _daily_rows(rng, user_id, days)
+        notification_rows = _notification_rows(rng, user_id, first, end, notifications)
+        _insert(db, DailyMetric, metric_rows)
+        _insert(db, Notification, notification_rows)
+        stats["metrics"] += len(metric_rows)
+        stats["notifications"] += len(notification_rows)
+    _insert(db, NotificationCounter, [{"user_id": u, "unread": min(UNREAD, notifications)} for u in user_ids])
+    _insert(db, DataVersion, [{"user_id": u, "version": 1} for u in user_ids])
+    db.commit()
+    stats["rollups"] = rebuild_rollups(db)
+    return stats
+
+
+def main():
+    from models.database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Base de benchmark : utilisateurs et historiques synthétiques")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--notifications", type=int, default=100, help="Notifications par utilisateur")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        stats = seed(db, args.users, args.years, args.notifications, random_seed=args.seed)
+    print(f"{stats} en {time.perf_counter() - started:.1f} s ({engine.url})")
+
+
+if __name__ == "__main__":
+    main()
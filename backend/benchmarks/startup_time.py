@@ -0,0 +1,88 @@
+# benchmarks/startup_time.py - Temps de démarrage à froid de l'API (import de run.py, puis lifespan).
+# Pour un débutant : chaque mesure lance un nouveau processus Python (imports à froid) qui
+# 1) importe run.py (construction de l'app par create_app, sans base ni thread) ;
+# 2) exécute le démarrage du lifespan (tables et migrations, scheduler, worker), comme uvicorn.
+# Le préchauffage tourne en arrière-plan et n'est pas compté. Résultat : p50/p95 de chaque étape,
+# comparé à la cible STARTUP_TARGET_S de run.py, écrit en JSON (comparable avec benchmarks.results).
+#
+# Usage (depuis backend/) :
+#   python -m benchmarks.startup_time [--runs 10] [--db bench.db] [--output fichier.json]
+# Sans --db, chaque mesure démarre sur une base SQLite neuve (création des tables comprise).
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.results import summarize, write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exécuté dans le processus mesuré : une ligne JSON avec les durées de chaque étape.
+_CHILD = """
+import time
+started = time.perf_counter()
+import asyncio, json
+import run
+imported = time.perf_counter()
+
+async def main():
+    async with run.app.router.lifespan_context(run.app):
+        ready = time.perf_counter()
+    return ready
+
+ready = asyncio.run(main())
+print(json.dumps({"import": imported - started, "ready": ready - started, "target": run.STARTUP_TARGET_S}))
+"""
+
+
+# Une mesure dans un processus neuf ; retourne {"import": s, "ready": s, "target": s}.
+def measure_once(db_file: str = None) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            # Clé JWT jetable si JWT_KEYS n'est pas défini.
+            "JWT_DEV_KEYS": "1",
+            **os.environ,
+            "PYTHONPATH": BACKEND_DIR,
+            # DB_FILE est relatif au dossier courant (models/database.py).
+            "DB_FILE": os.path.relpath(db_file, workdir) if db_file else "startup.db",
+            # Seules les lignes JSON du processus mesuré sont lues sur stdout.
+            "LOG_LEVEL": "WARNING"
+        }
+        completed = subprocess.run(
+            [sys.executable, "-c", _CHILD], cwd=workdir, env=env, capture_output=True, text=True, check=True
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_startup(runs: int, db_file: str = None) -> dict:
+    samples = [measure_once(db_file) for _ in range(runs)]
+    target = samples[0]["target"]
+    steps = {name: summarize([s[name] for s in samples], 0, 0) for name in ("import", "ready")}
+    return {
+        "params": {"runs": runs, "db_file": db_file or "(base neuve)"},
+        "target_s": target,
+        "within_target": steps["import"]["p50_ms"] <= target * 1000,
+        "endpoints": steps
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid de l'API")
+    parser.add_argument("--runs", type=int, default=10, help="Processus mesurés")
+    parser.add_argument("--db", default=None, help="Base SQLite existante (défaut : base neuve à chaque mesure)")
+    parser.add_argument("--output", default=None, help="Fichier JSON (défaut : benchmarks/results/)")
+    args = parser.parse_args()
+
+    result = run_startup(args.runs, args.db)
+    for name, stats in result["endpoints"].items():
+        print(f"{name:<8} p50={stats['p50_ms']} ms p95={stats['p95_ms']} ms max={stats['max_ms']} ms")
+    verdict = "OK" if result["within_target"] else "AU-DESSUS DE LA CIBLE"
+    print(f"Cible import + create_app : {result['target_s'] * 1000:.0f} ms -> {verdict}")
+    print(f"Résultats : {write_results('startup', result, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
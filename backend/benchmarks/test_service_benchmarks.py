@@ -0,0 +1,62 @@
+# benchmarks/test_service_benchmarks.py - Microbenchmarks des fonctions de service (pytest-benchmark).
+from datetime import date, timedelta
+
+from schemas.metric_schemas import MetricCreate
+from services.aggregation_service import aggregate_series
+from services.analytics_service import get_insight_series
+from services.dashboard_service import get_dashboard_stats, get_graph_data
+from services.metric_service import get_metrics_with_deltas, upsert_metric, upsert_metrics_batch
+from services.notification_service import generate_dynamic_notifications, get_notifications, get_unread_count
+
+
+def test_dashboard_stats(benchmark, bench_db, bench_user_id):
+    benchmark(get_dashboard_stats, bench_db, bench_user_id)
+
+
+def test_graph_data(benchmark, bench_db, bench_user_id):
+    benchmark(get_graph_data, bench_db, bench_user_id)
+
+
+def test_series_month_three_years(benchmark, bench_db, bench_user_id):
+    end = date.today()
+    benchmark(aggregate_series, bench_db, bench_user_id, end - timedelta(days=3 * 365), end, "month")
+
+
+def test_series_day_one_year(benchmark, bench_db, bench_user_id):
+    end = date.today()
+    benchmark(aggregate_series, bench_db, bench_user_id, end - timedelta(days=365), end, "day")
+
+
+def test_metrics_list_with_deltas(benchmark, bench_db, bench_user_id):
+    benchmark(get_metrics_with_deltas, bench_db, bench_user_id, date.today() - timedelta(days=90))
+
+
+def test_insight_series_one_year(benchmark, bench_db, bench_user_id):
+    end = date.today()
+    benchmark(get_insight_series, bench_db, bench_user_id, end - timedelta(days=364), end)
+
+
+def test_notifications_page(benchmark, bench_db, bench_user_id):
+    benchmark(get_notifications, bench_db, bench_user_id)
+
+
+def test_unread_count(benchmark, bench_db, bench_user_id):
+    benchmark(get_unread_count, bench_db, bench_user_id)
+
+
+def test_upsert_metric(benchmark, bench_db, bench_user_id):
+    metric = MetricCreate(date=date.today(), sales=120000.0, cash=80000.0)
+    benchmark(upsert_metric, bench_db, metric, bench_user_id)
+
+
+def test_upsert_metrics_batch_30_days(benchmark, bench_db, bench_user_id):
+    today = date.today()
+    entries = [
+        {"date": (today - timedelta(days=i)).isoformat(), "sales": 100000.0 + i, "cash": 60000.0}
+        for i in range(30)
+    ]
+    benchmark(upsert_metrics_batch, bench_db, bench_user_id, entries)
+
+
+def test_generate_dynamic_notifications(benchmark, bench_db, bench_user_id):
+    benchmark(generate_dynamic_notifications, bench_db, bench_user_id)
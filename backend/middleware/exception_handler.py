@@ -5,7 +5,9 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException
-import traceback
+import logging
+
+logger = logging.getLogger(__name__)
 
 async def exception_handler(request: Request, exc: Exception):
     """Gestionnaire global des exceptions non gérées"""
@@ -13,8 +15,12 @@ async def exception_handler(request: Request, exc: Exception):
     if isinstance(exc, HTTPException):
         raise exc
     
-    print(f"Exception non gérée: {type(exc).__name__}: {str(exc)}")
-    print(traceback.format_exc())
+    # Id posé par RequestIdMiddleware dans l'état de la requête (le contextvar est déjà remis en place ici).
+    logger.error("unhandled exception", exc_info=exc, extra={
+        "method": request.method,
+        "path": request.url.path,
+        "request_id": getattr(request.state, "request_id", None)
+    })
     
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
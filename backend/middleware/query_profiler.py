@@ -0,0 +1,35 @@
+# middleware/query_profiler.py - Ajoute X-Query-Count / X-DB-Time / X-Query-Repeated aux réponses.
+# Pour un débutant : activé seulement avec SQL_PROFILE=1 (voir services/query_profiler.py).
+# Les en-têtes partent avec le début de la réponse : en streaming, les requêtes exécutées
+# pendant l'envoi n'y figurent pas, mais elles comptent dans le log des répétitions.
+
+from services.query_profiler import QueryProfile, current_profile, report_repeated
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-query-count", str(profile.count).encode()),
+                    (b"x-db-time", f"{profile.db_time * 1000:.2f}".encode()),
+                    (b"x-query-repeated", str(len(profile.repeated())).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            current_profile.reset(token)
+            report_repeated(profile, scope["method"], scope["path"])
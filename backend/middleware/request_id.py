@@ -0,0 +1,40 @@
+# middleware/request_id.py - Identifiant de requête pour les logs.
+# Pour un débutant : chaque requête reçoit un id (repris de l'en-tête X-Request-ID s'il est
+# fourni, sinon généré) ; il est ajouté à tous les logs écrits pendant la requête et renvoyé
+# dans l'en-tête X-Request-ID de la réponse. Middleware ASGI pur : compatible avec le streaming.
+
+import uuid
+
+from utils.structured_logging import request_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Longueur maximale d'un id fourni par le client.
+MAX_REQUEST_ID_LENGTH = 64
+
+
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        request_id = incoming if 0 < len(incoming) <= MAX_REQUEST_ID_LENGTH else uuid.uuid4().hex
+        # Aussi dans l'état de la requête (request.state.request_id) : le gestionnaire d'exceptions
+        # global s'exécute après la sortie de ce middleware, une fois le contextvar remis en place.
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # L'id ne déborde pas sur l'appelant quand l'app est appelée en direct (ASGITransport).
+            request_id_var.reset(token)
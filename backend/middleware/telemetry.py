@@ -0,0 +1,40 @@
+# middleware/telemetry.py - Compte les requêtes HTTP et mesure leur latence, par route.
+# Pour un débutant : la route est le modèle déclaré (e.g. /v1/metrics, /notifications/{id}/read),
+# pas l'URL reçue, pour garder un nombre de séries borné. Les URL sans route sont regroupées
+# sous "unmatched". Middleware ASGI pur : la latence inclut l'envoi complet (streaming compris).
+
+import time
+
+from services.telemetry import HTTP_DURATION, HTTP_IN_PROGRESS, HTTP_REQUESTS
+
+UNMATCHED = "unmatched"
+
+
+class TelemetryMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(1)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_PROGRESS.inc(-1)
+            # Le routeur a posé scope["route"] (même dictionnaire) s'il a trouvé une route.
+            route = getattr(scope.get("route"), "path", UNMATCHED)
+            method = scope["method"]
+            HTTP_DURATION.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
@@ -0,0 +1,13 @@
+# models/data_version_model.py - Version des données d'un utilisateur (pour les ETag).
+# Pour un débutant : le numéro augmente à chaque écriture de metrics, notifications ou profil ;
+# si le client présente l'ETag de la même version, rien n'a changé (réponse 304).
+
+from sqlalchemy import Column, Integer, ForeignKey
+from .database import Base
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # Absent = version 0 (aucune écriture depuis la création de la table).
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,28 @@
+# models/job_model.py - Exécutions des tâches planifiées (une ligne par occurrence).
+# Pour un débutant : avec plusieurs workers uvicorn, chaque processus a son scheduler ;
+# la ligne (job_name, scheduled_for) unique sert de verrou : seul le processus qui
+# l'insère (ou reprend un bail expiré) exécute l'occurrence.
+
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from .database import Base
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Nom de la tâche (e.g., daily_reminder).
+    job_name = Column(String, nullable=False)
+    # Occurrence planifiée - format ISO à la minute (e.g., 2025-08-04T20:00).
+    scheduled_for = Column(String, nullable=False)
+    # running, succeeded ou failed.
+    status = Column(String, nullable=False, default="running")
+    # Processus propriétaire (hôte:pid) et fin du bail ; un bail expiré peut être repris.
+    owner = Column(String, nullable=False)
+    lease_until = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=1)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+
+    __table_args__ = (UniqueConstraint("job_name", "scheduled_for", name="uix_job_runs_job_scheduled"),)
@@ -1,6 +1,5 @@
-
 # Importe types SQLAlchemy.
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 # Importe relationship.
 from sqlalchemy.orm import relationship
 # Importe Base.
@@ -12,8 +11,8 @@ class DailyMetric(Base):
     
     # Colonne id - clé primaire.
     id = Column(Integer, primary_key=True, index=True)
-    # Colonne date - format ISO (e.g., 2025-08-03).
-    date = Column(String)
+    # Colonne date - vraie date (stockée YYYY-MM-DD dans SQLite, type date dans PostgreSQL).
+    date = Column(Date, nullable=False)
     # Colonne sales - ventes en float (XOF).
     sales = Column(Float)
     # Colonne cash - cash en float.
@@ -26,5 +25,9 @@ class DailyMetric(Base):
     # Relation inverse avec User.
     user = relationship("User", back_populates="metrics")
 
-    # Contrainte d'unicité sur date et user_id
-    __table_args__ = (UniqueConstraint('date', 'user_id', name='uix_date_user_id'),)
\ No newline at end of file
+    __table_args__ = (
+        # Une saisie par jour et par utilisateur ; user_id en tête pour les parcours par plage de dates.
+        Index("uix_user_id_date", "user_id", "date", unique=True),
+        # Index couvrant : les agrégations lisent sales/cash sans toucher la table.
+        Index("ix_daily_metrics_user_date_cover", "user_id", "date", "sales", "cash"),
+    )
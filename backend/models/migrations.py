@@ -0,0 +1,120 @@
+# models/migrations.py - Migrations en place des bases existantes (compta.db, PostgreSQL).
+# Pour un débutant : create_all crée les nouvelles tables mais ne modifie pas les tables
+# existantes ; chaque migration ci-dessous est idempotente et s'exécute une seule fois
+# (version enregistrée dans la table schema_migrations).
+# Usage manuel : `python -m models.migrations` (exécuté aussi au démarrage de l'API).
+
+from datetime import datetime
+from sqlalchemy import text, inspect
+from sqlalchemy.engine import Connection, Engine
+
+
+# 1 - daily_metrics.date devient une vraie date, index (user_id, date) unique et index couvrant.
+def _migrate_daily_metrics_date(conn: Connection):
+    dialect = conn.dialect.name
+    columns = {c["name"]: c for c in inspect(conn).get_columns("daily_metrics")}
+    if "date" not in columns:
+        return
+
+    # Met de côté les lignes dont la date n'est pas interprétable (et les doublons créés
+    # par la normalisation) dans daily_metrics_invalid au lieu de les perdre.
+    if dialect == "postgresql":
+        if str(columns["date"]["type"]).upper() != "DATE":
+            invalid = r"date IS NULL OR date !~ '^\d{4}-\d{2}-\d{2}'"
+            conn.execute(text("CREATE TABLE IF NOT EXISTS daily_metrics_invalid AS SELECT * FROM daily_metrics WHERE false"))
+            conn.execute(text(f"INSERT INTO daily_metrics_invalid SELECT * FROM daily_metrics WHERE {invalid}"))
+            conn.execute(text(f"DELETE FROM daily_metrics WHERE {invalid}"))
+            conn.execute(text("ALTER TABLE daily_metrics ALTER COLUMN date TYPE date USING CAST(substr(date, 1, 10) AS date)"))
+        conn.execute(text("ALTER TABLE daily_metrics DROP CONSTRAINT IF EXISTS uix_date_user_id"))
+    else:
+        invalid = "date IS NULL OR date(date) IS NULL"
+        # Normalisation (e.g., '2025-08-03 00:00:00' -> '2025-08-03') qui entrerait en conflit avec une ligne existante.
+        duplicate = (
+            "date != date(date) AND EXISTS (SELECT 1 FROM daily_metrics AS other "
+            "WHERE other.user_id = daily_metrics.user_id AND other.date = date(daily_metrics.date))"
+        )
+        conn.execute(text("CREATE TABLE IF NOT EXISTS daily_metrics_invalid AS SELECT * FROM daily_metrics WHERE 0"))
+        for condition in (invalid, duplicate):
+            conn.execute(text(f"INSERT INTO daily_metrics_invalid SELECT * FROM daily_metrics WHERE {condition}"))
+            conn.execute(text(f"DELETE FROM daily_metrics WHERE {condition}"))
+        conn.execute(text("UPDATE daily_metrics SET date = date(date) WHERE date != date(date)"))
+        # Note : l'ancienne contrainte (date, user_id) d'une table SQLite existante ne peut être
+        # supprimée sans reconstruire la table ; elle reste, redondante mais sans effet sur les requêtes.
+
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uix_user_id_date ON daily_metrics (user_id, date)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_daily_metrics_user_date_cover ON daily_metrics (user_id, date, sales, cash)"))
+
+
+# 2 - notifications : clé de règle + période (dédup indexée) et index de lecture.
+# Les notifications existantes gardent rule_key/period à NULL (elles ne sont pas dédupliquées).
+def _migrate_notifications_keys(conn: Connection):
+    inspector = inspect(conn)
+    if "notifications" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("notifications")}
+    for name in ("rule_key", "period"):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE notifications ADD COLUMN {name} VARCHAR"))
+
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uix_notifications_user_rule_period ON notifications (user_id, rule_key, period)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_user_created ON notifications (user_id, created_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_user_is_read ON notifications (user_id, is_read)"))
+
+
+# 3 - notification_counters : compteur de non lues initialisé depuis les notifications existantes.
+def _migrate_notification_counters(conn: Connection):
+    if "notifications" not in inspect(conn).get_table_names():
+        return
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS notification_counters "
+        "(user_id INTEGER PRIMARY KEY REFERENCES users (id), unread INTEGER NOT NULL DEFAULT 0)"
+    ))
+    conn.execute(text(
+        "INSERT INTO notification_counters (user_id, unread) "
+        "SELECT user_id, count(*) FROM notifications WHERE COALESCE(is_read, false) = false "
+        "AND user_id NOT IN (SELECT user_id FROM notification_counters) GROUP BY user_id"
+    ))
+
+
+# Liste ordonnée des migrations : (version, nom, fonction).
+MIGRATIONS = [
+    (1, "daily_metrics_date", _migrate_daily_metrics_date),
+    (2, "notifications_keys", _migrate_notifications_keys),
+    (3, "notification_counters", _migrate_notification_counters),
+]
+
+
+# Applique les migrations manquantes ; retourne les noms des migrations appliquées.
+def run_migrations(engine: Engine):
+    applied = []
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL)"
+        ))
+        done = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        # Une transaction par migration : en cas d'erreur, la base reste dans l'état précédent.
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow().isoformat()}
+            )
+        applied.append(name)
+    return applied
+
+
+if __name__ == "__main__":
+    from models.database import engine, Base
+    import models.user_model  # noqa: F401
+    import models.metric_model  # noqa: F401
+    import models.notification_model  # noqa: F401
+    import models.rollup_model  # noqa: F401
+    import models.job_model  # noqa: F401
+    import models.data_version_model  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    names = run_migrations(engine)
+    print(f"Migrations appliquées : {', '.join(names) if names else 'aucune'}")
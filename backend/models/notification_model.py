@@ -1,6 +1,6 @@
 # models/notification_model.py - Modèle pour les notifications
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -15,7 +15,28 @@ class Notification(Base):
     type = Column(String, default="info")  # info, warning, success, error
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Clé de règle (e.g., "entry_saved") et période concernée ('YYYY-MM-DD') des notifications
+    # générées ; NULL pour les notifications libres (jamais dédupliquées).
+    rule_key = Column(String, nullable=True)
+    period = Column(String, nullable=True)
     
     # Relation avec User
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        # Une seule notification par règle et par période : dédup par insert-or-ignore.
+        Index("uix_notifications_user_rule_period", "user_id", "rule_key", "period", unique=True),
+        # Liste (plus récentes d'abord) et marquage comme lues.
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+        Index("ix_notifications_user_is_read", "user_id", "is_read"),
+    )
+
+
+
+# Compteur de notifications non lues par utilisateur (badge) : lu en O(1) par clé primaire,
+# tenu à jour dans la même transaction que les créations et marquages comme lus.
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,20 @@
+# models/rollup_model.py - Totaux pré-calculés par période (semaine, mois, année)
+# Pour un débutant : évite de re-sommer tout l'historique daily_metrics à chaque lecture.
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from .database import Base
+
+class MetricRollup(Base):
+    __tablename__ = "metric_rollups"
+
+    # Clé primaire composée (user_id, period_kind, period_start).
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # Type de période - week (ISO, lundi), month ou year.
+    period_kind = Column(String, primary_key=True)
+    # Début de la période - format ISO (e.g., 2025-08-04).
+    period_start = Column(String, primary_key=True)
+    # Totaux de la période.
+    sales = Column(Float, nullable=False, default=0.0)
+    cash = Column(Float, nullable=False, default=0.0)
+    # Nombre de saisies journalières dans la période.
+    count = Column(Integer, nullable=False, default=0)
@@ -8,9 +8,11 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 # Importe schémas et services.
 from schemas.auth_schemas import Login, Token, Register, FCMToken
-from services.auth_service import authenticate_user, create_access_token, create_refresh_token, create_user, get_current_user, get_user_by_email
+from services.auth_service import issue_tokens, create_user, get_current_user, get_refresh_user, get_user_by_email, rehash_password
+from services.password_hasher import password_hasher, HashingBusy, hashing_busy
+from services.user_service import set_fcm_token as save_fcm_token
 # Importe get_db.
-from models.database import get_db
+from models.database import get_db, run_db
 
 # Crée router pour auth endpoints.
 router = APIRouter()
@@ -20,50 +22,56 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 # POST /login - authentifie et retourne tokens.
 @router.post("/login", response_model=Token)
-def login(login: Login, db: Session = Depends(get_db)):
-    # Authentifie user avec email/password.
-    user = authenticate_user(db, login.email, login.password)
+async def login(login: Login, db: Session = Depends(get_db)):
+    # Authentifie user avec email/password ; la vérification argon2 passe par le pool de hachage.
+    user = await run_db(db, get_user_by_email, login.email)
     # Si échec, lève erreur 401.
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(login.password, user.hashed_password)
+    except HashingBusy:
+        raise hashing_busy()
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    # Hachage obsolète (bcrypt, anciens paramètres) : remplacé de façon transparente.
+    if new_hash:
+        await run_db(db, rehash_password, user.id, new_hash)
     # Crée access et refresh tokens.
-    access_token = create_access_token({"sub": user.email})
-    refresh_token = create_refresh_token({"sub": user.email})
     # Met à jour fcm_token si fourni (pour push).
     # Note : Ajoute fcm_token dans Login schema si besoin.
-    return {"access_token": access_token, "refresh_token": refresh_token}
+    return issue_tokens(user)
 
-# POST /refresh - renouvelle access token.
+# POST /refresh - renouvelle access token (refresh token uniquement, un access token est refusé).
 @router.post("/refresh", response_model=Token)
-def refresh(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def refresh(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     # Décode refresh token.
-    from services.auth_service import get_current_user
-    user = get_current_user(db, token)
+    user = await run_db(db, get_refresh_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     # Crée nouveaux tokens.
-    access_token = create_access_token({"sub": user.email})
-    refresh_token = create_refresh_token({"sub": user.email})
-    return {"access_token": access_token, "refresh_token": refresh_token}
+    return issue_tokens(user)
 
 @router.post("/register", response_model=Token)
-def register(register: Register, db: Session = Depends(get_db)):
+async def register(register: Register, db: Session = Depends(get_db)):
     # Vérifier si l'utilisateur existe déjà
-    existing_user = get_user_by_email(db, register.email)
+    existing_user = await run_db(db, get_user_by_email, register.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    user = create_user(db, register.email, register.password, register.name)
+    try:
+        hashed = await password_hasher.hash(register.password)
+    except HashingBusy:
+        raise hashing_busy()
+    user = await run_db(db, create_user, register.email, hashed, register.name)
     # Créer et retourner les tokens pour connecter automatiquement
-    access_token = create_access_token({"sub": user.email})
-    refresh_token = create_refresh_token({"sub": user.email})
-    return {"access_token": access_token, "refresh_token": refresh_token}
+    return issue_tokens(user)
 
 @router.post("/set-fcm-token")
 async def set_fcm_token(fcm: FCMToken, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+    user = await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user.fcm_token = fcm.fcm_token
-    db.commit()
+    # Passe par le service pour invalider le cache des utilisateurs authentifiés.
+    await run_db(db, save_fcm_token, user.id, fcm.fcm_token)
     return {"message": "FCM token updated"}
\ No newline at end of file
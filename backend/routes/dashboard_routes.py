@@ -1,12 +1,15 @@
 # routes/dashboard_routes.py - Endpoints pour dashboard et graphiques
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from schemas.dashboard_schemas import DashboardStats, GraphData
-from services.dashboard_service import get_dashboard_stats, get_graph_data
-from services.auth_service import get_current_user
-from models.database import get_db
+from datetime import date
+from schemas.dashboard_schemas import DashboardStats, GraphData, Series
+from services.dashboard_service import get_dashboard_stats, get_graph_data, get_series, get_series_columns
+from services.auth_service import get_current_user, get_token_principal
+from services.data_version_service import not_modified
+from models.database import get_db, run_db
+from utils.columnar import columnar_media_type, columnar_response
 
 router = APIRouter(prefix="/v1")
 
@@ -14,12 +17,18 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 # GET /v1/dashboard - récupère les stats du dashboard
 @router.get("/dashboard", response_model=DashboardStats)
-async def get_dashboard_endpoint(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+async def get_dashboard_endpoint(request: Request, response: Response, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    # Profil complet (userName) : pas de principal depuis les seules claims ici.
+    user = await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    stats = get_dashboard_stats(db, user.id)
+    # 304 si le client a déjà cette version des données (aucune agrégation).
+    cached = await not_modified(request, response, db, user.id)
+    if cached:
+        return cached
+    
+    stats = await run_db(db, get_dashboard_stats, user.id)
     return {
         "userName": user.name,
         **stats
@@ -27,10 +36,37 @@ async def get_dashboard_endpoint(db: Session = Depends(get_db), token: str = Dep
 
 # GET /v1/graphs - récupère les données pour les graphiques
 @router.get("/graphs", response_model=GraphData)
-async def get_graphs_endpoint(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+async def get_graphs_endpoint(request: Request, response: Response, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    # Lecture seule : l'id porté par le token suffit (pas de requête sur users).
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    return get_graph_data(db, user.id)
+    cached = await not_modified(request, response, db, user.id)
+    if cached:
+        return cached
+    
+    return await run_db(db, get_graph_data, user.id)
+
+# GET /v1/series - totaux par période (day, week, month, year) entre deux dates
+# Format colonnes (dates, sales, cash, count) sur demande via l'en-tête Accept (voir utils/columnar.py).
+@router.get("/series", response_model=Series)
+async def get_series_endpoint(
+    request: Request,
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    bucket: str = "day",
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
+    media_type = columnar_media_type(request.headers.get("accept"))
+    try:
+        if media_type:
+            return columnar_response(await run_db(db, get_series_columns, user.id, start, end, bucket), media_type)
+        return await run_db(db, get_series, user.id, start, end, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
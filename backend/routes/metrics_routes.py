@@ -1,14 +1,23 @@
 # routes/metrics_routes.py - Endpoints pour metrics (section 10 specs).
 # Pour un débutant : Gère création et lecture des metrics.
 
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta, date as date_type
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from schemas.metric_schemas import MetricCreate, Metric, MetricList, Insights
-from services.metric_service import create_metric, get_metrics, get_insights
-from services.auth_service import get_current_user
-from models.database import get_db
-from models.metric_model import DailyMetric
+from typing import Optional, Union
+from schemas.metric_schemas import MetricCreate, Metric, MetricList, MetricBatch, MetricBatchResult, Insights, InsightsRange
+from services.metric_service import upsert_metric, upsert_metrics_batch, get_metrics_with_deltas, get_metrics_page, get_metric_columns, get_insights, get_insights_range, METRICS_STREAM_CHUNK
+from services.auth_service import get_current_user, get_token_principal
+from services.notification_worker import notification_worker
+from services.data_version_service import not_modified
+from models.database import get_db, run_db, close_db
+from utils.columnar import columnar_media_type, columnar_response, numpy_json_response
+
+logger = logging.getLogger(__name__)
 
 # Crée router avec préfixe /v1.
 router = APIRouter(prefix="/v1")
@@ -16,96 +25,143 @@ router = APIRouter(prefix="/v1")
 # Scheme OAuth2.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Type de contenu du mode streaming (une metric JSON par ligne).
+NDJSON = "application/x-ndjson"
+
+# Écrit les metrics en NDJSON, paquet par paquet (mémoire constante quelle que soit la plage).
+async def _stream_metrics(db, user_id: int, start: date_type):
+    try:
+        before = None
+        while True:
+            rows = await run_db(db, get_metrics_page, user_id, start, before, METRICS_STREAM_CHUNK)
+            if not rows:
+                return
+            yield "".join(
+                json.dumps({"id": r["id"], "date": r["date"].isoformat(), "sales": r["sales"], "cash": r["cash"],
+                            "deltas": r["deltas"]}, separators=(",", ":")) + "\n"
+                for r in rows
+            )
+            if len(rows) < METRICS_STREAM_CHUNK:
+                return
+            before = rows[-1]["date"]
+    finally:
+        # La session est fermée ici, après le dernier paquet (le streaming survit au handler).
+        await close_db(db)
+
 # POST /v1/metrics - crée une saisie.
 @router.post("/metrics", response_model=Metric)
 async def create_metric_endpoint(metric: MetricCreate, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
     try:
         # Vérifie user via token.
-        user = get_current_user(db, token)
+        user = await run_db(db, get_current_user, token)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        # Vérifier si une métrique existe déjà pour cette date et cet utilisateur
-        existing_metric = db.query(DailyMetric).filter(
-            DailyMetric.user_id == user.id,
-            DailyMetric.date == metric.date
-        ).first()
-        
-        if existing_metric:
-            # Mettre à jour la métrique existante au lieu de créer une nouvelle
-            existing_metric.sales = metric.sales
-            existing_metric.cash = metric.cash
-            existing_metric.source = metric.source
-            db.commit()
-            db.refresh(existing_metric)
-            db_metric = existing_metric
-        else:
-            # Crée metric en DB.
-            db_metric = create_metric(db, metric, user.id)
+        # Upsert atomique (avec J-1 et rollups) en une transaction.
+        result = await run_db(db, upsert_metric, metric, user.id)
+        # Règles de notification évaluées hors du chemin de la requête.
+        notification_worker.enqueue(user.id)
         
-        # Calcule deltas vs J-1.
-        from datetime import datetime, timedelta
-        try:
-            prev_date = (datetime.strptime(metric.date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-            prev_metric = db.query(DailyMetric).filter(
-                DailyMetric.user_id == user.id,
-                DailyMetric.date == prev_date
-            ).first()
-        except ValueError:
-            # Si la date est invalide, pas de métrique précédente
-            prev_metric = None
-        
-        deltas = {"sales": 0.0, "cash": 0.0}
-        if prev_metric:
-            deltas["sales"] = ((db_metric.sales - prev_metric.sales) / prev_metric.sales * 100) if prev_metric.sales else 0.0
-            deltas["cash"] = ((db_metric.cash - prev_metric.cash) / prev_metric.cash * 100) if prev_metric.cash else 0.0
-        
-        # Convertit db_metric en Metric et ajoute deltas.
-        metric_response = Metric(
-            id=db_metric.id,
-            date=db_metric.date,
-            sales=db_metric.sales,
-            cash=db_metric.cash,
-            source=db_metric.source,
-            deltas=deltas
-        )
+        # Convertit le résultat en Metric (deltas vs J-1 inclus).
+        metric_response = Metric(**result)
         return metric_response
     except HTTPException:
         raise
     except Exception as e:
-        # Log l'erreur pour le débogage
-        import traceback
-        print(f"Erreur lors de la création de métrique: {e}")
-        print(traceback.format_exc())
+        # Log l'erreur (avec la trace) pour le débogage
+        logger.exception("metric creation failed")
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
+# POST /v1/metrics/batch - synchronise un lot de saisies (file hors ligne de l'app).
+@router.post("/metrics/batch", response_model=MetricBatchResult)
+async def create_metrics_batch_endpoint(batch: MetricBatch, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    user = await run_db(db, get_current_user, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    # Un seul aller-retour transactionnel pour tout le lot.
+    result = await run_db(db, upsert_metrics_batch, user.id, batch.metrics)
+    if result["created"] or result["updated"]:
+        notification_worker.enqueue(user.id)
+    return result
+
 # GET /v1/metrics - liste metrics pour range.
+# Avec `Accept: application/x-ndjson`, la réponse est envoyée en streaming, une metric par ligne ;
+# avec un format colonnes (voir utils/columnar.py), en tableaux parallèles dates/sales/cash.
 @router.get("/metrics", response_model=MetricList)
-async def get_metrics_endpoint(range: str = "10d", db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+async def get_metrics_endpoint(request: Request, response: Response, range: str = "10d", db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    # Lecture seule : l'id porté par le token suffit (pas de requête sur users).
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
+    # 304 si le client a déjà cette version des données (aucune lecture de metrics).
+    cached = await not_modified(request, response, db, user.id)
+    if cached:
+        return cached
+    etag = {"ETag": response.headers["etag"]}
     # Parse range (e.g., 10d -> 10).
     days = int(range[:-1]) if range.endswith('d') else 10
-    # Get metrics.
-    metrics = get_metrics(db, user.id, days)
+    accept = request.headers.get("accept", "")
+    start = datetime.now().date() - timedelta(days=days)
+    if NDJSON in accept:
+        return StreamingResponse(_stream_metrics(db, user.id, start), media_type=NDJSON, headers=etag)
+    media_type = columnar_media_type(accept)
+    if media_type:
+        return columnar_response(await run_db(db, get_metric_columns, user.id, start), media_type, etag)
+    # Get metrics, avec leurs deltas vs J-1 (calculés par la même requête).
+    metrics = await run_db(db, get_metrics_with_deltas, user.id, start)
     # Convert en schéma.
-    return {"metrics": [Metric(
-        id=m.id,
-        date=m.date,
-        sales=m.sales,
-        cash=m.cash,
-        source=m.source,
-        deltas=None  # Les deltas ne sont pas calculés dans la liste
-    ) for m in metrics]}
-
-
-# GET /v1/insights - calcule % pour date.
-@router.get("/insights", response_model=Insights)
-async def get_insights_endpoint(date: str, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+    return {"metrics": [Metric(**m) for m in metrics]}
+
+
+# GET /v1/insights - calcule % vs J-1 pour une date (?date=), ou pour chaque jour d'une plage (?from=&to=).
+@router.get("/insights", response_model=Union[Insights, InsightsRange])
+async def get_insights_endpoint(
+    date: Optional[date_type] = None,
+    start: Optional[date_type] = Query(None, alias="from"),
+    end: Optional[date_type] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if date is not None:
+        # Get insights.
+        return await run_db(db, get_insights, user.id, date)
+    if start is None or end is None:
+        raise HTTPException(status_code=400, detail="Provide either 'date' or both 'from' and 'to'")
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must be on or after 'from'")
+    return {"insights": await run_db(db, get_insights_range, user.id, start, end)}
+
+
+# GET /v1/insights/series - analyses jour par jour (moyennes 7/30 j, variations semaine/mois,
+# ratio cash/ventes, z-scores et anomalies), en colonnes. Par défaut : les 90 derniers jours.
+@router.get("/insights/series")
+async def get_insight_series_endpoint(
+    request: Request,
+    response: Response,
+    start: Optional[date_type] = Query(None, alias="from"),
+    end: Optional[date_type] = Query(None, alias="to"),
+    zThreshold: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
-    # Get insights.
-    insights = get_insights(db, user.id, date)
-    return insights
\ No newline at end of file
+
+    cached = await not_modified(request, response, db, user.id)
+    if cached:
+        return cached
+
+    # Import tardif : NumPy n'est chargé qu'au premier appel (démarrage à froid plus court).
+    from services.analytics_service import get_insight_series, DEFAULT_Z_THRESHOLD
+
+    end = end or datetime.now().date()
+    start = start or end - timedelta(days=89)
+    try:
+        series = await run_db(db, get_insight_series, user.id, start, end, zThreshold or DEFAULT_Z_THRESHOLD)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return numpy_json_response(series, {"ETag": response.headers["etag"]})
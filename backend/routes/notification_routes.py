@@ -1,39 +1,74 @@
 # routes/notification_routes.py - Endpoints pour les notifications
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from schemas.notification_schemas import NotificationResponse, NotificationUpdate
 from services.notification_service import (
     get_notifications,
+    get_notification,
+    get_unread_count,
     mark_notification_as_read,
     mark_all_as_read,
-    generate_dynamic_notifications
+    encode_cursor,
+    decode_cursor,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE
 )
-from services.auth_service import get_current_user
-from models.database import get_db
+from services.auth_service import get_current_user, get_token_principal
+from services.data_version_service import not_modified
+from models.database import get_db, run_db
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-# GET /notifications - récupère les notifications de l'utilisateur
+# GET /notifications?before=<curseur>&limit= - récupère une page de notifications de l'utilisateur
+# La page suivante s'obtient avec le curseur renvoyé dans l'en-tête X-Next-Cursor.
 @router.get("", response_model=List[NotificationResponse])
 async def get_notifications_endpoint(
+    request: Request,
+    response: Response,
+    before: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
-    user = get_current_user(db, token)
+    # Lecture seule : l'id porté par le token suffit (pas de requête sur users).
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    # Générer des notifications dynamiques avant de récupérer
-    generate_dynamic_notifications(db, user.id)
+    try:
+        before_id = decode_cursor(before) if before else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    notifications = get_notifications(db, user.id)
+    # 304 si le client a déjà cette version des données.
+    cached = await not_modified(request, response, db, user.id)
+    if cached:
+        return cached
+    
+    # Lecture seule : les notifications dynamiques sont générées en arrière-plan
+    # (après chaque saisie et chaque jour, voir services/notification_worker.py).
+    notifications = await run_db(db, get_notifications, user.id, limit, before_id)
+    if len(notifications) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(notifications[-1])
     return notifications
 
+# GET /notifications/unread-count - nombre de non lues (badge), lu depuis un compteur
+@router.get("/unread-count")
+async def get_unread_count_endpoint(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    user = get_token_principal(token) or await run_db(db, get_current_user, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    return {"unread": await run_db(db, get_unread_count, user.id)}
+
 # PUT /notifications/{notification_id}/read - marque une notification comme lue
 @router.put("/{notification_id}/read", response_model=NotificationResponse)
 async def mark_notification_read_endpoint(
@@ -41,20 +76,16 @@ async def mark_notification_read_endpoint(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
-    user = get_current_user(db, token)
+    user = await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    success = mark_notification_as_read(db, notification_id, user.id)
+    success = await run_db(db, mark_notification_as_read, notification_id, user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Notification not found")
     
     # Récupérer la notification mise à jour
-    from models.notification_model import Notification
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user.id
-    ).first()
+    notification = await run_db(db, get_notification, notification_id, user.id)
     
     return notification
 
@@ -64,10 +95,10 @@ async def mark_all_notifications_read_endpoint(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
-    user = get_current_user(db, token)
+    user = await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    count = mark_all_as_read(db, user.id)
+    count = await run_db(db, mark_all_as_read, user.id)
     return {"message": f"{count} notifications marquées comme lues"}
 
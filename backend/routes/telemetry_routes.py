@@ -0,0 +1,33 @@
+# routes/telemetry_routes.py - Export des mesures internes (GET /metrics, format texte Prometheus).
+# Pour un débutant : à brancher comme cible de scrape Prometheus ; si METRICS_TOKEN est défini,
+# l'appel doit porter l'en-tête "Authorization: Bearer <METRICS_TOKEN>".
+
+import os
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+
+from services.notification_worker import notification_worker
+from services.password_hasher import password_hasher
+from services.principal_cache import principal_cache
+from services.telemetry import CONTENT_TYPE, registry
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+router = APIRouter()
+
+# Statistiques des composants partagés du processus, lues à chaque export.
+registry.register_stats("principal_cache", principal_cache.stats)
+registry.register_stats("password_hasher", password_hasher.stats)
+registry.register_stats("notification_worker", notification_worker.stats)
+
+
+# GET /metrics - toutes les mesures du processus.
+@router.get("/metrics", include_in_schema=False)
+def get_metrics_export(request: Request):
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(supplied, METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(registry.render(), media_type=CONTENT_TYPE)
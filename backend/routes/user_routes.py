@@ -6,7 +6,8 @@ from sqlalchemy.orm import Session
 from schemas.user_schemas import User, UserUpdate
 from services.user_service import get_user, update_user
 from services.auth_service import get_current_user
-from models.database import get_db
+from services.password_hasher import password_hasher, HashingBusy, hashing_busy
+from models.database import get_db, run_db
 
 router = APIRouter()
 
@@ -15,7 +16,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 # GET /user/me - récupère le profil utilisateur
 @router.get("/user/me", response_model=User)
 async def get_current_user_profile(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    user = get_current_user(db, token)
+    user = await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     return user
@@ -27,12 +28,20 @@ async def update_current_user_profile(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
-    user = get_current_user(db, token)
+    user = await run_db(db, get_current_user, token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     
+    # Le nouveau mot de passe est haché dans le pool de hachage, hors de la transaction.
+    hashed = None
+    if user_update.password is not None:
+        try:
+            hashed = await password_hasher.hash(user_update.password)
+        except HashingBusy:
+            raise hashing_busy()
+    
     try:
-        updated_user = update_user(db, user.id, user_update)
+        updated_user = await run_db(db, update_user, user.id, user_update, hashed)
         if not updated_user:
             raise HTTPException(status_code=404, detail="User not found")
         return updated_user
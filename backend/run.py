@@ -1,81 +1,229 @@
 # run.py - Fichier principal pour lancer l'API FastAPI.
 # Pour un débutant : Ce fichier est exécuté avec `uvicorn run:app --reload`.
+#
+# create_app(settings) construit l'application sans rien démarrer : importer ce module ne crée
+# ni tables, ni threads. Le travail de démarrage (tables et migrations, tâches planifiées,
+# worker des notifications, préchauffage) s'exécute dans le lifespan, quand le serveur démarre,
+# et s'arrête proprement avec lui. Les dépendances lourdes (APScheduler, NumPy...) ne sont
+# importées qu'au moment où elles servent.
+#
+# Objectif de démarrage à froid (mesuré par python -m benchmarks.startup_time) :
+# import + create_app en moins de STARTUP_TARGET_S secondes, sans base ni thread.
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
 
 # Importe FastAPI pour créer l'API.
 from fastapi import FastAPI
-# Importe CORS middleware pour permettre les requêtes depuis le frontend.
-from fastapi.middleware.cors import CORSMiddleware
-# Importe load_dotenv pour lire le fichier .env.
-from dotenv import load_dotenv
-# Importe os pour accéder aux variables d'environnement.
-import os
-# Importe les routers (routes) pour metrics et auth.
-from routes.metrics_routes import router as metrics_router
-from routes.auth import router as auth_router
-from routes.user_routes import router as user_router
-from routes.dashboard_routes import router as dashboard_router
-from routes.notification_routes import router as notification_router
-# Importe la DB engine et Base pour créer les tables.
-from models.database import engine, Base
-# Importe tous les modèles pour que SQLAlchemy les détecte et crée les tables
-from models.user_model import User
-from models.metric_model import DailyMetric
-from models.notification_model import Notification
-# Importe le scheduler pour tâches planifiées (rappels push).
-from apscheduler.schedulers.background import BackgroundScheduler
-# Importe la fonction pour envoyer rappels push.
-from services.notification_service import send_daily_reminder
-# Importe les gestionnaires d'exceptions
-from fastapi.exceptions import RequestValidationError
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from middleware.exception_handler import exception_handler, validation_exception_handler, integrity_error_handler
-
-# Charge les variables d'environnement (e.g., DATABASE_URL, SECRET_KEY).
-load_dotenv()
-
-# Crée l'instance FastAPI avec un titre et une version (visible dans /docs).
-app = FastAPI(title="Compta Backend", version="1.0")
-
-# Configure CORS pour permettre les requêtes depuis le frontend Flutter.
-# IMPORTANT: Le middleware CORS doit être ajouté AVANT les routers
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # En développement, autorise toutes les origines. En production, spécifier les domaines autorisés.
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD"],  # Méthodes HTTP explicites incluant OPTIONS
-    allow_headers=["*"],  # Autorise tous les headers (Content-Type, Authorization, etc.)
-    expose_headers=["*"],  # Expose tous les headers dans la réponse
-    max_age=3600,  # Cache les résultats preflight pendant 1 heure
-)
-
-# Ajoute les gestionnaires d'exceptions globaux
-app.add_exception_handler(Exception, exception_handler)
-app.add_exception_handler(RequestValidationError, validation_exception_handler)
-app.add_exception_handler(IntegrityError, integrity_error_handler)
-
-# Crée les tables dans la DB au démarrage (SQLAlchemy génère les CREATE TABLE).
-Base.metadata.create_all(bind=engine)
-
-# Ajoute les routers à l'app avec préfixe /v1 pour metrics (versioning API).
-app.include_router(metrics_router)
-# Ajoute le router auth sans préfixe (e.g., /login).
-app.include_router(auth_router)
-# Ajoute le router user pour profil.
-app.include_router(user_router)
-# Ajoute le router dashboard pour stats et graphiques.
-app.include_router(dashboard_router)
-# Ajoute le router notifications pour les notifications dynamiques.
-app.include_router(notification_router)
-
-# Configure le scheduler pour envoyer rappels push à 20h (section 11 specs).
-scheduler = BackgroundScheduler()
-# Ajoute job pour appeler send_daily_reminder tous les jours à 20:00.
-scheduler.add_job(send_daily_reminder, 'cron', hour=20, minute=0)
-# Démarre le scheduler en background (non bloquant).
-scheduler.start()
-
-# Route racine pour tester si l'API fonctionne (GET /).
-@app.get("/")
-def read_root():
-    # Retourne un JSON simple pour confirmer que l'API est up.
-    return {"message": "Compta Backend API is running"}
\ No newline at end of file
+from starlette.concurrency import run_in_threadpool
+
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Cible (secondes, médiane sur un cœur) pour importer run.py et construire l'app.
+STARTUP_TARGET_S = 1.0
+
+
+# Crée les tables, migre une base existante et construit les rollups manquants.
+def _setup_schema():
+    from models.database import engine, Base, SessionLocal
+    # Importe tous les modèles pour que SQLAlchemy les détecte et crée les tables.
+    import models.user_model  # noqa: F401
+    import models.metric_model  # noqa: F401
+    import models.notification_model  # noqa: F401
+    import models.rollup_model  # noqa: F401
+    import models.job_model  # noqa: F401
+    import models.data_version_model  # noqa: F401
+    from models.migrations import run_migrations
+    from services.rollup_service import ensure_rollups
+
+    # Crée les tables dans la DB (SQLAlchemy génère les CREATE TABLE).
+    Base.metadata.create_all(bind=engine)
+    # Migre en place les tables d'une base existante (e.g., daily_metrics.date en vraie date).
+    run_migrations(engine)
+    # Construit les rollups d'une base existante créée avant la table metric_rollups.
+    with SessionLocal() as db:
+        ensure_rollups(db)
+
+
+# Déclare les tâches planifiées et démarre le scheduler ; retourne le scheduler.
+def _start_scheduler():
+    # Importe le scheduler pour tâches planifiées (rappels push).
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from models.database import SessionLocal
+    # Importe la fonction pour envoyer rappels push.
+    from services.notification_service import send_daily_reminder
+    # Importe le runner qui garantit une seule exécution par occurrence (plusieurs workers).
+    from services.job_runner import JobRunner, JOB_TICK_SECONDS
+    from services.notification_worker import evaluate_daily_notifications
+    from services.telemetry import registry
+
+    # Chaque occurrence est réservée en base (table job_runs), donc exécutée par un seul
+    # worker même si plusieurs processus uvicorn tournent.
+    job_runner = JobRunner(SessionLocal)
+    # Rappels push tous les jours à 20:00 (section 11 specs) ; pas de rappel rattrapé plus de 2 h après.
+    job_runner.add_job("daily_reminder", send_daily_reminder, hour=20, minute=0, catchup_hours=2)
+    # Évaluation des notifications quotidiennes (ventes/cash de la veille) à 00:05.
+    job_runner.add_job("daily_notifications", evaluate_daily_notifications, hour=0, minute=5)
+    # Compteurs des tâches (exécutions, échecs, dernière durée) exportés par tâche sur GET /metrics.
+    registry.register_stats("job", job_runner.stats, label="job")
+
+    # Vérifie les tâches dues toutes les JOB_TICK_SECONDS secondes (premier passage immédiat
+    # pour rattraper une occurrence manquée pendant un redémarrage).
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(job_runner.tick, 'interval', seconds=JOB_TICK_SECONDS, next_run_time=datetime.now(), coalesce=True)
+    # Démarre le scheduler en background (non bloquant).
+    scheduler.start()
+    return scheduler
+
+
+# Branche la mesure des requêtes SQL (GET /metrics) et, si demandé, le profileur par requête.
+def _instrument_db(sql_profile: bool):
+    from models.database import engine, async_engine
+    from services.telemetry import instrument_engine
+    from services.query_profiler import profile_engine
+
+    for db_engine in filter(None, (engine, async_engine)):
+        instrument_engine(db_engine)
+        if sql_profile:
+            profile_engine(db_engine)
+
+
+# Préchauffage après le démarrage (en arrière-plan) : la première requête ne paie ni
+# l'ouverture d'une connexion à la base, ni l'import de NumPy (séries d'insights).
+def _warm_up():
+    from sqlalchemy import text
+    from models.database import engine
+    import services.analytics_service  # noqa: F401
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+# Trace un échec du préchauffage (la suite du démarrage n'en dépend pas).
+def _log_warm_up_failure(future: asyncio.Future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.warning("warm-up failed", exc_info=error)
+
+
+def _lifespan(settings: Settings):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        from services.notification_worker import notification_worker
+
+        if settings.configure_logging:
+            from utils.structured_logging import configure_logging
+            # Logs JSON non bloquants (niveaux : LOG_LEVEL / LOG_LEVELS, voir utils/structured_logging.py).
+            configure_logging()
+        scheduler = None
+        worker_started = False
+        warm_up: Optional[asyncio.Future] = None
+        # Tout ce qui a démarré est arrêté, même si une étape suivante du démarrage échoue.
+        try:
+            if settings.instrument_db:
+                _instrument_db(settings.sql_profile)
+            if settings.setup_schema:
+                await run_in_threadpool(_setup_schema)
+            if settings.start_scheduler:
+                scheduler = await run_in_threadpool(_start_scheduler)
+            if settings.start_worker:
+                # Démarre le worker des notifications (thread en background).
+                notification_worker.start()
+                worker_started = True
+            if settings.warm_up:
+                warm_up = asyncio.ensure_future(asyncio.to_thread(_warm_up))
+                warm_up.add_done_callback(_log_warm_up_failure)
+            yield
+        finally:
+            if warm_up is not None and not warm_up.done():
+                warm_up.cancel()
+            if scheduler is not None:
+                scheduler.shutdown(wait=False)
+            if worker_started:
+                await run_in_threadpool(notification_worker.stop)
+            if settings.configure_logging:
+                from utils.structured_logging import shutdown_logging
+                shutdown_logging()
+
+    return lifespan
+
+
+# Construit l'application : routes, middlewares et gestionnaires d'exceptions (aucun démarrage ici).
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+
+    # Importe CORS middleware pour permettre les requêtes depuis le frontend.
+    from fastapi.middleware.cors import CORSMiddleware
+    # Importe les gestionnaires d'exceptions
+    from fastapi.exceptions import RequestValidationError
+    from sqlalchemy.exc import IntegrityError
+    from middleware.exception_handler import exception_handler, validation_exception_handler, integrity_error_handler
+    from middleware.request_id import RequestIdMiddleware
+    from middleware.telemetry import TelemetryMiddleware
+    # Importe les routers (routes).
+    from routes.metrics_routes import router as metrics_router
+    from routes.auth import router as auth_router
+    from routes.user_routes import router as user_router
+    from routes.dashboard_routes import router as dashboard_router
+    from routes.notification_routes import router as notification_router
+    from routes.telemetry_routes import router as telemetry_router
+
+    # Crée l'instance FastAPI avec un titre et une version (visible dans /docs).
+    app = FastAPI(title=settings.title, version=settings.version, lifespan=_lifespan(settings))
+
+    # Configure CORS pour permettre les requêtes depuis le frontend Flutter.
+    # IMPORTANT: Le middleware CORS doit être ajouté AVANT les routers
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,  # En développement, autorise toutes les origines (CORS_ORIGINS en production).
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD"],  # Méthodes HTTP explicites incluant OPTIONS
+        allow_headers=["*"],  # Autorise tous les headers (Content-Type, Authorization, etc.)
+        expose_headers=["*"],  # Expose tous les headers dans la réponse
+        max_age=3600,  # Cache les résultats preflight pendant 1 heure
+    )
+    # Id de requête ajouté aux logs et renvoyé dans l'en-tête X-Request-ID.
+    app.add_middleware(RequestIdMiddleware)
+    # Nombre de requêtes, statuts et latences par route (exportés sur GET /metrics).
+    app.add_middleware(TelemetryMiddleware)
+    # Profileur SQL par requête (SQL_PROFILE=1) : en-têtes X-Query-Count / X-DB-Time, N+1 signalés.
+    if settings.sql_profile:
+        from middleware.query_profiler import QueryProfilerMiddleware
+        app.add_middleware(QueryProfilerMiddleware)
+
+    # Ajoute les gestionnaires d'exceptions globaux
+    app.add_exception_handler(Exception, exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(IntegrityError, integrity_error_handler)
+
+    # Ajoute les routers à l'app avec préfixe /v1 pour metrics (versioning API).
+    app.include_router(metrics_router)
+    # Ajoute le router auth sans préfixe (e.g., /login).
+    app.include_router(auth_router)
+    # Ajoute le router user pour profil.
+    app.include_router(user_router)
+    # Ajoute le router dashboard pour stats et graphiques.
+    app.include_router(dashboard_router)
+    # Ajoute le router notifications pour les notifications dynamiques.
+    app.include_router(notification_router)
+    # Ajoute l'export des mesures internes (GET /metrics, format Prometheus).
+    app.include_router(telemetry_router)
+
+    # Route racine pour tester si l'API fonctionne (GET /).
+    @app.get("/")
+    def read_root():
+        # Retourne un JSON simple pour confirmer que l'API est up.
+        return {"message": "Compta Backend API is running"}
+
+    return app
+
+
+# Application servie par uvicorn (run:app).
+app = create_app()
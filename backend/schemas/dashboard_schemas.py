@@ -18,3 +18,17 @@ class GraphData(BaseModel):
     totalSales: float
     totalCash: float
 
+
+# Schéma SeriesPoint - totaux d'une période
+class SeriesPoint(BaseModel):
+    periodStart: str  # début de la période (YYYY-MM-DD)
+    sales: float
+    cash: float
+    count: int  # nombre de saisies dans la période
+
+# Schéma Series - pour GET /v1/series
+class Series(BaseModel):
+    bucket: str  # day, week, month ou year
+    start: str
+    end: str
+    points: List[SeriesPoint]
@@ -2,14 +2,16 @@
 # Pour un débutant : Les schémas valident automatiquement les données (types, formats).
 
 # Importe BaseModel pour créer schémas.
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 # Importe Optional et List pour types flexibles.
 from typing import Optional, List
+# Importe date pour valider le format ISO (YYYY-MM-DD).
+from datetime import date as date_type
 
 # Schéma MetricCreate - pour POST /metrics (input).
 class MetricCreate(BaseModel):
-    # Date - string ISO (requis).
-    date: str
+    # Date - ISO YYYY-MM-DD (requis, refusée si invalide).
+    date: date_type
     # Sales - float pour ventes (XOF).
     sales: float
     # Cash - float pour cash.
@@ -20,7 +22,7 @@ class MetricCreate(BaseModel):
 # Schéma Metric - pour output (avec ID et deltas).
 class Metric(BaseModel):
     id: int
-    date: str
+    date: date_type
     sales: float
     cash: float
     # Deltas - variations % vs J-1 (optionnel si pas calculé).
@@ -30,6 +32,32 @@ class Metric(BaseModel):
     class Config:
         from_attributes = True
 
+# Taille maximale d'un lot de synchronisation hors ligne.
+MAX_BATCH_SIZE = 500
+
+# Schéma MetricBatch - pour POST /metrics/batch (input).
+# Les entrées sont validées une par une : une entrée invalide n'empêche pas les autres.
+class MetricBatch(BaseModel):
+    metrics: List[dict] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+# Schéma MetricBatchItem - statut d'une entrée du lot.
+class MetricBatchItem(BaseModel):
+    # Position de l'entrée dans le lot.
+    index: int
+    # created, updated, superseded (même date plus loin dans le lot) ou invalid.
+    status: str
+    id: Optional[int] = None
+    date: Optional[date_type] = None
+    deltas: Optional[dict] = None
+    error: Optional[str] = None
+
+# Schéma MetricBatchResult - pour POST /metrics/batch (output).
+class MetricBatchResult(BaseModel):
+    items: List[MetricBatchItem]
+    created: int
+    updated: int
+    invalid: int
+
 # Schéma MetricList - pour GET /metrics (liste).
 class MetricList(BaseModel):
     metrics: List[Metric]
@@ -37,4 +65,12 @@ class MetricList(BaseModel):
 # Schéma Insights - pour GET /insights.
 class Insights(BaseModel):
     pctSales: float
-    pctCash: float
\ No newline at end of file
+    pctCash: float
+
+# Schéma InsightsDay - insights d'un jour d'une plage.
+class InsightsDay(Insights):
+    date: date_type
+
+# Schéma InsightsRange - pour GET /insights?from=...&to=...
+class InsightsRange(BaseModel):
+    insights: List[InsightsDay]
@@ -0,0 +1,211 @@
+# services/aggregation_service.py - Moteur d'agrégation par périodes (jour, semaine, mois, année)
+# Pour un débutant : une seule requête SQL groupée calcule les totaux de chaque période,
+# puis les périodes sans saisie sont complétées avec des zéros.
+# Les semaines, mois et années complets sont lus dans metric_rollups (voir rollup_service).
+
+from sqlalchemy import func, String, or_, and_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.orm import Session
+from models.metric_model import DailyMetric
+from models.rollup_model import MetricRollup
+from datetime import date, timedelta
+from typing import List
+
+# Tailles de période supportées (la semaine est la semaine ISO, du lundi au dimanche).
+BUCKETS = ("day", "week", "month", "year")
+# Nombre maximum de périodes par série (10 ans en jours).
+MAX_BUCKETS = 3660
+
+
+# Début de la période qui contient la date d.
+def bucket_start(d: date, bucket: str) -> date:
+    if bucket == "day":
+        return d
+    if bucket == "week":
+        return d - timedelta(days=d.weekday())
+    if bucket == "month":
+        return d.replace(day=1)
+    if bucket == "year":
+        return d.replace(month=1, day=1)
+    raise ValueError(f"Unknown bucket: {bucket}")
+
+
+# Début de la période suivante.
+def next_bucket_start(d: date, bucket: str) -> date:
+    start = bucket_start(d, bucket)
+    if bucket == "day":
+        return start + timedelta(days=1)
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start.replace(year=start.year + 1)
+
+
+# Liste des débuts de période entre start et end (inclus).
+def bucket_starts(start: date, end: date, bucket: str) -> List[date]:
+    starts = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        starts.append(current)
+        if len(starts) > MAX_BUCKETS:
+            raise ValueError(f"Range too large: more than {MAX_BUCKETS} buckets")
+        current = next_bucket_start(current, bucket)
+    return starts
+
+
+# Fonctions SQL "début de période" (format YYYY-MM-DD), compilées selon la base utilisée.
+class day_start(FunctionElement):
+    type = String()
+    name = "day_start"
+    inherit_cache = True
+
+
+class week_start(FunctionElement):
+    type = String()
+    name = "week_start"
+    inherit_cache = True
+
+
+class month_start(FunctionElement):
+    type = String()
+    name = "month_start"
+    inherit_cache = True
+
+
+class year_start(FunctionElement):
+    type = String()
+    name = "year_start"
+    inherit_cache = True
+
+
+@compiles(day_start)
+def _sqlite_day_start(element, compiler, **kw):
+    # SQLite stocke déjà les dates au format YYYY-MM-DD.
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(week_start)
+def _sqlite_week_start(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    # strftime('%w') : 0 = dimanche ; on recule jusqu'au lundi.
+    return f"date({column}, '-' || ((CAST(strftime('%w', {column}) AS INTEGER) + 6) % 7) || ' days')"
+
+
+@compiles(month_start)
+def _sqlite_month_start(element, compiler, **kw):
+    return f"strftime('%Y-%m-01', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(year_start)
+def _sqlite_year_start(element, compiler, **kw):
+    return f"strftime('%Y-01-01', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(day_start, "postgresql")
+def _pg_day_start(element, compiler, **kw):
+    return f"to_char({compiler.process(element.clauses, **kw)}, 'YYYY-MM-DD')"
+
+
+@compiles(week_start, "postgresql")
+def _pg_week_start(element, compiler, **kw):
+    return f"to_char(date_trunc('week', {compiler.process(element.clauses, **kw)}), 'YYYY-MM-DD')"
+
+
+@compiles(month_start, "postgresql")
+def _pg_month_start(element, compiler, **kw):
+    return f"to_char(date_trunc('month', {compiler.process(element.clauses, **kw)}), 'YYYY-MM-DD')"
+
+
+@compiles(year_start, "postgresql")
+def _pg_year_start(element, compiler, **kw):
+    return f"to_char(date_trunc('year', {compiler.process(element.clauses, **kw)}), 'YYYY-MM-DD')"
+
+
+# Expression SQL qui ramène chaque date au début de sa période (format YYYY-MM-DD).
+def _bucket_expression(bucket: str):
+    column = DailyMetric.date
+    if bucket == "day":
+        return day_start(column)
+    if bucket == "week":
+        return week_start(column)
+    if bucket == "month":
+        return month_start(column)
+    if bucket == "year":
+        return year_start(column)
+    raise ValueError(f"Unknown bucket: {bucket}")
+
+
+# Totaux bruts groupés par période, limités aux intervalles [début, fin] donnés.
+def _aggregate_daily(db: Session, user_id: int, ranges: List[tuple], bucket: str) -> dict:
+    if not ranges:
+        return {}
+    period = _bucket_expression(bucket).label("period")
+    rows = db.query(
+        period,
+        func.sum(DailyMetric.sales),
+        func.sum(DailyMetric.cash),
+        func.count(DailyMetric.id)
+    ).filter(
+        DailyMetric.user_id == user_id,
+        or_(*[
+            and_(DailyMetric.date >= lo, DailyMetric.date <= hi)
+            for lo, hi in ranges
+        ])
+    ).group_by(period).all()
+    return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+
+# Totaux pré-calculés des périodes complètes entre first et last.
+def _aggregate_rollups(db: Session, user_id: int, first: date, last: date, bucket: str) -> dict:
+    rows = db.query(
+        MetricRollup.period_start,
+        MetricRollup.sales,
+        MetricRollup.cash,
+        MetricRollup.count
+    ).filter(
+        MetricRollup.user_id == user_id,
+        MetricRollup.period_kind == bucket,
+        MetricRollup.period_start >= first.strftime("%Y-%m-%d"),
+        MetricRollup.period_start <= last.strftime("%Y-%m-%d")
+    ).all()
+    return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+
+# Agrège sales/cash par période entre start et end (inclus).
+# Jour : une requête groupée sur daily_metrics. Semaine/mois/année : les périodes
+# entièrement couvertes viennent des rollups, seules les périodes partielles aux
+# bords sont recalculées depuis daily_metrics (coût indépendant de l'historique).
+def aggregate_series(db: Session, user_id: int, start: date, end: date, bucket: str = "day") -> List[dict]:
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+    if start > end:
+        raise ValueError("start must be before end")
+
+    starts = bucket_starts(start, end, bucket)
+
+    if bucket == "day":
+        totals = _aggregate_daily(db, user_id, [(start, end)], bucket)
+    else:
+        full = [s for s in starts if s >= start and next_bucket_start(s, bucket) - timedelta(days=1) <= end]
+        partial = [
+            (max(s, start), min(next_bucket_start(s, bucket) - timedelta(days=1), end))
+            for s in starts if s not in full
+        ]
+        totals = _aggregate_daily(db, user_id, partial, bucket)
+        if full:
+            totals.update(_aggregate_rollups(db, user_id, full[0], full[-1], bucket))
+
+    # Complète les périodes vides avec des zéros (du plus ancien au plus récent).
+    points = []
+    for s in starts:
+        key = s.strftime("%Y-%m-%d")
+        row = totals.get(key)
+        points.append({
+            "periodStart": key,
+            "sales": float(row[0] or 0.0) if row else 0.0,
+            "cash": float(row[1] or 0.0) if row else 0.0,
+            "count": int(row[2] or 0) if row else 0
+        })
+    return points
@@ -0,0 +1,130 @@
+# services/analytics_service.py - Analyses vectorisées (NumPy) de l'historique d'un utilisateur.
+# Pour un débutant : l'historique est lu en une seule requête puis placé dans des tableaux
+# jour par jour (NaN = jour sans saisie). Tous les calculs (moyennes glissantes, variations,
+# ratio, z-scores) se font sur les tableaux entiers, sans boucle Python par jour.
+
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.metric_model import DailyMetric
+from services.aggregation_service import MAX_BUCKETS
+
+# Fenêtres (jours).
+SHORT_WINDOW = 7
+LONG_WINDOW = 30
+# Historique lu avant `start` pour que les fenêtres soient complètes dès le premier jour.
+LOOKBACK_DAYS = 2 * LONG_WINDOW
+# Observations minimales dans la fenêtre précédente pour calculer un z-score.
+MIN_Z_OBSERVATIONS = 7
+DEFAULT_Z_THRESHOLD = 3.0
+
+
+# Charge sales/cash du jour `first` au jour `last` en tableaux denses (NaN pour les jours sans saisie).
+def load_daily_arrays(db: Session, user_id: int, first: date, last: date):
+    rows = db.query(DailyMetric.date, DailyMetric.sales, DailyMetric.cash).filter(
+        DailyMetric.user_id == user_id,
+        DailyMetric.date >= first,
+        DailyMetric.date <= last
+    ).order_by(DailyMetric.date).all()
+
+    size = (last - first).days + 1
+    sales = np.full(size, np.nan)
+    cash = np.full(size, np.nan)
+    if rows:
+        dates, day_sales, day_cash = zip(*rows)
+        offsets = (np.array(dates, dtype="datetime64[D]") - np.datetime64(first, "D")).astype(np.int64)
+        sales[offsets] = np.array(day_sales, dtype=np.float64)
+        cash[offsets] = np.array(day_cash, dtype=np.float64)
+    return sales, cash
+
+
+# Sommes et effectifs glissants sur `window` jours (jour courant inclus), en ignorant les NaN.
+def _rolling_sum_count(values: np.ndarray, window: int):
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    end = np.arange(1, values.size + 1)
+    begin = np.maximum(end - window, 0)
+    return sums[end] - sums[begin], counts[end] - counts[begin]
+
+
+# Moyenne glissante des jours saisis (NaN si aucune saisie dans la fenêtre).
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    sums, counts = _rolling_sum_count(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+# Variation (%) du total des `window` derniers jours vs les `window` jours précédents.
+def period_change(values: np.ndarray, window: int) -> np.ndarray:
+    sums, _ = _rolling_sum_count(values, window)
+    previous = np.full(values.size, np.nan)
+    previous[window:] = sums[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(previous > 0, (sums - previous) / previous * 100, np.nan)
+
+
+# z-score de chaque jour par rapport aux `window` jours précédents (jour exclu).
+def rolling_zscore(values: np.ndarray, window: int, min_observations: int = MIN_Z_OBSERVATIONS) -> np.ndarray:
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(filled)))
+    squares = np.concatenate(([0.0], np.cumsum(filled * filled)))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    end = np.arange(values.size)  # fenêtre [i - window, i[
+    begin = np.maximum(end - window, 0)
+    n = counts[end] - counts[begin]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (sums[end] - sums[begin]) / n
+        variance = (squares[end] - squares[begin]) / n - mean * mean
+        std = np.sqrt(np.maximum(variance, 0.0))
+        z = (values - mean) / std
+    return np.where((n >= min_observations) & (std > 0) & present, z, np.nan)
+
+
+# Série d'analyses entre start et end (inclus), en colonnes (tableaux NumPy, NaN = non défini).
+def get_insight_series(db: Session, user_id: int, start: date, end: date,
+                       z_threshold: float = DEFAULT_Z_THRESHOLD) -> dict:
+    if end < start:
+        raise ValueError("'to' must be on or after 'from'")
+    if (end - start).days + 1 > MAX_BUCKETS:
+        raise ValueError(f"Range too large: more than {MAX_BUCKETS} days")
+
+    first = start - timedelta(days=LOOKBACK_DAYS)
+    sales, cash = load_daily_arrays(db, user_id, first, end)
+    # Les fenêtres sont calculées sur l'historique complet, puis restreintes à [start, end].
+    visible = slice(LOOKBACK_DAYS, None)
+
+    sales_z = rolling_zscore(sales, LONG_WINDOW)
+    cash_z = rolling_zscore(cash, LONG_WINDOW)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cash_ratio = np.where(sales > 0, cash / sales, np.nan)
+
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    columns = {
+        "sales": sales,
+        "cash": cash,
+        "salesMa7": rolling_mean(sales, SHORT_WINDOW),
+        "salesMa30": rolling_mean(sales, LONG_WINDOW),
+        "cashMa7": rolling_mean(cash, SHORT_WINDOW),
+        "cashMa30": rolling_mean(cash, LONG_WINDOW),
+        "salesWow": period_change(sales, SHORT_WINDOW),
+        "salesMom": period_change(sales, LONG_WINDOW),
+        "cashWow": period_change(cash, SHORT_WINDOW),
+        "cashMom": period_change(cash, LONG_WINDOW),
+        "cashRatio": cash_ratio,
+        "salesZ": sales_z,
+        "cashZ": cash_z,
+    }
+    result = {name: np.round(values[visible], 4) for name, values in columns.items()}
+    result["salesAnomaly"] = np.abs(np.nan_to_num(sales_z[visible])) >= z_threshold
+    result["cashAnomaly"] = np.abs(np.nan_to_num(cash_z[visible])) >= z_threshold
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "zThreshold": z_threshold,
+        "dates": dates.astype(str).tolist(),
+        **result
+    }
@@ -5,28 +5,15 @@ from sqlalchemy.orm import Session
 # Importe modèles et schémas.
 from models.user_model import User
 from schemas.auth_schemas import Login
-# Importe passlib pour hasher passwords.
-from passlib.context import CryptContext
-# Importe JWT pour tokens.
-import jwt
-# Importe datetime pour gérer expiration.
-from datetime import datetime, timedelta
-# Importe os pour SECRET_KEY.
-import os
-
-# Contexte bcrypt - pour hasher mots de passe.
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
-# Clé secrète pour JWT - depuis .env.
-SECRET_KEY  = "a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6"
-# Algorithme JWT - standard sécurisé.
-ALGORITHM = "HS256"
+from services.principal_cache import Principal, TokenPrincipal, principal_cache
+# Importe l'émission/vérification des JWT (module unique, clés avec kid).
+from utils.jwt_token import create_access_token, create_refresh_token, decode_token, key_accepted, token_kid, ACCESS, REFRESH
 
 # Crée user - pour inscription (pas dans specs, mais utile).
-def create_user(db: Session, email: str, password: str, name: str):
-    # Hash le mot de passe pour sécurité.
-    hashed = pwd_context.hash(password)
+# hashed_password : hachage calculé par l'appelant via le pool (password_hasher.hash).
+def create_user(db: Session, email: str, hashed_password: str, name: str):
     # Crée objet User.
-    db_user = User(email=email, hashed_password=hashed, name=name)
+    db_user = User(email=email, hashed_password=hashed_password, name=name)
     # Ajoute à la session.
     db.add(db_user)
     # Commit pour sauvegarder.
@@ -40,43 +27,53 @@ def get_user_by_email(db: Session, email: str):
     # Query DB pour trouver user par email.
     return db.query(User).filter(User.email == email).first()
 
-# Authentifie user - vérifie email/password.
-def authenticate_user(db: Session, email: str, password: str):
-    # Get user.
-    user = get_user_by_email(db, email)
-    # Vérifie si existe et password correct.
-    if not user or not pwd_context.verify(password, user.hashed_password):
-        return None
-    return user
+# Remplace le hachage d'un user (rehachage transparent : bcrypt ou anciens paramètres argon2).
+def rehash_password(db: Session, user_id: int, hashed_password: str):
+    db.query(User).filter(User.id == user_id).update({"hashed_password": hashed_password})
+    db.commit()
 
-# Crée access token - JWT 7 jours (persistance agressive).
-def create_access_token(data: dict):
-    # Copie data pour éviter mutation.
-    to_encode = data.copy()
-    # Set expiration à 7 jours pour persistance agressive.
-    expire = datetime.utcnow() + timedelta(days=7)
-    # Ajoute exp dans payload.
-    to_encode.update({"exp": expire})
-    # Encode en JWT.
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+# Crée access et refresh tokens d'un user.
+def issue_tokens(user) -> dict:
+    return {
+        "access_token": create_access_token(user.id, user.email),
+        "refresh_token": create_refresh_token(user.id, user.email)
+    }
 
-# Crée refresh token - 90 jours (persistance agressive).
-def create_refresh_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=90)  # 3 mois pour persistance agressive
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+# Charge le user d'un token : par clé primaire (uid), ou par email pour les anciens tokens.
+def _user_from_claims(db: Session, payload: dict):
+    user_id = payload.get("uid")
+    if user_id is not None:
+        return db.get(User, user_id)
+    return get_user_by_email(db, payload["sub"])
 
-# Get current user - décode JWT.
+# Get current user - vérifie l'access token (résultat mis en cache par token).
 def get_current_user(db: Session, token: str):
-    try:
-        # Décode token avec SECRET_KEY.
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        # Extrait email depuis sub.
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        # Get user depuis DB.
-        return get_user_by_email(db, email)
-    except:
-        return None
\ No newline at end of file
+    # Le cache évite le décodage et la requête SQL pour les tokens déjà vus
+    # (sauf si la clé du token a été retirée du trousseau depuis).
+    principal = principal_cache.get(token, kid_valid=key_accepted)
+    if principal is not None:
+        return principal
+    payload = decode_token(token, ACCESS)
+    if payload is None:
+        return None
+    user = _user_from_claims(db, payload)
+    if user is None:
+        return None
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal, token_exp=payload.get("exp"), kid=token_kid(token))
+    return principal
+
+# Identité depuis les seules claims (sans base) - pour les endpoints en lecture seule
+# qui n'ont besoin que de l'id. None pour un token invalide ou ancien format (sans uid).
+def get_token_principal(token: str):
+    payload = decode_token(token, ACCESS)
+    if payload is None or payload.get("uid") is None:
+        return None
+    return TokenPrincipal.from_claims(payload)
+
+# Vérifie un refresh token et retourne le user (None si invalide ou si c'est un access token).
+def get_refresh_user(db: Session, token: str):
+    payload = decode_token(token, REFRESH)
+    if payload is None:
+        return None
+    return _user_from_claims(db, payload)
@@ -1,58 +1,40 @@
 # services/dashboard_service.py - Logique pour dashboard
 
+import logging
+
 from sqlalchemy.orm import Session
-from models.metric_model import DailyMetric
+from services.aggregation_service import aggregate_series
 from datetime import datetime, timedelta, date
-from typing import List, Tuple
+from typing import List
+
+logger = logging.getLogger(__name__)
 
 # Get dashboard stats
 def get_dashboard_stats(db: Session, user_id: int) -> dict:
     # Récupérer les 7 derniers jours (incluant aujourd'hui)
     today = datetime.now().date()
     start_date = today - timedelta(days=6)  # 7 jours au total (0 à 6 jours avant)
-    
-    start_date_str = start_date.strftime("%Y-%m-%d")
-    today_str = today.strftime("%Y-%m-%d")
-    
-    # Récupérer toutes les métriques des 7 derniers jours
-    metrics = db.query(DailyMetric).filter(
-        DailyMetric.user_id == user_id,
-        DailyMetric.date >= start_date_str,
-        DailyMetric.date <= today_str
-    ).order_by(DailyMetric.date.asc()).all()
-    
-    # Debug: afficher les métriques trouvées
-    print(f"[DASHBOARD] User {user_id}: Found {len(metrics)} metrics between {start_date_str} and {today_str}")
-    for m in metrics:
-        print(f"  - Date: {m.date}, Sales: {m.sales}, Cash: {m.cash}")
-    
-    # Récupérer les données d'hier
-    yesterday = (today - timedelta(days=1)).strftime("%Y-%m-%d")
-    yesterday_metric = db.query(DailyMetric).filter(
-        DailyMetric.user_id == user_id,
-        DailyMetric.date == yesterday
-    ).first()
-    
-    yesterday_sales = float(yesterday_metric.sales) if yesterday_metric else 0.0
-    yesterday_cash = float(yesterday_metric.cash) if yesterday_metric else 0.0
-    
-    print(f"[DASHBOARD] Yesterday ({yesterday}): Sales={yesterday_sales}, Cash={yesterday_cash}")
-    
-    # Créer des listes pour les 7 derniers jours (remplir avec 0 si pas de données)
-    sales_data = [0.0] * 7
-    cash_data = [0.0] * 7
-    
-    # Organiser les données par jour (du plus ancien au plus récent)
-    for i in range(7):
-        target_date = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-        metric = next((m for m in metrics if m.date == target_date), None)
-        if metric:
-            sales_data[i] = float(metric.sales)
-            cash_data[i] = float(metric.cash)
-    
-    print(f"[DASHBOARD] Sales data: {sales_data}")
-    print(f"[DASHBOARD] Cash data: {cash_data}")
-    
+
+    # Une seule requête groupée par jour ; les jours sans saisie valent 0
+    points = aggregate_series(db, user_id, start_date, today, "day")
+
+    # Debug : métriques trouvées (rien n'est calculé si le niveau DEBUG est désactivé)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("dashboard metrics", extra={
+            "user_id": user_id,
+            "start": start_date.isoformat(),
+            "end": today.isoformat(),
+            "count": sum(p["count"] for p in points),
+            "days": [p for p in points if p["count"]]
+        })
+
+    sales_data = [p["sales"] for p in points]
+    cash_data = [p["cash"] for p in points]
+
+    # Hier est l'avant-dernier jour de la fenêtre
+    yesterday_sales = sales_data[-2]
+    yesterday_cash = cash_data[-2]
+
     return {
         "yesterdaySales": yesterday_sales,
         "yesterdayCash": yesterday_cash,
@@ -60,45 +42,32 @@ def get_dashboard_stats(db: Session, user_id: int) -> dict:
         "cashData": cash_data
     }
 
-# Get graph data (3 dernières semaines)
-def get_graph_data(db: Session, user_id: int) -> dict:
+# Get graph data (3 dernières semaines glissantes, la plus récente se termine aujourd'hui)
+def get_graph_data(db: Session, user_id: int, weeks: int = 3) -> dict:
     today = datetime.now().date()
-    
-    # Calculer les 3 dernières semaines (semaine complète de lundi à dimanche)
+    start_date = today - timedelta(days=weeks * 7 - 1)
+
+    # Une seule requête pour toute la période, regroupée ensuite par blocs de 7 jours
+    points = aggregate_series(db, user_id, start_date, today, "day")
+
     weekly_sales = []
     weekly_cash = []
-    
-    # Pour chaque semaine (de la plus ancienne à la plus récente)
-    for week_offset in range(2, -1, -1):  # 2, 1, 0 (semaines précédentes)
-        # Calculer le début et la fin de la semaine
-        # Semaine actuelle commence il y a (week_offset * 7) jours
-        week_end = today - timedelta(days=week_offset * 7)
-        week_start = week_end - timedelta(days=6)  # 7 jours au total
-        
-        week_start_str = week_start.strftime("%Y-%m-%d")
-        week_end_str = week_end.strftime("%Y-%m-%d")
-        
-        # Récupérer les métriques de cette semaine
-        metrics = db.query(DailyMetric).filter(
-            DailyMetric.user_id == user_id,
-            DailyMetric.date >= week_start_str,
-            DailyMetric.date <= week_end_str
-        ).all()
-        
-        # Calculer les totaux de la semaine
-        week_sales = sum(float(m.sales) for m in metrics)
-        week_cash = sum(float(m.cash) for m in metrics)
-        
-        print(f"[GRAPHS] Week {week_offset} ({week_start_str} to {week_end_str}): {len(metrics)} metrics, Sales={week_sales}, Cash={week_cash}")
-        
+    for week_offset in range(weeks):
+        week_points = points[week_offset * 7:(week_offset + 1) * 7]
+        week_sales = sum(p["sales"] for p in week_points)
+        week_cash = sum(p["cash"] for p in week_points)
         weekly_sales.append(week_sales)
         weekly_cash.append(week_cash)
-    
+
     total_sales = sum(weekly_sales)
     total_cash = sum(weekly_cash)
-    
-    print(f"[GRAPHS] Total: Sales={total_sales}, Cash={total_cash}")
-    
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("graph totals", extra={
+            "user_id": user_id, "weekly_sales": weekly_sales, "weekly_cash": weekly_cash,
+            "total_sales": total_sales, "total_cash": total_cash
+        })
+
     return {
         "weeklySales": weekly_sales,
         "weeklyCash": weekly_cash,
@@ -106,3 +75,25 @@ def get_graph_data(db: Session, user_id: int) -> dict:
         "totalCash": total_cash
     }
 
+# Get series - totaux par période (jour, semaine, mois, année) entre deux dates
+def get_series(db: Session, user_id: int, start: date, end: date, bucket: str = "day") -> dict:
+    points = aggregate_series(db, user_id, start, end, bucket)
+    return {
+        "bucket": bucket,
+        "start": start.strftime("%Y-%m-%d"),
+        "end": end.strftime("%Y-%m-%d"),
+        "points": points
+    }
+
+# Get series en colonnes (dates, sales, cash, count) - format compact pour les graphiques.
+def get_series_columns(db: Session, user_id: int, start: date, end: date, bucket: str = "day") -> dict:
+    points = aggregate_series(db, user_id, start, end, bucket)
+    return {
+        "bucket": bucket,
+        "start": start.strftime("%Y-%m-%d"),
+        "end": end.strftime("%Y-%m-%d"),
+        "dates": [p["periodStart"] for p in points],
+        "sales": [p["sales"] for p in points],
+        "cash": [p["cash"] for p in points],
+        "count": [p["count"] for p in points]
+    }
@@ -0,0 +1,59 @@
+# services/data_version_service.py - Version des données par utilisateur et GET conditionnels (ETag).
+# Pour un débutant : chaque écriture (metrics, notifications, profil) incrémente la version
+# dans la même transaction. Les routes en lecture calculent un ETag depuis cette version
+# (une lecture par clé primaire) et répondent 304 sans rien recalculer si le client
+# envoie If-None-Match avec le même ETag.
+
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from models.database import dialect_insert, run_db
+from models.data_version_model import DataVersion
+
+
+# Incrémente la version des données d'un utilisateur (sans commit, dans la transaction en cours).
+def bump_data_version(db: Session, user_id: int):
+    stmt = dialect_insert(db, DataVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"version": DataVersion.version + 1}
+    )
+    db.execute(stmt)
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    version = db.query(DataVersion.version).filter(DataVersion.user_id == user_id).scalar()
+    return version or 0
+
+
+# ETag faible : utilisateur, version, jour courant (les fenêtres "7 derniers jours" glissent
+# à minuit) et variante de la requête (chemin, paramètres, format demandé par Accept).
+def make_etag(request: Request, user_id: int, version: int) -> str:
+    variant = f"{request.url.path}?{request.url.query}|{request.headers.get('accept', '')}"
+    digest = hashlib.sha1(variant.encode()).hexdigest()[:12]
+    return f'W/"{user_id}-{version}-{datetime.now().date().isoformat()}-{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = {value.strip() for value in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    # Comparaison faible : W/"x" et "x" désignent la même version.
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((c[2:] if c.startswith("W/") else c) == bare for c in candidates)
+
+
+# À appeler avant tout calcul : retourne une réponse 304 si le client a déjà cette version,
+# sinon ajoute l'en-tête ETag à `response` et retourne None.
+async def not_modified(request: Request, response: Response, db, user_id: int) -> Optional[Response]:
+    version = await run_db(db, get_data_version, user_id)
+    etag = make_etag(request, user_id, version)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,207 @@
+# services/job_runner.py - Exécute chaque occurrence de tâche planifiée une seule fois,
+# quel que soit le nombre de workers uvicorn.
+# Pour un débutant : chaque processus appelle tick() régulièrement ; pour chaque tâche due,
+# il tente d'insérer la ligne job_runs (job_name, scheduled_for). L'index unique garantit
+# qu'un seul processus y parvient ; il garde un bail (lease_until) prolongé pendant
+# l'exécution. Si ce processus meurt, le bail expire et un autre reprend l'occurrence.
+# Au redémarrage, la dernière occurrence manquée est rattrapée (dans JOB_CATCHUP_HOURS).
+#
+# Usage manuel (depuis backend/) : python -m services.job_runner status [--limit 20]
+
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from models.database import dialect_insert
+from models.job_model import JobRun
+from services.telemetry import JOB_DURATION
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_CATCHUP_HOURS = float(os.getenv("JOB_CATCHUP_HOURS", "12"))
+JOB_TICK_SECONDS = int(os.getenv("JOB_TICK_SECONDS", "30"))
+
+
+# Tâche quotidienne à heure fixe (heure locale du serveur, comme le cron APScheduler).
+@dataclass
+class Job:
+    name: str
+    fn: Callable[[], object]
+    hour: int
+    minute: int = 0
+    # Fenêtre de rattrapage propre à la tâche (défaut : celle du runner).
+    catchup: Optional[timedelta] = None
+
+    # Dernière occurrence planifiée <= now.
+    def last_occurrence(self, now: datetime) -> datetime:
+        occurrence = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if occurrence > now:
+            occurrence -= timedelta(days=1)
+        return occurrence
+
+
+class JobRunner:
+    def __init__(self, session_factory=None, owner: Optional[str] = None,
+                 lease_seconds: int = JOB_LEASE_SECONDS, catchup_hours: float = JOB_CATCHUP_HOURS):
+        self._session_factory = session_factory
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = timedelta(seconds=lease_seconds)
+        self.catchup = timedelta(hours=catchup_hours)
+        self.jobs = {}
+        # Compteurs par tâche (pour ce processus).
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def add_job(self, name: str, fn: Callable[[], object], hour: int, minute: int = 0,
+                catchup_hours: Optional[float] = None):
+        catchup = timedelta(hours=catchup_hours) if catchup_hours is not None else None
+        self.jobs[name] = Job(name, fn, hour, minute, catchup)
+        self.metrics[name] = {
+            "runs": 0, "succeeded": 0, "failed": 0,
+            "last_status": None, "last_scheduled_for": None, "last_duration_ms": None
+        }
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from models.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    # Vérifie les tâches dues et exécute celles dont ce processus obtient le bail.
+    def tick(self, now: Optional[datetime] = None):
+        now = now or datetime.now()
+        # Un seul tick à la fois dans le processus (APScheduler peut en superposer).
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            for job in list(self.jobs.values()):
+                occurrence = job.last_occurrence(now)
+                if now - occurrence > (job.catchup or self.catchup):
+                    continue
+                run_id = self._claim(job, occurrence, now)
+                if run_id is None:
+                    continue
+                self._execute(job, run_id, occurrence)
+        finally:
+            self._lock.release()
+
+    # Retourne l'id de la ligne job_runs si ce processus obtient l'occurrence, sinon None.
+    def _claim(self, job: Job, occurrence: datetime, now: datetime) -> Optional[int]:
+        scheduled_for = occurrence.strftime("%Y-%m-%dT%H:%M")
+        db = self._new_session()
+        try:
+            stmt = dialect_insert(db, JobRun).values(
+                job_name=job.name,
+                scheduled_for=scheduled_for,
+                status="running",
+                owner=self.owner,
+                lease_until=now + self.lease,
+                attempts=1,
+                started_at=now
+            ).on_conflict_do_nothing(index_elements=["job_name", "scheduled_for"])
+            claimed = db.execute(stmt).rowcount > 0
+            if not claimed:
+                # Reprise d'un bail expiré (processus propriétaire arrêté en cours d'exécution).
+                claimed = db.query(JobRun).filter(
+                    JobRun.job_name == job.name,
+                    JobRun.scheduled_for == scheduled_for,
+                    JobRun.status == "running",
+                    JobRun.lease_until < now
+                ).update({
+                    "owner": self.owner,
+                    "lease_until": now + self.lease,
+                    "attempts": JobRun.attempts + 1,
+                    "started_at": now
+                }, synchronize_session=False) > 0
+            db.commit()
+            if not claimed:
+                return None
+            return db.query(JobRun.id).filter(
+                JobRun.job_name == job.name,
+                JobRun.scheduled_for == scheduled_for
+            ).scalar()
+        finally:
+            db.close()
+
+    def _execute(self, job: Job, run_id: int, occurrence: datetime):
+        stop = threading.Event()
+        renewer = threading.Thread(target=self._renew_lease, args=(run_id, stop), daemon=True)
+        renewer.start()
+        started = time.perf_counter()
+        status, error = "succeeded", None
+        try:
+            job.fn()
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+            logger.exception("job failed", extra={"job": job.name, "scheduled_for": occurrence.isoformat()})
+        finally:
+            stop.set()
+            renewer.join()
+        elapsed = time.perf_counter() - started
+        duration_ms = int(elapsed * 1000)
+        JOB_DURATION.observe(elapsed, job=job.name, status=status)
+
+        db = self._new_session()
+        try:
+            db.query(JobRun).filter(JobRun.id == run_id, JobRun.owner == self.owner).update({
+                "status": status,
+                "finished_at": datetime.now(),
+                "duration_ms": duration_ms,
+                "error": error
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        metrics = self.metrics[job.name]
+        metrics["runs"] += 1
+        metrics[status] += 1
+        metrics["last_status"] = status
+        metrics["last_scheduled_for"] = occurrence.strftime("%Y-%m-%dT%H:%M")
+        metrics["last_duration_ms"] = duration_ms
+
+    # Prolonge le bail tant que la tâche tourne (tous les tiers de bail).
+    def _renew_lease(self, run_id: int, stop: threading.Event):
+        while not stop.wait(self.lease.total_seconds() / 3):
+            db = self._new_session()
+            try:
+                db.query(JobRun).filter(JobRun.id == run_id, JobRun.owner == self.owner).update(
+                    {"lease_until": datetime.now() + self.lease}, synchronize_session=False
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.warning("lease renewal failed", exc_info=True, extra={"run_id": run_id})
+            finally:
+                db.close()
+
+    def stats(self) -> dict:
+        return {name: dict(values) for name, values in self.metrics.items()}
+
+
+# Dernières exécutions (tous processus confondus).
+def recent_runs(db: Session, limit: int = 20):
+    return db.query(JobRun).order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit).all()
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Exécutions des tâches planifiées")
+    parser.add_argument("command", choices=["status"])
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        for run in recent_runs(db, args.limit):
+            print(f"{run.job_name:<22} {run.scheduled_for}  {run.status:<9} {run.duration_ms or '-':>8} ms  "
+                  f"essais={run.attempts}  {run.owner}  {run.error or ''}")
@@ -1,73 +1,226 @@
 # services/metric_service.py - Logique pour créer/lire metrics.
 
 # Importe session.
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session, aliased
 # Importe modèles et schémas.
+from models.database import dialect_insert
 from models.metric_model import DailyMetric
 from schemas.metric_schemas import MetricCreate
+from pydantic import ValidationError
+from services.rollup_service import refresh_rollups, lock_user_rollups
+from services.data_version_service import bump_data_version
 # Importe datetime pour calculs de dates.
-from datetime import datetime, timedelta
+from datetime import timedelta, date as date_type
+from typing import List
+
+# Deltas % vs J-1 à partir des valeurs (sales, cash) de J-1 (0 si pas de J-1).
+def _deltas(sales: float, cash: float, prev) -> dict:
+    deltas = {"sales": 0.0, "cash": 0.0}
+    if prev:
+        deltas["sales"] = ((sales - prev[0]) / prev[0] * 100) if prev[0] else 0.0
+        deltas["cash"] = ((cash - prev[1]) / prev[1] * 100) if prev[1] else 0.0
+    return deltas
+
+# Upsert metric - crée ou met à jour la saisie du jour en une seule instruction
+# INSERT ... ON CONFLICT DO UPDATE ... RETURNING, qui renvoie aussi les valeurs de J-1
+# (sous-requêtes dans RETURNING) ; les rollups sont mis à jour dans la même transaction.
+# Deux envois simultanés de la même date ne lèvent plus d'IntegrityError : le second met à jour.
+def upsert_metric(db: Session, metric: MetricCreate, user_id: int) -> dict:
+    prev = aliased(DailyMetric)
+    prev_date = metric.date - timedelta(days=1)
+
+    def prev_value(column):
+        return select(column).where(prev.user_id == user_id, prev.date == prev_date).scalar_subquery()
+
+    stmt = dialect_insert(db, DailyMetric).values(
+        user_id=user_id, date=metric.date, sales=metric.sales, cash=metric.cash, source=metric.source
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyMetric.user_id, DailyMetric.date],
+        set_={"sales": stmt.excluded.sales, "cash": stmt.excluded.cash, "source": stmt.excluded.source}
+    ).returning(
+        DailyMetric.id,
+        DailyMetric.date,
+        DailyMetric.sales,
+        DailyMetric.cash,
+        DailyMetric.source,
+        prev_value(prev.sales).label("prev_sales"),
+        prev_value(prev.cash).label("prev_cash")
+    )
 
-# Crée metric - stocke en DB.
-def create_metric(db: Session, metric: MetricCreate, user_id: int):
     try:
-        # Crée objet DailyMetric depuis schéma.
-        db_metric = DailyMetric(**metric.dict(), user_id=user_id)
-        # Ajoute à DB.
-        db.add(db_metric)
+        lock_user_rollups(db, user_id)
+        row = db.execute(stmt).one()
+        refresh_rollups(db, user_id, [metric.date])
+        bump_data_version(db, user_id)
         db.commit()
-        db.refresh(db_metric)
-        return db_metric
     except Exception as e:
-        # En cas d'erreur (ex: contrainte d'unicité), rollback
         db.rollback()
         raise e
 
-# Get metrics - pour un user et range (e.g., 10d).
-def get_metrics(db: Session, user_id: int, range_days: int = None, start_date: str = None, end_date: str = None):
-    query = db.query(DailyMetric).filter(DailyMetric.user_id == user_id)
-    
-    # Si range_days est fourni, utiliser cette logique
-    if range_days is not None:
-        start = datetime.now() - timedelta(days=range_days)
-        query = query.filter(DailyMetric.date >= start.strftime("%Y-%m-%d"))
-    
-    # Si start_date est fourni
-    if start_date:
-        query = query.filter(DailyMetric.date >= start_date)
-    
-    # Si end_date est fourni
-    if end_date:
-        query = query.filter(DailyMetric.date <= end_date)
-    
-    # Trier par date décroissante
-    return query.order_by(DailyMetric.date.desc()).all()
-
-
-# Get insights - calcule % vs J-1.
-def get_insights(db: Session, user_id: int, date: str):
-    # Get metric pour date donnée.
-    metric = db.query(DailyMetric).filter(
-        DailyMetric.user_id == user_id,
-        DailyMetric.date == date
-    ).first()
-
-    print("metric : ", metric)
-    # Get metric J-1.
-    prev_date = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-    print("date précédente : ", prev_date)
-    print("date d'aujourd'hui : ", date)
-
-    prev = db.query(DailyMetric).filter(
-        DailyMetric.user_id == user_id,
-        DailyMetric.date == prev_date
-    ).first()
-
-    print("metric d'hier : ", prev)
-    # Retourne 0 si pas de prev.
-    if not metric or not prev:
+    has_prev = row.prev_sales is not None or row.prev_cash is not None
+    return {
+        "id": row.id,
+        "date": row.date,
+        "sales": row.sales,
+        "cash": row.cash,
+        "source": row.source,
+        "deltas": _deltas(row.sales, row.cash, (row.prev_sales, row.prev_cash) if has_prev else None)
+    }
+
+# Upsert d'un lot de saisies (synchronisation hors ligne) en une transaction :
+# une lecture des lignes existantes et des J-1 hors lot, un INSERT multi-lignes
+# ON CONFLICT DO UPDATE, puis les rollups des périodes touchées.
+def upsert_metrics_batch(db: Session, user_id: int, entries: List[dict]) -> dict:
+    items = [None] * len(entries)
+    latest = {}  # date -> (index, MetricCreate) ; la dernière entrée d'une date l'emporte
+    for index, entry in enumerate(entries):
+        try:
+            metric = MetricCreate.model_validate(entry)
+        except ValidationError as e:
+            items[index] = {"index": index, "status": "invalid", "error": str(e.errors()[0]["msg"])}
+            continue
+        if metric.date in latest:
+            previous_index = latest[metric.date][0]
+            items[previous_index] = {"index": previous_index, "status": "superseded", "date": metric.date}
+        latest[metric.date] = (index, metric)
+
+    if latest:
+        try:
+            lock_user_rollups(db, user_id)
+            dates = sorted(latest)
+            boundary = {d - timedelta(days=1) for d in dates} - set(latest)
+            # Lignes existantes du lot + J-1 hors lot, en une seule requête.
+            existing = {
+                row.date: (row.sales, row.cash)
+                for row in db.query(DailyMetric.date, DailyMetric.sales, DailyMetric.cash).filter(
+                    DailyMetric.user_id == user_id,
+                    DailyMetric.date.in_(dates + sorted(boundary))
+                ).all()
+            }
+
+            stmt = dialect_insert(db, DailyMetric).values([
+                {"user_id": user_id, "date": d, "sales": m.sales, "cash": m.cash, "source": m.source}
+                for d, (_, m) in sorted(latest.items())
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DailyMetric.user_id, DailyMetric.date],
+                set_={"sales": stmt.excluded.sales, "cash": stmt.excluded.cash, "source": stmt.excluded.source}
+            ).returning(DailyMetric.id, DailyMetric.date)
+            ids = {row.date: row.id for row in db.execute(stmt)}
+
+            refresh_rollups(db, user_id, dates)
+            bump_data_version(db, user_id)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+        # Deltas en un passage : J-1 vient du lot lui-même ou des lignes lues.
+        values = {d: (existing[d] if d in existing else None) for d in boundary}
+        values.update({d: (m.sales, m.cash) for d, (_, m) in latest.items()})
+        for d, (index, metric) in latest.items():
+            items[index] = {
+                "index": index,
+                "status": "updated" if d in existing else "created",
+                "id": ids[d],
+                "date": d,
+                "deltas": _deltas(metric.sales, metric.cash, values.get(d - timedelta(days=1)))
+            }
+
+    return {
+        "items": items,
+        "created": sum(1 for i in items if i["status"] == "created"),
+        "updated": sum(1 for i in items if i["status"] == "updated"),
+        "invalid": sum(1 for i in items if i["status"] == "invalid")
+    }
+
+# Taille des paquets lus par le mode streaming de GET /v1/metrics.
+METRICS_STREAM_CHUNK = 500
+
+# Page de metrics (date décroissante) strictement avant `before` - pour le streaming.
+# Pagination par clé sur l'index (user_id, date) : chaque page coûte une recherche d'index,
+# quelle que soit sa position dans la plage. Les deltas vs J-1 sont inclus (voir get_metrics_with_deltas).
+def get_metrics_page(db: Session, user_id: int, start: date_type = None, before: date_type = None,
+                     limit: int = METRICS_STREAM_CHUNK) -> List[dict]:
+    return get_metrics_with_deltas(db, user_id, start, before=before, limit=limit)
+
+
+# Metrics (date décroissante) avec leurs deltas % vs J-1, en une seule requête :
+# LAG(...) OVER (PARTITION BY user_id ORDER BY date) donne la saisie précédente de chaque ligne.
+# Une ligne de plus est lue avant la plage (jour start - 1, ou la ligne suivant une page) pour
+# que la première ligne visible ait aussi sa J-1 ; elle est retirée par la requête externe.
+# La saisie précédente ne compte que si elle est bien celle de la veille (sinon deltas à 0, comme _deltas).
+def get_metrics_with_deltas(db: Session, user_id: int, start: date_type = None, end: date_type = None,
+                            before: date_type = None, limit: int = None) -> List[dict]:
+    rows = select(
+        DailyMetric.id, DailyMetric.user_id, DailyMetric.date,
+        DailyMetric.sales, DailyMetric.cash, DailyMetric.source
+    ).where(DailyMetric.user_id == user_id)
+    if start is not None:
+        rows = rows.where(DailyMetric.date >= start - timedelta(days=1))
+    if end is not None:
+        rows = rows.where(DailyMetric.date <= end)
+    if before is not None:
+        rows = rows.where(DailyMetric.date < before)
+    if limit is not None:
+        rows = rows.order_by(DailyMetric.date.desc()).limit(limit + 1)
+    rows = rows.subquery()
+
+    window = {"partition_by": rows.c.user_id, "order_by": rows.c.date}
+    lagged = select(
+        rows,
+        func.lag(rows.c.date, type_=rows.c.date.type).over(**window).label("prev_date"),
+        func.lag(rows.c.sales, type_=rows.c.sales.type).over(**window).label("prev_sales"),
+        func.lag(rows.c.cash, type_=rows.c.cash.type).over(**window).label("prev_cash")
+    ).subquery()
+
+    query = select(lagged).order_by(lagged.c.date.desc())
+    if start is not None:
+        query = query.where(lagged.c.date >= start)
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = []
+    for row in db.execute(query):
+        prev = (row.prev_sales, row.prev_cash) if row.prev_date == row.date - timedelta(days=1) else None
+        result.append({
+            "id": row.id,
+            "date": row.date,
+            "sales": row.sales,
+            "cash": row.cash,
+            "source": row.source,
+            "deltas": _deltas(row.sales, row.cash, prev)
+        })
+    return result
+
+
+# Metrics d'une plage en colonnes (dates, sales, cash), date décroissante comme get_metrics_with_deltas.
+# Lit seulement les colonnes utiles (index couvrant), sans construire d'objets DailyMetric.
+def get_metric_columns(db: Session, user_id: int, start: date_type = None) -> dict:
+    query = db.query(DailyMetric.date, DailyMetric.sales, DailyMetric.cash).filter(DailyMetric.user_id == user_id)
+    if start is not None:
+        query = query.filter(DailyMetric.date >= start)
+    rows = query.order_by(DailyMetric.date.desc()).all()
+    return {
+        "dates": [r.date.isoformat() for r in rows],
+        "sales": [r.sales for r in rows],
+        "cash": [r.cash for r in rows]
+    }
+
+
+# Get insights - calcule % vs J-1 (0 si pas de saisie ce jour-là ou la veille).
+def get_insights(db: Session, user_id: int, date: date_type):
+    rows = get_metrics_with_deltas(db, user_id, date, date)
+    if not rows:
         return {"pctSales": 0.0, "pctCash": 0.0}
-    # Calcule % variations.
-    pct_sales = ((metric.sales - prev.sales) / prev.sales * 100) if prev.sales else 0.0
-    pct_cash = ((metric.cash - prev.cash) / prev.cash * 100) if prev.cash else 0.0
-    return {"pctSales": pct_sales, "pctCash": pct_cash}
\ No newline at end of file
+    return {"pctSales": rows[0]["deltas"]["sales"], "pctCash": rows[0]["deltas"]["cash"]}
+
+
+# Insights de chaque jour saisi entre start et end (inclus), date décroissante - même requête.
+def get_insights_range(db: Session, user_id: int, start: date_type, end: date_type) -> List[dict]:
+    return [
+        {"date": row["date"], "pctSales": row["deltas"]["sales"], "pctCash": row["deltas"]["cash"]}
+        for row in get_metrics_with_deltas(db, user_id, start, end)
+    ]
@@ -3,9 +3,41 @@
 from sqlalchemy.orm import Session
 from models.user_model import User
 from models.metric_model import DailyMetric
-from models.notification_model import Notification
+from models.notification_model import Notification, NotificationCounter
+from models.database import dialect_insert
+from services.data_version_service import bump_data_version
+from sqlalchemy import select, or_, and_
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
+import base64
+
+# Taille de page par défaut et maximale de GET /notifications.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+def _bump_unread(db: Session, user_id: int, delta: int):
+    """Ajuste le compteur de non lues (sans commit, dans la transaction en cours)"""
+    if delta == 0:
+        return
+    # Toute écriture de notification passe ici : la version des données (ETag) change aussi.
+    bump_data_version(db, user_id)
+    stmt = dialect_insert(db, NotificationCounter).values(user_id=user_id, unread=max(delta, 0))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"unread": NotificationCounter.unread + delta}
+    )
+    db.execute(stmt)
+
+def encode_cursor(notification: Notification) -> str:
+    """Curseur opaque pointant après une notification (ordre created_at, id décroissant)"""
+    return base64.urlsafe_b64encode(str(notification.id).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    """Retourne l'id de la notification du curseur ; ValueError si invalide"""
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
 
 def create_notification(db: Session, user_id: int, title: str, message: str, type: str = "info"):
     """Crée une nouvelle notification"""
@@ -17,27 +49,70 @@ def create_notification(db: Session, user_id: int, title: str, message: str, typ
         is_read=False
     )
     db.add(notification)
+    _bump_unread(db, user_id, 1)
     db.commit()
     db.refresh(notification)
     return notification
 
-def get_notifications(db: Session, user_id: int, limit: int = 50) -> List[Notification]:
-    """Récupère les notifications d'un utilisateur"""
+def create_rule_notification(db: Session, user_id: int, rule_key: str, period: str,
+                             title: str, message: str, type: str = "info") -> bool:
+    """Crée la notification d'une règle pour une période, sauf si elle existe déjà (sans commit)"""
+    stmt = dialect_insert(db, Notification).values(
+        user_id=user_id,
+        rule_key=rule_key,
+        period=period,
+        title=title,
+        message=message,
+        type=type,
+        is_read=False
+    ).on_conflict_do_nothing(index_elements=["user_id", "rule_key", "period"])
+    created = db.execute(stmt).rowcount > 0
+    if created:
+        _bump_unread(db, user_id, 1)
+    return created
+
+def get_notifications(db: Session, user_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                      before: Optional[int] = None) -> List[Notification]:
+    """Récupère une page de notifications (plus récentes d'abord), après la notification `before`"""
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if before is not None:
+        # Pagination par clé (created_at, id) : les valeurs de la notification du curseur sont
+        # relues en SQL, donc comparées au format exact de la base (pas d'OFFSET à parcourir).
+        anchor = select(Notification.created_at).where(
+            Notification.id == before,
+            Notification.user_id == user_id
+        ).scalar_subquery()
+        query = query.filter(or_(
+            Notification.created_at < anchor,
+            and_(Notification.created_at == anchor, Notification.id < before)
+        ))
+    return query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit).all()
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """Nombre de notifications non lues (lecture du compteur par clé primaire)"""
+    unread = db.query(NotificationCounter.unread).filter(NotificationCounter.user_id == user_id).scalar()
+    return max(unread or 0, 0)
+
+def get_notification(db: Session, notification_id: int, user_id: int):
+    """Récupère une notification de l'utilisateur"""
     return db.query(Notification).filter(
+        Notification.id == notification_id,
         Notification.user_id == user_id
-    ).order_by(Notification.created_at.desc()).limit(limit).all()
+    ).first()
 
 def mark_notification_as_read(db: Session, notification_id: int, user_id: int) -> bool:
     """Marque une notification comme lue"""
-    notification = db.query(Notification).filter(
+    updated = db.query(Notification).filter(
         Notification.id == notification_id,
-        Notification.user_id == user_id
-    ).first()
-    if notification:
-        notification.is_read = True
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    ).update({"is_read": True})
+    if updated:
+        _bump_unread(db, user_id, -updated)
         db.commit()
         return True
-    return False
+    # Déjà lue : succès si elle existe
+    return get_notification(db, notification_id, user_id) is not None
 
 def mark_all_as_read(db: Session, user_id: int) -> int:
     """Marque toutes les notifications d'un utilisateur comme lues"""
@@ -45,14 +120,15 @@ def mark_all_as_read(db: Session, user_id: int) -> int:
         Notification.user_id == user_id,
         Notification.is_read == False
     ).update({"is_read": True})
+    _bump_unread(db, user_id, -count)
     db.commit()
     return count
 
 def generate_dynamic_notifications(db: Session, user_id: int):
     """Génère des notifications dynamiques basées sur les métriques"""
     today = datetime.now().date()
-    yesterday = (today - timedelta(days=1)).strftime("%Y-%m-%d")
-    week_ago = (today - timedelta(days=7)).strftime("%Y-%m-%d")
+    yesterday = today - timedelta(days=1)
+    week_ago = today - timedelta(days=7)
     
     # Récupérer les métriques récentes
     recent_metrics = db.query(DailyMetric).filter(
@@ -63,15 +139,8 @@ def generate_dynamic_notifications(db: Session, user_id: int):
     if not recent_metrics:
         return
     
-    # Vérifier si une notification existe déjà pour aujourd'hui
     today_str = today.strftime("%Y-%m-%d")
-    existing_notification = db.query(Notification).filter(
-        Notification.user_id == user_id,
-        Notification.message.like(f"%{today_str}%")
-    ).first()
-    
-    if existing_notification:
-        return
+    yesterday_str = yesterday.strftime("%Y-%m-%d")
     
     # Calculer les moyennes
     if len(recent_metrics) > 1:
@@ -84,8 +153,8 @@ def generate_dynamic_notifications(db: Session, user_id: int):
         if yesterday_metric:
             # Notification pour ventes élevées
             if yesterday_metric.sales > avg_sales * 1.2:
-                create_notification(
-                    db, user_id,
+                create_rule_notification(
+                    db, user_id, "high_sales", yesterday_str,
                     "Ventes élevées",
                     f"Vos ventes du {yesterday} ont atteint €{yesterday_metric.sales:.2f}, un record !",
                     "success"
@@ -93,32 +162,28 @@ def generate_dynamic_notifications(db: Session, user_id: int):
             
             # Notification pour cash bas
             if yesterday_metric.cash < avg_cash * 0.8:
-                create_notification(
-                    db, user_id,
+                create_rule_notification(
+                    db, user_id, "low_cash", yesterday_str,
                     "Cash bas",
                     f"Le cash du {yesterday} est inférieur à la moyenne.",
                     "warning"
                 )
     
     # Notification pour nouvelle saisie (si métrique d'aujourd'hui existe)
-    today_metric = next((m for m in recent_metrics if m.date == today_str), None)
+    today_metric = next((m for m in recent_metrics if m.date == today), None)
     if today_metric:
-        # Vérifier si une notification de saisie existe déjà
-        existing_saisie = db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.title == "Saisie enregistrée",
-            Notification.message.like(f"%{today_str}%")
-        ).first()
-        
-        if not existing_saisie:
-            create_notification(
-                db, user_id,
-                "Saisie enregistrée",
-                f"Nouvelle saisie confirmée pour le {today_str}.",
-                "info"
-            )
+        create_rule_notification(
+            db, user_id, "entry_saved", today_str,
+            "Saisie enregistrée",
+            f"Nouvelle saisie confirmée pour le {today_str}.",
+            "info"
+        )
+    
+    # Les doublons (même règle, même période) sont ignorés par l'index unique.
+    db.commit()
 
 def send_daily_reminder():
-    """Envoie un rappel quotidien (pour Firebase push - à implémenter plus tard)"""
-    # Cette fonction reste pour la compatibilité avec l'ancien code
-    pass
\ No newline at end of file
+    """Envoie le rappel quotidien push à tous les utilisateurs ayant un fcm_token"""
+    # Import local : le transport Firebase n'est chargé que par le scheduler.
+    from services.push_service import send_reminder_wave
+    return send_reminder_wave()
@@ -0,0 +1,133 @@
+# services/notification_worker.py - Évalue les règles de notification en arrière-plan.
+# Pour un débutant : au lieu de générer les notifications à chaque GET /notifications,
+# on les calcule quand un événement arrive (saisie enregistrée, tâche quotidienne).
+# Les user_id à traiter sont mis en file ; un thread dédié les traite un par un.
+
+import logging
+import queue
+import threading
+from datetime import datetime, timedelta
+
+from services.notification_service import generate_dynamic_notifications
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationWorker:
+    def __init__(self, session_factory=None):
+        # Factory de sessions (SessionLocal par défaut, remplaçable pour les tests).
+        self._session_factory = session_factory
+        self._queue = queue.Queue()
+        # Utilisateurs déjà en file : plusieurs saisies rapprochées = une seule évaluation.
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+    def configure(self, session_factory):
+        self._session_factory = session_factory
+
+    # Ajoute un utilisateur à évaluer (ne bloque jamais l'appelant).
+    def enqueue(self, user_id: int):
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+        self._queue.put(user_id)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-worker", daemon=True)
+        self._thread.start()
+
+    # Arrête le thread après avoir traité la file.
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # Traite immédiatement tout ce qui est en file (tests, arrêt sans thread).
+    def drain(self):
+        while True:
+            try:
+                user_id = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if user_id is not None:
+                self._process(user_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "pending_users": len(self._pending),
+                "processed": self.processed,
+                "failed": self.failed,
+                "running": self._thread is not None and self._thread.is_alive()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+    def _run(self):
+        while True:
+            user_id = self._queue.get()
+            if user_id is None:
+                if self._stop.is_set():
+                    self.drain()
+                    return
+                continue
+            self._process(user_id)
+
+    def _new_session(self):
+        if self._session_factory is None:
+            from models.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _process(self, user_id: int):
+        with self._lock:
+            self._pending.discard(user_id)
+        db = self._new_session()
+        try:
+            generate_dynamic_notifications(db, user_id)
+            with self._lock:
+                self.processed += 1
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self.failed += 1
+            logger.warning("notification evaluation failed", exc_info=True, extra={"user_id": user_id})
+        finally:
+            db.close()
+
+    # Met en file les utilisateurs ayant saisi dans les 7 derniers jours (tâche quotidienne).
+    def enqueue_active_users(self):
+        from models.metric_model import DailyMetric
+        db = self._new_session()
+        try:
+            week_ago = datetime.now().date() - timedelta(days=7)
+            user_ids = [row[0] for row in db.query(DailyMetric.user_id).filter(DailyMetric.date >= week_ago).distinct()]
+        finally:
+            db.close()
+        for user_id in user_ids:
+            self.enqueue(user_id)
+        return len(user_ids)
+
+
+# Instance partagée par le processus.
+notification_worker = NotificationWorker()
+
+
+# Tâche planifiée : évalue les règles quotidiennes de tous les utilisateurs actifs.
+def evaluate_daily_notifications():
+    return notification_worker.enqueue_active_users()
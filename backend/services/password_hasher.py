@@ -0,0 +1,135 @@
+# services/password_hasher.py - Hachage et vérification des mots de passe hors du chemin des requêtes.
+# Pour un débutant : argon2 est volontairement coûteux (CPU + mémoire). Lors d'un pic de
+# connexions (ouverture des boutiques le matin), les calculs passent par un pool borné :
+# au plus HASH_WORKERS calculs en parallèle et HASH_QUEUE_LIMIT demandes en attente ;
+# au-delà, HashingBusy est levée (les routes répondent 503 au lieu de saturer le serveur).
+#
+# Réglages (variables d'environnement) :
+# - ARGON2_TIME_COST / ARGON2_MEMORY_COST (Kio) / ARGON2_PARALLELISM : coût argon2
+# - HASH_EXECUTOR : "thread" (défaut, argon2 libère le GIL) ou "process"
+# - HASH_WORKERS (défaut : nombre de cœurs) et HASH_QUEUE_LIMIT (défaut : 8 x HASH_WORKERS)
+# Les hachages existants (bcrypt, ou argon2 avec d'anciens paramètres) sont refaits
+# à la connexion suivante, quand needs_update le demande.
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", str(64 * 1024)))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(HASH_WORKERS * 8)))
+
+# Contexte argon2 (nouveaux hachages) ; bcrypt reste lisible et est marqué obsolète.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM
+)
+
+
+# Trop de calculs en attente : réessayer plus tard.
+class HashingBusy(Exception):
+    pass
+
+
+# Réponse des routes à HashingBusy (pic de connexions) : 503 avec Retry-After.
+def hashing_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+
+
+# Fonctions de niveau module : exécutables aussi dans un processus du pool.
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except (ValueError, TypeError):
+        # Hachage illisible (format inconnu) : mot de passe refusé.
+        return False, None
+
+
+class HashingExecutor:
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT, kind: str = HASH_EXECUTOR):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown HASH_EXECUTOR: {kind} (expected thread or process)")
+        self.workers = workers
+        # Calculs en cours + en attente acceptés au maximum.
+        self.limit = workers + queue_limit
+        self.kind = kind
+        self._pool = None
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hasher")
+        return self._pool
+
+    # Soumet fn(*args) au pool ; HashingBusy si la file est pleine.
+    def submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self.inflight >= self.limit:
+                self.rejected += 1
+                raise HashingBusy("Password hashing queue is full")
+            self.inflight += 1
+            pool = self._get_pool()
+        future = pool.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future):
+        with self._lock:
+            self.inflight -= 1
+            self.completed += 1
+
+    # Versions async (routes) : la boucle d'événements attend sans bloquer.
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(_hash, password))
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self.submit(_verify_and_update, password, hashed))
+
+    # Versions synchrones (services exécutés dans un thread).
+    def hash_sync(self, password: str) -> str:
+        return self.submit(_hash, password).result()
+
+    def verify_and_update_sync(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self.submit(_verify_and_update, password, hashed).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "limit": self.limit,
+                "inflight": self.inflight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+# Instance partagée par le processus.
+password_hasher = HashingExecutor()
@@ -0,0 +1,130 @@
+# services/principal_cache.py - Cache des utilisateurs authentifiés (par token).
+# Pour un débutant : évite de décoder le JWT et de relire l'utilisateur en base à chaque requête.
+# Cache borné (LRU) avec durée de vie (TTL) ; invalidé quand le profil change.
+# Note : le cache est propre à chaque processus ; avec plusieurs workers, un autre
+# processus peut garder l'ancienne version au plus PRINCIPAL_CACHE_TTL secondes.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+# Copie légère et détachée de la session d'un utilisateur authentifié.
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    name: str
+    locale: Optional[str] = "FR"
+    fcm_token: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, email=user.email, name=user.name, locale=user.locale, fcm_token=user.fcm_token)
+
+
+# Identité portée par les seules claims d'un token (id et email) : pas de profil (name, locale...),
+# qu'il faut charger avec get_current_user.
+@dataclass(frozen=True)
+class TokenPrincipal:
+    id: int
+    email: str
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "TokenPrincipal":
+        return cls(id=claims["uid"], email=claims["sub"])
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (principal, expires_at, kid)
+        self._by_user = {}  # user_id -> set(tokens), pour l'invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Retourne le Principal en cache, ou None (absent ou expiré).
+    # kid_valid(kid) : faux si la clé qui a signé le token a été retirée depuis la mise en cache.
+    def get(self, token: str, kid_valid: Optional[Callable[[Optional[str]], bool]] = None) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at, kid = entry
+            if expires_at <= now or (kid_valid is not None and not kid_valid(kid)):
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    # Ajoute un Principal ; token_exp (timestamp JWT) borne la durée de vie, kid est la clé du token.
+    def put(self, token: str, principal: Principal, token_exp: Optional[float] = None, kid: Optional[str] = None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (principal, time.monotonic() + ttl, kid)
+            self._by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    # Supprime toutes les entrées d'un utilisateur (profil ou fcm_token modifié).
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    # Compteurs pour suivre l'efficacité du cache.
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    # À appeler avec le verrou.
+    def _remove(self, token: str):
+        principal, _, _ = self._entries.pop(token)
+        tokens = self._by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[principal.id]
+
+
+# Instance partagée par le processus.
+principal_cache = PrincipalCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+)
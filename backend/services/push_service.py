@@ -0,0 +1,254 @@
+# services/push_service.py - Envoi des notifications push (rappel quotidien) à grande échelle.
+# Pour un débutant : les utilisateurs ayant un fcm_token sont lus par paquets (jamais toute
+# la table en mémoire), puis les envois partent en parallèle (concurrence bornée) sans
+# dépasser un débit maximal (seau à jetons). Les erreurs temporaires sont réessayées et les
+# tokens refusés par Firebase sont effacés de la table users.
+#
+# Transport choisi par PUSH_TRANSPORT : "firebase" (défaut) ou "fake" (en mémoire, tests).
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.user_model import User
+from services.principal_cache import principal_cache
+
+logger = logging.getLogger(__name__)
+
+# Réglages par défaut (surchargables par variables d'environnement).
+PUSH_TRANSPORT = os.getenv("PUSH_TRANSPORT", "firebase")
+PUSH_CONCURRENCY = int(os.getenv("PUSH_CONCURRENCY", "50"))
+PUSH_RATE = float(os.getenv("PUSH_RATE", "500"))  # envois par seconde
+PUSH_MAX_RETRIES = int(os.getenv("PUSH_MAX_RETRIES", "3"))
+PUSH_CHUNK_SIZE = int(os.getenv("PUSH_CHUNK_SIZE", "1000"))
+PUSH_BACKOFF = float(os.getenv("PUSH_BACKOFF", "0.5"))  # secondes, doublé à chaque essai
+
+REMINDER_TITLE = "Rappel quotidien"
+REMINDER_BODY = "N'oubliez pas de saisir vos ventes et votre cash du jour."
+
+# Résultats d'un envoi.
+SENT = "sent"
+INVALID_TOKEN = "invalid_token"
+
+
+# Erreur temporaire (réseau, quota, serveur) : l'envoi sera réessayé.
+class TransientPushError(Exception):
+    pass
+
+
+# Transport en mémoire : enregistre les messages au lieu de les envoyer.
+class FakeTransport:
+    def __init__(self, invalid_tokens=(), transient_failures=None, latency: float = 0.0):
+        self.invalid_tokens = set(invalid_tokens)
+        # token -> nombre d'échecs temporaires avant succès
+        self.transient_failures = dict(transient_failures or {})
+        self.latency = latency
+        self.sent = []
+
+    async def send(self, token: str, title: str, body: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if token in self.invalid_tokens:
+            return INVALID_TOKEN
+        if self.transient_failures.get(token, 0) > 0:
+            self.transient_failures[token] -= 1
+            raise TransientPushError(f"temporary failure for {token}")
+        self.sent.append((token, title, body))
+        return SENT
+
+
+# Transport Firebase Cloud Messaging (firebase-admin, identifiants par défaut de l'environnement).
+class FirebaseTransport:
+    def __init__(self):
+        import firebase_admin
+        from firebase_admin import exceptions, messaging
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app()
+        self._messaging = messaging
+        self._invalid_errors = (
+            messaging.UnregisteredError,
+            messaging.SenderIdMismatchError,
+            exceptions.InvalidArgumentError,
+        )
+        self._firebase_error = exceptions.FirebaseError
+
+    async def send(self, token: str, title: str, body: str) -> str:
+        message = self._messaging.Message(
+            token=token,
+            notification=self._messaging.Notification(title=title, body=body)
+        )
+        try:
+            # Le SDK est synchrone : l'appel HTTP s'exécute dans un thread.
+            await asyncio.to_thread(self._messaging.send, message)
+        except self._invalid_errors:
+            return INVALID_TOKEN
+        except self._firebase_error as e:
+            raise TransientPushError(str(e)) from e
+        return SENT
+
+
+def build_transport(name: str = PUSH_TRANSPORT):
+    if name == "fake":
+        return FakeTransport()
+    if name == "firebase":
+        return FirebaseTransport()
+    raise ValueError(f"Unknown PUSH_TRANSPORT: {name} (expected firebase or fake)")
+
+
+# Seau à jetons : au plus `rate` envois par seconde, avec des pointes jusqu'à `burst`.
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Parcourt les (id, fcm_token) des utilisateurs par paquets, par id croissant (pagination par clé).
+def iter_push_targets(db: Session, chunk_size: int = PUSH_CHUNK_SIZE) -> Iterator[List[Tuple[int, str]]]:
+    last_id = 0
+    while True:
+        chunk = db.query(User.id, User.fcm_token).filter(
+            User.id > last_id,
+            User.fcm_token.isnot(None),
+            User.fcm_token != ""
+        ).order_by(User.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        yield [(row.id, row.fcm_token) for row in chunk]
+        last_id = chunk[-1].id
+
+
+# Efface les tokens refusés (seulement s'ils n'ont pas été remplacés entre-temps).
+def prune_tokens(db: Session, targets: List[Tuple[int, str]]) -> int:
+    if not targets:
+        return 0
+    pruned = 0
+    for user_id, token in targets:
+        pruned += db.query(User).filter(
+            User.id == user_id,
+            User.fcm_token == token
+        ).update({"fcm_token": None}, synchronize_session=False)
+    db.commit()
+    for user_id, _ in targets:
+        principal_cache.invalidate_user(user_id)
+    return pruned
+
+
+# Envoie un message à tous les utilisateurs ayant un fcm_token ; retourne les statistiques du passage.
+async def fan_out(session_factory: Callable[[], Session], transport, title: str, body: str,
+                  concurrency: int = PUSH_CONCURRENCY, rate: float = PUSH_RATE,
+                  max_retries: int = PUSH_MAX_RETRIES, chunk_size: int = PUSH_CHUNK_SIZE,
+                  backoff: float = PUSH_BACKOFF) -> dict:
+    stats = {"users": 0, "sent": 0, "invalid": 0, "failed": 0, "retries": 0, "pruned": 0}
+    bucket = TokenBucket(rate)
+    # File bornée : la lecture des paquets attend que les envois suivent.
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    invalid = []
+    started = time.perf_counter()
+
+    async def send_one(user_id: int, token: str):
+        for attempt in range(max_retries + 1):
+            await bucket.acquire()
+            try:
+                result = await transport.send(token, title, body)
+            except TransientPushError:
+                if attempt == max_retries:
+                    stats["failed"] += 1
+                    return
+                stats["retries"] += 1
+                # Attente exponentielle avec gigue, pour ne pas réessayer tous en même temps.
+                await asyncio.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+                continue
+            except Exception:
+                # Erreur inattendue (transport, payload...) : pas de réessai, mais une trace.
+                logger.exception("push send failed", extra={"user_id": user_id})
+                stats["failed"] += 1
+                return
+            if result == INVALID_TOKEN:
+                stats["invalid"] += 1
+                invalid.append((user_id, token))
+            else:
+                stats["sent"] += 1
+            return
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                await send_one(*item)
+            finally:
+                queue.task_done()
+
+    def read_chunks():
+        db = session_factory()
+        try:
+            return db, iter_push_targets(db, chunk_size)
+        except Exception:
+            db.close()
+            raise
+
+    db, chunks = await asyncio.to_thread(read_chunks)
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            stats["users"] += len(chunk)
+            for target in chunk:
+                await queue.put(target)
+            # Les tokens invalides sont effacés au fil de l'eau, par paquet.
+            if len(invalid) >= chunk_size:
+                batch, invalid[:] = invalid[:], []
+                stats["pruned"] += await asyncio.to_thread(prune_tokens, db, batch)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        stats["pruned"] += await asyncio.to_thread(prune_tokens, db, invalid)
+    finally:
+        for task in workers:
+            task.cancel()
+        # Attend l'arrêt effectif des workers (sinon "Task was destroyed but it is pending").
+        await asyncio.gather(*workers, return_exceptions=True)
+        await asyncio.to_thread(db.close)
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["per_s"] = round(stats["users"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+# Rappel quotidien (appelé par le scheduler, hors boucle d'événements).
+def send_reminder_wave(session_factory=None, transport=None) -> Optional[dict]:
+    if session_factory is None:
+        from models.database import SessionLocal
+        session_factory = SessionLocal
+    try:
+        transport = transport or build_transport()
+    except Exception:
+        logger.error("push transport unavailable, reminder not sent", exc_info=True)
+        return None
+    stats = asyncio.run(fan_out(session_factory, transport, REMINDER_TITLE, REMINDER_BODY))
+    logger.info("daily reminder sent", extra=stats)
+    return stats
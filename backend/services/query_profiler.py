@@ -0,0 +1,116 @@
+# services/query_profiler.py - Profileur SQL par requête HTTP (opt-in, SQL_PROFILE=1).
+# Pour un débutant : chaque instruction SQL exécutée pendant une requête est comptée et
+# chronométrée (événements before/after_cursor_execute de SQLAlchemy). La réponse porte
+# X-Query-Count et X-DB-Time (ms) ; une même instruction répétée dans une requête (symptôme
+# d'un N+1 : une requête par ligne au lieu d'une seule) est signalée par X-Query-Repeated
+# et un log WARNING. Le même mécanisme sert aux tests : assert_max_queries(n) échoue si un
+# bloc exécute plus de n requêtes.
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "0") == "1"
+# Nombre d'exécutions d'une même instruction, dans une requête, à partir duquel elle est signalée.
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", "3"))
+
+
+class QueryProfile:
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0  # secondes
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float):
+        with self._lock:
+            self.count += 1
+            self.db_time += elapsed
+            self.statements[statement] += 1
+
+    # Instructions exécutées au moins `threshold` fois : [(sql, nombre)], les plus fréquentes d'abord.
+    def repeated(self, threshold: int = SQL_PROFILE_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        with self._lock:
+            return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+# Profil de la requête HTTP en cours (posé par middleware/query_profiler.py).
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+# Captures actives de tous les threads (tests : la requête s'exécute dans un autre thread que le test).
+_captures: List[QueryProfile] = []
+_captures_lock = threading.Lock()
+
+
+# Branche le profileur sur un moteur (synchrone ou asynchrone) ; sans effet au second appel.
+def profile_engine(engine):
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profiler_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+    if _captures:
+        with _captures_lock:
+            captures = list(_captures)
+        for capture in captures:
+            capture.record(statement, elapsed)
+
+
+# Compte les requêtes exécutées dans le bloc, quel que soit le thread qui les exécute.
+@contextmanager
+def capture_queries():
+    profile = QueryProfile()
+    with _captures_lock:
+        _captures.append(profile)
+    try:
+        yield profile
+    finally:
+        with _captures_lock:
+            _captures.remove(profile)
+
+
+# Échoue (AssertionError, avec la liste des instructions) si le bloc exécute plus de max_count requêtes.
+# e.g. with assert_max_queries(3): client.get("/v1/dashboard", headers=headers)
+@contextmanager
+def assert_max_queries(max_count: int):
+    with capture_queries() as profile:
+        yield profile
+    if profile.count > max_count:
+        details = "\n".join(f"  {n} x {sql}" for sql, n in profile.statements.most_common())
+        raise AssertionError(f"{profile.count} queries executed, at most {max_count} expected:\n{details}")
+
+
+# Signale les instructions répétées d'une requête (log WARNING) ; retourne leur nombre.
+def report_repeated(profile: QueryProfile, method: str, path: str) -> int:
+    repeated = profile.repeated()
+    if repeated:
+        logger.warning("repeated SQL statements (possible N+1)", extra={
+            "method": method,
+            "path": path,
+            "query_count": profile.count,
+            "repeated": [{"count": n, "sql": sql} for sql, n in repeated]
+        })
+    return len(repeated)
@@ -0,0 +1,213 @@
+# services/rollup_service.py - Maintient les totaux par période (table metric_rollups).
+# Pour un débutant : après chaque saisie, seules les périodes touchées sont recalculées,
+# dans la même transaction que l'écriture de la métrique.
+# Reconstruction / vérification : `python -m services.rollup_service rebuild|verify [--user ID]`.
+
+from sqlalchemy import func, or_, and_, text
+from sqlalchemy.orm import Session
+from models.database import dialect_insert
+from models.metric_model import DailyMetric
+from models.rollup_model import MetricRollup
+from services.aggregation_service import bucket_start, next_bucket_start, _bucket_expression
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+# Périodes maintenues ; l'année est calculée à partir des mois.
+ROLLUP_KINDS = ("week", "month", "year")
+
+
+# Lignes par INSERT : 6 paramètres par ligne, loin de la limite d'un SQLite standard (32 766 variables).
+ROLLUP_BATCH_SIZE = 500
+
+
+# Insère ou met à jour des lignes de rollup (INSERT ... ON CONFLICT DO UPDATE), par paquets
+# de ROLLUP_BATCH_SIZE lignes (sans commit : l'appelant commit une seule fois).
+def _upsert_rollups(db: Session, rows: List[dict]):
+    for offset in range(0, len(rows), ROLLUP_BATCH_SIZE):
+        stmt = dialect_insert(db, MetricRollup).values(rows[offset:offset + ROLLUP_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MetricRollup.user_id, MetricRollup.period_kind, MetricRollup.period_start],
+            set_={
+                "sales": stmt.excluded.sales,
+                "cash": stmt.excluded.cash,
+                "count": stmt.excluded.count
+            }
+        )
+        db.execute(stmt)
+
+
+# Sérialise les écritures d'un utilisateur jusqu'à la fin de la transaction.
+# SQLite n'a qu'un écrivain à la fois ; PostgreSQL (READ COMMITTED) a besoin d'un verrou
+# pour que deux saisies concurrentes ne recalculent pas la même période chacune de leur côté.
+def lock_user_rollups(db: Session, user_id: int):
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": user_id})
+
+
+# Recalcule des périodes semaine/mois depuis les saisies brutes.
+def _refresh_from_daily(db: Session, user_id: int, kind: str, starts: Iterable[date]):
+    starts = sorted(set(starts))
+    if not starts:
+        return
+    # Borne chaque période pour ne lire que les jours concernés.
+    ranges = [
+        and_(
+            DailyMetric.date >= s,
+            DailyMetric.date <= next_bucket_start(s, kind) - timedelta(days=1)
+        )
+        for s in starts
+    ]
+    period = _bucket_expression(kind).label("period")
+    totals = {
+        row[0]: row
+        for row in db.query(
+            period,
+            func.sum(DailyMetric.sales),
+            func.sum(DailyMetric.cash),
+            func.count(DailyMetric.id)
+        ).filter(DailyMetric.user_id == user_id, or_(*ranges)).group_by(period).all()
+    }
+    _upsert_rollups(db, [_rollup_row(user_id, kind, s.strftime("%Y-%m-%d"), totals.get(s.strftime("%Y-%m-%d"))) for s in starts])
+
+
+# Recalcule des années depuis les rollups mensuels (12 lignes maximum par année).
+def _refresh_years(db: Session, user_id: int, years: Iterable[int]):
+    years = sorted(set(years))
+    if not years:
+        return
+    year = func.substr(MetricRollup.period_start, 1, 4).label("year")
+    totals = {
+        row[0]: row
+        for row in db.query(
+            year,
+            func.sum(MetricRollup.sales),
+            func.sum(MetricRollup.cash),
+            func.sum(MetricRollup.count)
+        ).filter(
+            MetricRollup.user_id == user_id,
+            MetricRollup.period_kind == "month",
+            MetricRollup.period_start >= f"{years[0]:04d}-01-01",
+            MetricRollup.period_start <= f"{years[-1]:04d}-12-01"
+        ).group_by(year).all()
+    }
+    _upsert_rollups(db, [_rollup_row(user_id, "year", f"{y:04d}-01-01", totals.get(f"{y:04d}")) for y in years])
+
+
+def _rollup_row(user_id: int, kind: str, period_start: str, row) -> dict:
+    return {
+        "user_id": user_id,
+        "period_kind": kind,
+        "period_start": period_start,
+        "sales": float(row[1] or 0.0) if row else 0.0,
+        "cash": float(row[2] or 0.0) if row else 0.0,
+        "count": int(row[3] or 0) if row else 0
+    }
+
+
+# Met à jour les rollups des périodes contenant ces dates (sans commit : l'appelant commit).
+def refresh_rollups(db: Session, user_id: int, days: Iterable[date]):
+    days = set(days)
+    if not days:
+        return
+    _refresh_from_daily(db, user_id, "week", (bucket_start(d, "week") for d in days))
+    _refresh_from_daily(db, user_id, "month", (bucket_start(d, "month") for d in days))
+    _refresh_years(db, user_id, (d.year for d in days))
+
+
+# Recalcule tous les rollups depuis les saisies brutes.
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    delete = db.query(MetricRollup)
+    if user_id is not None:
+        delete = delete.filter(MetricRollup.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    count = 0
+    for kind in ROLLUP_KINDS:
+        period = _bucket_expression(kind).label("period")
+        query = db.query(
+            DailyMetric.user_id,
+            period,
+            func.sum(DailyMetric.sales),
+            func.sum(DailyMetric.cash),
+            func.count(DailyMetric.id)
+        )
+        if user_id is not None:
+            query = query.filter(DailyMetric.user_id == user_id)
+        rows = [_rollup_row(row[0], kind, row[1], row[1:]) for row in query.group_by(DailyMetric.user_id, period).all()]
+        _upsert_rollups(db, rows)
+        count += len(rows)
+    db.commit()
+    return count
+
+
+# Compare les rollups stockés avec un recalcul complet ; retourne les écarts.
+def verify_rollups(db: Session, user_id: Optional[int] = None) -> List[dict]:
+    stored = db.query(MetricRollup)
+    if user_id is not None:
+        stored = stored.filter(MetricRollup.user_id == user_id)
+    stored = {
+        (r.user_id, r.period_kind, r.period_start): (r.sales, r.cash, r.count)
+        for r in stored.all()
+        if r.count  # une période vidée peut rester à zéro
+    }
+
+    expected = {}
+    for kind in ROLLUP_KINDS:
+        period = _bucket_expression(kind).label("period")
+        query = db.query(
+            DailyMetric.user_id,
+            period,
+            func.sum(DailyMetric.sales),
+            func.sum(DailyMetric.cash),
+            func.count(DailyMetric.id)
+        )
+        if user_id is not None:
+            query = query.filter(DailyMetric.user_id == user_id)
+        for row in query.group_by(DailyMetric.user_id, period).all():
+            expected[(row[0], kind, row[1])] = (float(row[2] or 0.0), float(row[3] or 0.0), int(row[4]))
+
+    mismatches = []
+    for key in sorted(set(stored) | set(expected)):
+        got = stored.get(key, (0.0, 0.0, 0))
+        want = expected.get(key, (0.0, 0.0, 0))
+        if got[2] != want[2] or abs(got[0] - want[0]) > 1e-6 or abs(got[1] - want[1]) > 1e-6:
+            mismatches.append({
+                "user_id": key[0],
+                "period_kind": key[1],
+                "period_start": key[2],
+                "stored": got,
+                "expected": want
+            })
+    return mismatches
+
+
+# Construit les rollups au démarrage si la table est vide (base existante avant cette fonctionnalité).
+def ensure_rollups(db: Session):
+    if db.query(MetricRollup.user_id).first() is None and db.query(DailyMetric.id).first() is not None:
+        rebuild_rollups(db)
+
+
+if __name__ == "__main__":
+    import argparse
+    from models.database import SessionLocal, engine, Base
+    import models.user_model  # noqa: F401
+    import models.notification_model  # noqa: F401
+
+    parser = argparse.ArgumentParser(description="Reconstruit ou vérifie la table metric_rollups.")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--user", type=int, default=None, help="Limiter à un utilisateur")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"{rebuild_rollups(session, args.user)} rollups recalculés")
+        else:
+            mismatches = verify_rollups(session, args.user)
+            for m in mismatches:
+                print(m)
+            print(f"{len(mismatches)} écart(s)")
+            raise SystemExit(1 if mismatches else 0)
+    finally:
+        session.close()
@@ -0,0 +1,252 @@
+# services/telemetry.py - Mesures internes de l'API, exportées au format texte Prometheus (GET /metrics).
+# Pour un débutant : tout est calculé dans le processus, sans service externe :
+# - compteurs et histogrammes alimentés au fil de l'eau (requêtes HTTP via middleware/telemetry.py,
+#   requêtes SQL et attente du pool via instrument_engine, durée des tâches planifiées) ;
+# - statistiques lues au moment de l'export (register_stats) : cache des principals, pool de
+#   hachage, worker des notifications, runner des tâches.
+# Un histogramme garde, par jeu de labels, le nombre d'observations par tranche (bucket),
+# leur somme et leur nombre : Prometheus en déduit moyennes et percentiles.
+
+import math
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+PREFIX = "compta_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Tranches (secondes) des histogrammes.
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = HTTP_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [compte par tranche (+ tranche +Inf), somme, nombre]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total, n) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {n}")
+        return lines
+
+
+# Registre du processus : mesures déclarées ci-dessous + statistiques lues à l'export.
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._stats: Dict[str, Tuple[Callable[[], dict], Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    # Exporte en jauges les valeurs numériques de fn() (e.g. principal_cache.stats) sous `prefix`_<clé>.
+    # Avec `label`, fn() renvoie {valeur du label: {clé: valeur}} (e.g. job_runner.stats, par tâche).
+    def register_stats(self, prefix: str, fn: Callable[[], dict], label: Optional[str] = None):
+        with self._lock:
+            self._stats[prefix] = (fn, label)
+
+    def unregister_stats(self, prefix: str):
+        with self._lock:
+            self._stats.pop(prefix, None)
+
+    def _render_stats(self, prefix: str, fn, label: Optional[str]) -> List[str]:
+        try:
+            stats = fn()
+        except Exception:
+            return []
+        rows = stats.items() if label else [(None, stats)]
+        series = {}
+        for label_value, values in rows:
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                labels = (label,) if label else ()
+                label_values = (label_value,) if label else ()
+                series.setdefault(key, []).append(f"{PREFIX}{prefix}_{key}{_format_labels(labels, label_values)} {_format_value(value)}")
+        lines = []
+        for key, samples in sorted(series.items()):
+            lines.append(f"# TYPE {PREFIX}{prefix}_{key} gauge")
+            lines.extend(samples)
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            stats = sorted(self._stats.items())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, (fn, label) in stats:
+            lines.extend(self._render_stats(prefix, fn, label))
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.add(Counter("http_requests_total", "HTTP requests by route, method and status.", ("method", "route", "status")))
+HTTP_DURATION = registry.add(Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")))
+HTTP_IN_PROGRESS = registry.add(Gauge("http_requests_in_progress", "HTTP requests being served."))
+DB_QUERY_DURATION = registry.add(Histogram("db_query_duration_seconds", "SQL statement duration by operation.", ("operation",), DB_BUCKETS))
+DB_POOL_WAIT = registry.add(Histogram("db_pool_checkout_seconds", "Time spent getting a connection from the pool.", (), DB_BUCKETS))
+JOB_DURATION = registry.add(Histogram("job_duration_seconds", "Scheduled job run duration.", ("job", "status"), JOB_BUCKETS))
+
+# Premier mot d'une requête SQL -> label operation (nombre de valeurs borné).
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA"}
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word.lower() if word in _OPERATIONS else "other"
+
+
+# Moteurs déjà instrumentés (instrument_engine est sans effet au second appel).
+_instrumented = weakref.WeakSet()
+
+
+# Mesure la durée des requêtes SQL et l'attente du pool d'un moteur (synchrone ou asynchrone).
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine in _instrumented:
+        return
+    _instrumented.add(sync_engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("telemetry_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("telemetry_start")
+        if starts:
+            DB_QUERY_DURATION.observe(time.perf_counter() - starts.pop(), operation=_operation(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        starts = exception_context.connection.info.get("telemetry_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    _time_pool_checkout(sync_engine)
+    # dispose() remplace le pool : le nouveau est chronométré aussi.
+    event.listen(sync_engine, "engine_disposed", _time_pool_checkout)
+
+
+# SQLAlchemy n'a pas d'événement "avant checkout" : Pool.connect est chronométré directement
+# (temps d'attente d'une connexion libre, ou d'ouverture d'une nouvelle connexion).
+def _time_pool_checkout(sync_engine):
+    pool = sync_engine.pool
+    checkout = pool.connect
+
+    def timed_checkout():
+        started = time.perf_counter()
+        try:
+            return checkout()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+    pool.connect = timed_checkout
@@ -3,14 +3,17 @@
 from sqlalchemy.orm import Session
 from models.user_model import User
 from schemas.user_schemas import UserUpdate
-from services.auth_service import pwd_context
+from services.password_hasher import password_hasher
+from services.principal_cache import principal_cache
+from services.data_version_service import bump_data_version
 
 # Get user par ID
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
 # Update user
-def update_user(db: Session, user_id: int, user_update: UserUpdate):
+# hashed_password : hachage du nouveau mot de passe déjà calculé (e.g., par la route).
+def update_user(db: Session, user_id: int, user_update: UserUpdate, hashed_password: str = None):
     user = get_user(db, user_id)
     if not user:
         return None
@@ -24,9 +27,23 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
             raise ValueError("Email already in use")
         user.email = user_update.email
     if user_update.password is not None:
-        user.hashed_password = pwd_context.hash(user_update.password)
+        user.hashed_password = hashed_password or password_hasher.hash_sync(user_update.password)
     
+    # Le nom apparaît dans le dashboard : nouvelle version des données (ETag).
+    bump_data_version(db, user_id)
     db.commit()
     db.refresh(user)
+    # Les tokens en cache portent l'ancien profil.
+    principal_cache.invalidate_user(user_id)
+    return user
+
+# Set FCM token - enregistre le token push de l'appareil
+def set_fcm_token(db: Session, user_id: int, fcm_token: str):
+    user = get_user(db, user_id)
+    if not user:
+        return None
+    user.fcm_token = fcm_token
+    db.commit()
+    principal_cache.invalidate_user(user_id)
     return user
 
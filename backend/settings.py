@@ -0,0 +1,62 @@
+# settings.py - Réglages de l'application construite par create_app (run.py).
+# Pour un débutant : chaque champ active une partie du travail fait au démarrage (lifespan).
+# Settings.from_env() lit l'environnement (et le fichier .env) ; Settings.for_tests() n'active
+# rien : l'app est complète (routes, middlewares) mais ne touche ni à la base ni aux threads.
+#
+# Variables d'environnement :
+# - APP_SETUP_SCHEMA : création des tables, migrations et rollups manquants (défaut 1)
+# - APP_START_SCHEDULER : tâches planifiées (rappels, notifications quotidiennes) (défaut 1)
+# - APP_START_WORKER : worker des notifications (défaut 1)
+# - APP_WARM_UP : préchauffage en arrière-plan après le démarrage (défaut 1)
+# - CORS_ORIGINS : origines autorisées, séparées par des virgules (défaut *)
+
+import os
+from dataclasses import dataclass, field
+from typing import List
+
+
+def _flag(name: str, default: bool = True) -> bool:
+    return os.getenv(name, "1" if default else "0") == "1"
+
+
+@dataclass
+class Settings:
+    title: str = "Compta Backend"
+    version: str = "1.0"
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+    # Travail du lifespan (démarrage / arrêt).
+    setup_schema: bool = True
+    start_scheduler: bool = True
+    start_worker: bool = True
+    configure_logging: bool = True
+    instrument_db: bool = True
+    warm_up: bool = True
+    # Profileur SQL par requête (en-têtes X-Query-Count / X-DB-Time).
+    sql_profile: bool = False
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        # Charge .env avant de lire les réglages (et avant l'import des routes, qui lisent l'environnement).
+        from dotenv import load_dotenv
+        load_dotenv()
+        origins = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+        return cls(
+            cors_origins=origins or ["*"],
+            setup_schema=_flag("APP_SETUP_SCHEMA"),
+            start_scheduler=_flag("APP_START_SCHEDULER"),
+            start_worker=_flag("APP_START_WORKER"),
+            warm_up=_flag("APP_WARM_UP"),
+            sql_profile=_flag("SQL_PROFILE", default=False)
+        )
+
+    # App sans effet de bord : la base et les threads restent sous le contrôle des tests.
+    @classmethod
+    def for_tests(cls) -> "Settings":
+        return cls(
+            setup_schema=False,
+            start_scheduler=False,
+            start_worker=False,
+            configure_logging=False,
+            instrument_db=False,
+            warm_up=False
+        )
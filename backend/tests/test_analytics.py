@@ -0,0 +1,58 @@
+# tests/test_analytics.py - Tests des analyses vectorisées (/v1/insights/series)
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi import status
+
+from services.analytics_service import period_change, rolling_mean, rolling_zscore
+
+
+def test_rolling_functions_match_naive_computation():
+    """Test des moyennes glissantes, variations et z-scores contre un calcul naïf"""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(50, 150, 90)
+    values[[3, 10, 11, 40]] = np.nan
+
+    ma7 = rolling_mean(values, 7)
+    change = period_change(values, 7)
+    z = rolling_zscore(values, 30)
+    for i in (0, 12, 45, 89):
+        window = values[max(0, i - 6):i + 1]
+        assert np.isclose(ma7[i], np.nanmean(window))
+    current, previous = np.nansum(values[83:90]), np.nansum(values[76:83])
+    assert np.isclose(change[89], (current - previous) / previous * 100)
+    assert np.isnan(change[5])
+    prior = values[59:89][~np.isnan(values[59:89])]
+    assert np.isclose(z[89], (values[89] - prior.mean()) / prior.std())
+    assert np.isnan(z[3])
+
+
+def test_insight_series_endpoint(client, auth_token):
+    """Test de /v1/insights/series : colonnes, jours sans saisie à null, anomalie détectée"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    start = date(2025, 3, 1)
+    entries = [
+        {"date": (start + timedelta(days=i)).isoformat(), "sales": 100.0 + (i % 3), "cash": 50.0}
+        for i in range(40) if i != 35
+    ]
+    entries[-1]["sales"] = 1000.0  # pic le dernier jour
+    client.post("/v1/metrics/batch", json={"metrics": entries}, headers=headers)
+
+    response = client.get("/v1/insights/series?from=2025-04-01&to=2025-04-09", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["dates"][0] == "2025-04-01" and len(data["dates"]) == 9
+    assert data["sales"][4] is None  # 2025-04-05 sans saisie
+    assert data["cashRatio"][0] == round(50.0 / 101.0, 4)
+    assert data["salesAnomaly"] == [False] * 8 + [True]
+    assert all(len(data[key]) == 9 for key in ("salesMa7", "salesMa30", "salesWow", "salesMom", "cashZ"))
+
+
+def test_insight_series_invalid_range(client, auth_token):
+    """Test qu'une plage inversée est refusée"""
+    response = client.get(
+        "/v1/insights/series?from=2025-04-09&to=2025-04-01",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
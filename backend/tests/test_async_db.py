@@ -0,0 +1,103 @@
+# tests/test_async_db.py - Tests du mode d'accès DB asynchrone (AsyncSession + aiosqlite)
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, get_db, run_db
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+async def async_engine(db):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def async_client(app, async_engine):
+    """Client HTTP dont les routes reçoivent une AsyncSession"""
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+async def _heartbeat_gap(coro, interval=0.01):
+    """Exécute coro et retourne le plus grand retard observé de la boucle d'événements"""
+    worst = 0.0
+    done = False
+
+    async def heartbeat():
+        nonlocal worst
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(interval)
+            worst = max(worst, time.perf_counter() - before - interval)
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        result = await coro
+    finally:
+        done = True
+        await beat
+    return result, worst
+
+
+async def test_async_mode_end_to_end(async_client, test_user_data):
+    """Test inscription, saisie et dashboard avec une AsyncSession"""
+    response = await async_client.post("/register", json=test_user_data)
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await async_client.post("/v1/metrics", json={"date": "2025-01-02", "sales": 10.0, "cash": 5.0}, headers=headers)
+    assert response.status_code == 200
+
+    response = await async_client.get("/v1/series?from=2025-01-01&to=2025-01-31&bucket=month", headers=headers)
+    assert response.json()["points"][0]["sales"] == 10.0
+
+    response = await async_client.get("/v1/metrics?range=100000d", headers={**headers, "Accept": "application/x-ndjson"})
+    assert response.text.count("\n") == 1 and '"sales":10.0' in response.text
+
+
+async def test_slow_async_query_does_not_block_loop(async_engine):
+    """Test qu'une requête lente via aiosqlite laisse tourner la boucle d'événements"""
+    slow_sql = text("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 3000000) SELECT count(*) FROM c")
+    session_factory = async_sessionmaker(async_engine)
+
+    async with session_factory() as session:
+        start = time.perf_counter()
+        result, worst = await _heartbeat_gap(run_db(session, lambda db: db.execute(slow_sql).scalar()))
+        elapsed = time.perf_counter() - start
+
+    assert result == 3000000
+    assert worst < elapsed / 2
+
+
+async def test_sync_session_runs_in_thread(db):
+    """Test qu'un service synchrone lent ne bloque pas la boucle en mode sync"""
+    session = TestingSessionLocal()
+    try:
+        def slow_service(db):
+            time.sleep(0.3)
+            return "ok"
+
+        result, worst = await _heartbeat_gap(run_db(session, slow_service))
+    finally:
+        session.close()
+
+    assert result == "ok"
+    assert worst < 0.15
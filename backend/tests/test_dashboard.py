@@ -0,0 +1,101 @@
+# tests/test_dashboard.py - Tests pour les endpoints dashboard, graphiques et séries
+from datetime import datetime, timedelta
+from fastapi import status
+
+
+def test_dashboard_fills_missing_days(client, auth_token, post_metric):
+    """Test que le dashboard renvoie 7 jours, avec 0 pour les jours sans saisie"""
+    today = datetime.now().date()
+    post_metric((today - timedelta(days=1)).strftime("%Y-%m-%d"), 100.0, 80.0)
+    post_metric((today - timedelta(days=6)).strftime("%Y-%m-%d"), 50.0, 40.0)
+
+    response = client.get("/v1/dashboard", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["salesData"] == [50.0, 0.0, 0.0, 0.0, 0.0, 100.0, 0.0]
+    assert data["cashData"] == [40.0, 0.0, 0.0, 0.0, 0.0, 80.0, 0.0]
+    assert data["yesterdaySales"] == 100.0
+    assert data["yesterdayCash"] == 80.0
+    assert data["userName"] == "Test User"
+
+
+def test_graphs_weekly_totals(client, auth_token, post_metric):
+    """Test des totaux sur 3 semaines glissantes"""
+    today = datetime.now().date()
+    post_metric(today.strftime("%Y-%m-%d"), 10.0, 1.0)
+    post_metric((today - timedelta(days=7)).strftime("%Y-%m-%d"), 20.0, 2.0)
+    post_metric((today - timedelta(days=20)).strftime("%Y-%m-%d"), 30.0, 3.0)
+    post_metric((today - timedelta(days=21)).strftime("%Y-%m-%d"), 999.0, 9.0)
+
+    response = client.get("/v1/graphs", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["weeklySales"] == [30.0, 20.0, 10.0]
+    assert data["weeklyCash"] == [3.0, 2.0, 1.0]
+    assert data["totalSales"] == 60.0
+
+
+def test_series_by_month(client, auth_token, post_metric):
+    """Test de la série mensuelle avec mois vides complétés"""
+    post_metric("2025-01-15", 100.0, 10.0)
+    post_metric("2025-01-31", 50.0, 5.0)
+    post_metric("2025-03-01", 25.0, 2.5)
+
+    response = client.get(
+        "/v1/series?from=2025-01-10&to=2025-03-31&bucket=month",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    points = response.json()["points"]
+    assert [p["periodStart"] for p in points] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+    assert [p["sales"] for p in points] == [150.0, 0.0, 25.0]
+    assert [p["count"] for p in points] == [2, 0, 1]
+
+
+def test_series_by_iso_week(client, auth_token, post_metric):
+    """Test que les semaines commencent le lundi"""
+    # 2025-08-03 est un dimanche, 2025-08-04 un lundi
+    post_metric("2025-08-03", 1.0, 1.0)
+    post_metric("2025-08-04", 2.0, 2.0)
+
+    response = client.get(
+        "/v1/series?from=2025-07-28&to=2025-08-10&bucket=week",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+
+    points = response.json()["points"]
+    assert [(p["periodStart"], p["sales"]) for p in points] == [("2025-07-28", 1.0), ("2025-08-04", 2.0)]
+
+
+def test_series_invalid_bucket(client, auth_token):
+    """Test d'une taille de période inconnue"""
+    response = client.get(
+        "/v1/series?from=2025-01-01&to=2025-01-31&bucket=hour",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_series_columnar(client, auth_token, post_metric):
+    """Test du format colonnes de la série (tableaux parallèles)"""
+    from utils.columnar import COLUMNAR_JSON
+
+    post_metric("2025-01-15", 100.0, 10.0)
+    post_metric("2025-03-01", 25.0, 2.5)
+
+    response = client.get(
+        "/v1/series?from=2025-01-10&to=2025-03-31&bucket=month",
+        headers={"Authorization": f"Bearer {auth_token}", "Accept": COLUMNAR_JSON}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "bucket": "month", "start": "2025-01-10", "end": "2025-03-31",
+        "dates": ["2025-01-01", "2025-02-01", "2025-03-01"],
+        "sales": [100.0, 0.0, 25.0],
+        "cash": [10.0, 0.0, 2.5],
+        "count": [1, 0, 1]
+    }
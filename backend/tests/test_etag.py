@@ -0,0 +1,41 @@
+# tests/test_etag.py - Tests des GET conditionnels (ETag / If-None-Match)
+from datetime import datetime
+
+from fastapi import status
+
+from services.notification_service import create_notification
+from models.user_model import User
+
+
+def test_not_modified_until_write(client, auth_token):
+    """Test que If-None-Match renvoie 304 tant qu'aucune écriture n'a eu lieu"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    today = datetime.now().date().isoformat()
+    client.post("/v1/metrics", json={"date": today, "sales": 10.0, "cash": 5.0}, headers=headers)
+
+    for path in ("/v1/dashboard", "/v1/graphs", "/v1/metrics", "/notifications"):
+        first = client.get(path, headers=headers)
+        etag = first.headers["ETag"]
+        again = client.get(path, headers={**headers, "If-None-Match": etag})
+        assert again.status_code == status.HTTP_304_NOT_MODIFIED, path
+        assert again.headers["ETag"] == etag and again.content == b""
+
+    etag = client.get("/v1/dashboard", headers=headers).headers["ETag"]
+    client.post("/v1/metrics", json={"date": today, "sales": 20.0, "cash": 5.0}, headers=headers)
+    response = client.get("/v1/dashboard", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+def test_etag_varies_with_format_and_notifications(client, auth_token, db_session):
+    """Test que l'ETag dépend du format demandé et change à chaque notification"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    plain = client.get("/v1/metrics", headers=headers).headers["ETag"]
+    ndjson = client.get("/v1/metrics", headers={**headers, "Accept": "application/x-ndjson"}).headers["ETag"]
+    assert plain != ndjson
+
+    etag = client.get("/notifications", headers=headers).headers["ETag"]
+    create_notification(db_session, db_session.query(User.id).scalar(), "t", "m")
+    response = client.get("/notifications", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
@@ -0,0 +1,75 @@
+# tests/test_jobs.py - Tests du runner de tâches planifiées (une exécution par occurrence)
+from datetime import datetime, timedelta
+
+from models.job_model import JobRun
+from services.job_runner import JobRunner
+from tests.conftest import TestingSessionLocal
+
+
+def _runners(calls, count=2, fn=None):
+    runners = []
+    for i in range(count):
+        runner = JobRunner(TestingSessionLocal, owner=f"worker-{i}", lease_seconds=60, catchup_hours=3)
+        runner.add_job("daily_reminder", fn or (lambda: calls.append(1)), hour=20)
+        runners.append(runner)
+    return runners
+
+
+def test_single_runner_per_occurrence(db_session):
+    """Test que deux workers n'exécutent l'occurrence qu'une fois"""
+    calls = []
+    first, second = _runners(calls)
+    now = datetime(2025, 8, 4, 20, 0, 30)
+
+    first.tick(now)
+    second.tick(now)
+    first.tick(now + timedelta(seconds=30))
+
+    assert calls == [1]
+    run = db_session.query(JobRun).one()
+    assert (run.scheduled_for, run.status, run.owner) == ("2025-08-04T20:00", "succeeded", "worker-0")
+    assert first.stats()["daily_reminder"]["succeeded"] == 1
+
+
+def test_missed_run_caught_up(db_session):
+    """Test du rattrapage d'une occurrence manquée, dans la fenêtre seulement"""
+    calls = []
+    runner, = _runners(calls, count=1)
+
+    runner.tick(datetime(2025, 8, 5, 1, 0))   # 5 h après 20:00 : hors fenêtre (3 h)
+    assert calls == []
+    runner.tick(datetime(2025, 8, 5, 22, 0))  # redémarrage 2 h après l'occurrence : rattrapée
+    assert calls == [1]
+    assert db_session.query(JobRun.scheduled_for).scalar() == "2025-08-05T20:00"
+
+
+def test_expired_lease_taken_over(db_session):
+    """Test qu'une occurrence restée 'running' (worker mort) est reprise après expiration du bail"""
+    calls = []
+    first, second = _runners(calls)
+    now = datetime(2025, 8, 4, 20, 1)
+    db_session.add(JobRun(job_name="daily_reminder", scheduled_for="2025-08-04T20:00", status="running",
+                          owner="worker-0", lease_until=now + timedelta(seconds=30), started_at=now))
+    db_session.commit()
+
+    second.tick(now)
+    assert calls == []
+    second.tick(now + timedelta(minutes=2))
+    assert calls == [1]
+    db_session.expire_all()
+    run = db_session.query(JobRun).one()
+    assert (run.owner, run.attempts, run.status) == ("worker-1", 2, "succeeded")
+
+
+def test_failed_run_recorded(db_session):
+    """Test que l'échec d'une tâche est enregistré avec sa durée"""
+    def boom():
+        raise RuntimeError("transport down")
+
+    runner, = _runners([], count=1, fn=boom)
+    runner.tick(datetime(2025, 8, 4, 20, 5))
+
+    run = db_session.query(JobRun).one()
+    assert run.status == "failed" and "transport down" in run.error
+    assert run.duration_ms is not None
+    assert runner.stats()["daily_reminder"]["last_status"] == "failed"
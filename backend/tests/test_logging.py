@@ -0,0 +1,83 @@
+# tests/test_logging.py - Tests de la journalisation structurée
+import io
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils.structured_logging import configure_logging, shutdown_logging, request_id_var
+
+
+@pytest.fixture
+def log_output():
+    """Sortie JSON capturée dans un buffer (niveaux remis en place après le test)"""
+    buffer = io.StringIO()
+    yield buffer
+    shutdown_logging()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("tests.sample").setLevel(logging.NOTSET)
+
+
+def _events(buffer):
+    shutdown_logging()  # vide la file
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+
+def test_json_events_with_request_id_and_fields(log_output):
+    """Test du format JSON : id de requête, champs extra et trace d'erreur"""
+    configure_logging("INFO", module_levels={}, stream=log_output)
+    logger = logging.getLogger("tests.sample")
+    token = request_id_var.set("req-42")
+    try:
+        logger.info("metric saved", extra={"user_id": 7})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+        logger.debug("hidden")
+    finally:
+        request_id_var.reset(token)
+
+    events = _events(log_output)
+    assert [e["msg"] for e in events] == ["metric saved", "failed"]
+    assert events[0]["request_id"] == "req-42" and events[0]["user_id"] == 7
+    assert events[0]["logger"] == "tests.sample" and events[0]["level"] == "INFO"
+    assert "ValueError: boom" in events[1]["exc"]
+
+
+def test_module_levels_and_debug_sampling(log_output):
+    """Test des niveaux par module et de l'échantillonnage des événements DEBUG"""
+    configure_logging("INFO", module_levels={"tests.sample": "DEBUG"}, debug_sample_rate=0.0, stream=log_output)
+    logger = logging.getLogger("tests.sample")
+    for _ in range(50):
+        logger.debug("sampled out")
+    logger.info("kept")
+    assert [e["msg"] for e in _events(log_output)] == ["kept"]
+
+    log_output.seek(0)
+    log_output.truncate()
+    configure_logging("INFO", module_levels={"tests.sample": "DEBUG"}, debug_sample_rate=1.0, stream=log_output)
+    logger.debug("dashboard %s", "debug")
+    assert [e["msg"] for e in _events(log_output)] == ["dashboard debug"]
+
+
+def test_request_id_header(client):
+    """Test que l'id de requête est renvoyé (repris du client ou généré)"""
+    assert client.get("/", headers={"X-Request-ID": "abc123"}).headers["x-request-id"] == "abc123"
+    assert len(client.get("/").headers["x-request-id"]) == 32
+
+
+def test_request_id_on_unhandled_exception(app, log_output):
+    """Test qu'une erreur non gérée est journalisée avec l'id de requête, sans fuite du contextvar"""
+    def boom():
+        raise RuntimeError("boom")
+
+    app.add_api_route("/boom", boom)
+    configure_logging("INFO", module_levels={}, stream=log_output)
+    client = TestClient(app, raise_server_exceptions=False)
+    assert client.get("/boom", headers={"X-Request-ID": "req-boom"}).status_code == 500
+    assert request_id_var.get() is None
+
+    errors = [e for e in _events(log_output) if e["msg"] == "unhandled exception"]
+    assert errors and errors[0]["request_id"] == "req-boom"
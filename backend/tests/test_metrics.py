@@ -4,17 +4,6 @@ from datetime import datetime, timedelta
 from fastapi import status
 
 
-@pytest.fixture
-def auth_token(client, test_user_data):
-    """Fixture pour obtenir un token d'authentification"""
-    client.post("/register", json=test_user_data)
-    response = client.post("/login", json={
-        "email": test_user_data["email"],
-        "password": test_user_data["password"]
-    })
-    return response.json()["access_token"]
-
-
 def test_create_metric_success(client, auth_token):
     """Test de création d'une métrique réussie"""
     today = datetime.now().strftime("%Y-%m-%d")
@@ -163,3 +152,112 @@ def test_get_insights(client, auth_token):
     assert "pctSales" in data
     assert "pctCash" in data
 
+
+
+def test_get_metrics_list_deltas(client, auth_token):
+    """Test que la liste renvoie les deltas vs J-1 (J-1 hors plage incluse, jour manquant = 0)"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    today = datetime.now().date()
+    values = {0: (120.0, 40.0), 1: (100.0, 50.0), 3: (80.0, 20.0), 4: (40.0, 10.0)}
+    for i, (sales, cash) in values.items():
+        client.post("/v1/metrics", json={
+            "date": (today - timedelta(days=i)).isoformat(), "sales": sales, "cash": cash
+        }, headers=headers)
+
+    metrics = client.get("/v1/metrics?range=3d", headers=headers).json()["metrics"]
+
+    assert [m["deltas"] for m in metrics] == [
+        {"sales": 20.0, "cash": -20.0},
+        {"sales": 0.0, "cash": 0.0},  # pas de saisie la veille
+        {"sales": 100.0, "cash": 100.0}  # J-1 lue hors de la plage
+    ]
+
+    insights = client.get(
+        f"/v1/insights?from={today - timedelta(days=3)}&to={today}", headers=headers
+    ).json()["insights"]
+    assert [(i["pctSales"], i["pctCash"]) for i in insights] == [(20.0, -20.0), (0.0, 0.0), (100.0, 100.0)]
+    assert client.get(f"/v1/insights?date={today}", headers=headers).json() == {"pctSales": 20.0, "pctCash": -20.0}
+    assert client.get("/v1/insights", headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_concurrent_upserts_same_date(tmp_path):
+    """Test que des envois simultanés de la même date ne lèvent pas d'erreur de conflit"""
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date
+    from sqlalchemy.orm import sessionmaker
+    from models.database import Base, build_engine
+    from models.metric_model import DailyMetric
+    from models.rollup_model import MetricRollup
+    from models.user_model import User
+    from schemas.metric_schemas import MetricCreate
+    from services.metric_service import upsert_metric
+
+    engine = build_engine("sqlite-tuned", f"sqlite:///{tmp_path / 'concurrent.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add(User(id=1, email="c@example.com", name="C", hashed_password="x"))
+        session.commit()
+
+    def submit(i):
+        with Session() as session:
+            return upsert_metric(session, MetricCreate(date=date(2025, 4, 1), sales=float(i), cash=1.0), 1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(submit, range(40)))
+
+    with Session() as session:
+        assert session.query(DailyMetric).count() == 1
+        week = session.query(MetricRollup).filter_by(period_kind="week").one()
+        assert week.count == 1
+    assert len({r["id"] for r in results}) == 1
+    engine.dispose()
+
+
+def test_get_metrics_ndjson_stream(client, auth_token, monkeypatch):
+    """Test du mode streaming NDJSON (Accept: application/x-ndjson), paquet par paquet"""
+    import json
+    import routes.metrics_routes
+
+    monkeypatch.setattr(routes.metrics_routes, "METRICS_STREAM_CHUNK", 2)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    today = datetime.now().date()
+    for i in range(5):
+        client.post("/v1/metrics", json={
+            "date": (today - timedelta(days=i)).isoformat(), "sales": 100.0 + i, "cash": 50.0
+        }, headers=headers)
+
+    response = client.get("/v1/metrics?range=30d", headers={**headers, "Accept": "application/x-ndjson"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["sales"] for line in lines] == [100.0, 101.0, 102.0, 103.0, 104.0]
+    # Même contenu que la réponse JSON classique
+    assert lines == client.get("/v1/metrics?range=30d", headers=headers).json()["metrics"]
+
+
+def test_get_metrics_columnar(client, auth_token):
+    """Test du format colonnes (orjson et msgpack) de GET /v1/metrics"""
+    import msgpack
+    from utils.columnar import COLUMNAR_JSON, COLUMNAR_MSGPACK
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    today = datetime.now().date()
+    for i in range(3):
+        client.post("/v1/metrics", json={
+            "date": (today - timedelta(days=i)).isoformat(), "sales": 100.0 + i, "cash": 50.0 - i
+        }, headers=headers)
+
+    classic = client.get("/v1/metrics?range=30d", headers=headers)
+    response = client.get("/v1/metrics?range=30d", headers={**headers, "Accept": COLUMNAR_JSON})
+    assert response.headers["content-type"] == COLUMNAR_JSON
+    assert response.json() == {
+        "dates": [m["date"] for m in classic.json()["metrics"]],
+        "sales": [100.0, 101.0, 102.0],
+        "cash": [50.0, 49.0, 48.0]
+    }
+    assert len(response.content) < len(classic.content)
+
+    packed = client.get("/v1/metrics?range=30d", headers={**headers, "Accept": COLUMNAR_MSGPACK})
+    assert msgpack.unpackb(packed.content) == response.json()
@@ -0,0 +1,46 @@
+# tests/test_metrics_batch.py - Tests pour la synchronisation par lot (POST /v1/metrics/batch)
+from fastapi import status
+
+from models.rollup_model import MetricRollup
+
+
+def test_batch_creates_and_updates(client, auth_token, db_session):
+    """Test d'un lot mêlant créations, mise à jour, doublon et entrée invalide"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    # J-1 hors lot, déjà en base
+    client.post("/v1/metrics", json={"date": "2025-03-01", "sales": 100.0, "cash": 50.0}, headers=headers)
+    client.post("/v1/metrics", json={"date": "2025-03-03", "sales": 1.0, "cash": 1.0}, headers=headers)
+
+    response = client.post("/v1/metrics/batch", json={"metrics": [
+        {"date": "2025-03-02", "sales": 120.0, "cash": 40.0},
+        {"date": "2025-03-03", "sales": 999.0, "cash": 999.0},
+        {"date": "2025-03-03", "sales": 60.0, "cash": 80.0},
+        {"date": "pas-une-date", "sales": 1.0, "cash": 1.0},
+    ]}, headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [i["status"] for i in data["items"]] == ["created", "superseded", "updated", "invalid"]
+    assert (data["created"], data["updated"], data["invalid"]) == (1, 1, 1)
+    # 2025-03-02 vs J-1 en base, 2025-03-03 vs J-1 du lot
+    assert data["items"][0]["deltas"] == {"sales": 20.0, "cash": -20.0}
+    assert data["items"][2]["deltas"] == {"sales": -50.0, "cash": 100.0}
+
+    month = db_session.query(MetricRollup).filter_by(period_kind="month", period_start="2025-03-01").one()
+    assert (month.sales, month.cash, month.count) == (280.0, 170.0, 3)
+
+
+def test_batch_size_limit(client, auth_token):
+    """Test qu'un lot trop grand est refusé"""
+    entries = [{"date": "2025-01-01", "sales": 1.0, "cash": 1.0}] * 501
+    response = client.post(
+        "/v1/metrics/batch",
+        json={"metrics": entries},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_batch_unauthorized(client):
+    response = client.post("/v1/metrics/batch", json={"metrics": [{"date": "2025-01-01", "sales": 1.0, "cash": 1.0}]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
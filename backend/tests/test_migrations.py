@@ -0,0 +1,84 @@
+# tests/test_migrations.py - Tests des migrations en place
+from datetime import date
+
+from sqlalchemy import create_engine, text, inspect
+
+from models.migrations import run_migrations
+
+
+def _legacy_engine(tmp_path):
+    """Base au format d'origine : date en texte libre et contrainte (date, user_id)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE daily_metrics (id INTEGER PRIMARY KEY, date VARCHAR, sales FLOAT, cash FLOAT, "
+            "user_id INTEGER, source VARCHAR, CONSTRAINT uix_date_user_id UNIQUE (date, user_id))"
+        ))
+        conn.execute(text(
+            "INSERT INTO daily_metrics (id, date, sales, cash, user_id, source) VALUES "
+            "(1, '2025-08-01', 10, 1, 1, 'APP'), "
+            "(2, '2025-08-02 00:00:00', 20, 2, 1, 'APP'), "
+            "(3, 'hier', 30, 3, 1, 'APP'), "
+            "(4, '2025-08-01 00:00:00', 40, 4, 1, 'APP')"
+        ))
+    return engine
+
+
+def test_daily_metrics_migration(tmp_path):
+    """Test que la migration normalise les dates, écarte les invalides et crée les index"""
+    engine = _legacy_engine(tmp_path)
+
+    assert run_migrations(engine) == ["daily_metrics_date", "notifications_keys", "notification_counters"]
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, date FROM daily_metrics ORDER BY id")).all()
+        invalid = conn.execute(text("SELECT id FROM daily_metrics_invalid ORDER BY id")).all()
+        plan = " ".join(str(r) for r in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT sum(sales), sum(cash) FROM daily_metrics WHERE user_id = 1 AND date >= '2025-08-01'"
+        )))
+    assert rows == [(1, "2025-08-01"), (2, "2025-08-02")]
+    # 'hier' est invalide ; la ligne 4 normalisée entrerait en conflit avec la ligne 1.
+    assert invalid == [(3,), (4,)]
+    indexes = {i["name"] for i in inspect(engine).get_indexes("daily_metrics")}
+    assert {"uix_user_id_date", "ix_daily_metrics_user_date_cover"} <= indexes
+    assert "COVERING INDEX ix_daily_metrics_user_date_cover" in plan
+
+
+def test_migrations_run_once(tmp_path):
+    """Test que les migrations déjà appliquées ne sont pas rejouées"""
+    engine = _legacy_engine(tmp_path)
+    run_migrations(engine)
+    assert run_migrations(engine) == []
+
+
+def test_migrated_rows_load_as_dates(tmp_path):
+    """Test que le modèle lit les dates migrées comme des objets date"""
+    from sqlalchemy.orm import Session
+    from models.metric_model import DailyMetric
+
+    engine = _legacy_engine(tmp_path)
+    run_migrations(engine)
+    with Session(engine) as session:
+        metric = session.query(DailyMetric).filter(DailyMetric.date == date(2025, 8, 2)).one()
+    assert metric.sales == 20
+
+
+def test_notifications_keys_migration(tmp_path):
+    """Test que les migrations ajoutent rule_key/period, les index et le compteur des notifications"""
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE notifications (id INTEGER PRIMARY KEY, user_id INTEGER, title VARCHAR, message VARCHAR, "
+            "type VARCHAR, is_read BOOLEAN, created_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO notifications (id, user_id, title, message) VALUES (1, 1, 't', 'm')"))
+
+    assert run_migrations(engine) == ["daily_metrics_date", "notifications_keys", "notification_counters"]
+
+    columns = {c["name"] for c in inspect(engine).get_columns("notifications")}
+    indexes = {i["name"] for i in inspect(engine).get_indexes("notifications")}
+    assert {"rule_key", "period"} <= columns
+    assert {"uix_notifications_user_rule_period", "ix_notifications_user_created", "ix_notifications_user_is_read"} <= indexes
+    # Compteur de non lues initialisé depuis les notifications existantes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT user_id, unread FROM notification_counters")).all() == [(1, 1)]
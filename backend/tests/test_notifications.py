@@ -0,0 +1,109 @@
+# tests/test_notifications.py - Tests pour les notifications (génération en arrière-plan, lecture)
+from datetime import date
+
+from fastapi import status
+
+from models.notification_model import Notification
+from models.user_model import User
+from services.notification_worker import notification_worker
+
+
+def test_metric_upsert_enqueues_evaluation(client, auth_token, db_session):
+    """Test que la saisie du jour produit la notification via le worker, pas via le GET"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    today = date.today().isoformat()
+    client.post("/v1/metrics", json={"date": today, "sales": 100.0, "cash": 50.0}, headers=headers)
+    client.post("/v1/metrics", json={"date": today, "sales": 110.0, "cash": 50.0}, headers=headers)
+
+    # Rien n'est généré tant que le worker n'a pas traité la file
+    assert client.get("/notifications", headers=headers).json() == []
+
+    notification_worker.drain()
+    data = client.get("/notifications", headers=headers).json()
+    assert [n["title"] for n in data] == ["Saisie enregistrée"]
+    assert notification_worker.failed == 0
+
+
+def test_get_notifications_is_read_only(client, auth_token, db_session):
+    """Test que GET /notifications n'écrit jamais en base"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post("/v1/metrics", json={"date": date.today().isoformat(), "sales": 1.0, "cash": 1.0}, headers=headers)
+    notification_worker.clear()
+
+    response = client.get("/notifications", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+    assert db_session.query(Notification).count() == 0
+
+
+def test_daily_evaluation_enqueues_active_users(client, auth_token, db_session):
+    """Test que la tâche quotidienne met en file les utilisateurs actifs"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post("/v1/metrics", json={"date": date.today().isoformat(), "sales": 1.0, "cash": 1.0}, headers=headers)
+    notification_worker.clear()
+
+    assert notification_worker.enqueue_active_users() == 1
+    notification_worker.drain()
+    assert db_session.query(Notification).count() == 1
+
+
+def test_rule_notifications_deduplicated(client, auth_token, db_session):
+    """Test qu'une règle ne produit qu'une notification par période"""
+    from datetime import timedelta
+    from services.notification_service import generate_dynamic_notifications
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    today = date.today()
+    for offset, sales in ((3, 100.0), (2, 100.0), (1, 500.0), (0, 100.0)):
+        day = (today - timedelta(days=offset)).isoformat()
+        client.post("/v1/metrics", json={"date": day, "sales": sales, "cash": 50.0}, headers=headers)
+    user_id = db_session.query(User.id).scalar()
+
+    generate_dynamic_notifications(db_session, user_id)
+    generate_dynamic_notifications(db_session, user_id)
+
+    rows = db_session.query(Notification.rule_key, Notification.period).order_by(Notification.rule_key).all()
+    assert rows == [
+        ("entry_saved", today.isoformat()),
+        ("high_sales", (today - timedelta(days=1)).isoformat()),
+    ]
+
+
+def test_keyset_pagination(client, auth_token, db_session):
+    """Test de la pagination par curseur sur (created_at, id)"""
+    from services.notification_service import create_notification
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_id = db_session.query(User.id).scalar()
+    for i in range(5):
+        create_notification(db_session, user_id, f"n{i}", "message")
+
+    first = client.get("/notifications?limit=2", headers=headers)
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/notifications?limit=2&before={cursor}", headers=headers)
+    third = client.get(f"/notifications?limit=2&before={second.headers['X-Next-Cursor']}", headers=headers)
+
+    titles = [n["title"] for page in (first, second, third) for n in page.json()]
+    assert titles == ["n4", "n3", "n2", "n1", "n0"]
+    assert "X-Next-Cursor" not in third.headers
+    assert client.get("/notifications?before=%%%", headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_unread_counter(client, auth_token, db_session):
+    """Test que le compteur de non lues suit créations et marquages"""
+    from services.notification_service import create_notification
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_id = db_session.query(User.id).scalar()
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 0}
+
+    ids = [create_notification(db_session, user_id, f"n{i}", "message").id for i in range(3)]
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 3}
+
+    # Marquer deux fois la même notification ne décrémente qu'une fois
+    client.put(f"/notifications/{ids[0]}/read", headers=headers)
+    client.put(f"/notifications/{ids[0]}/read", headers=headers)
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 2}
+
+    client.put("/notifications/read-all", headers=headers)
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 0}
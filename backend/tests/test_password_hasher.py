@@ -0,0 +1,71 @@
+# tests/test_password_hasher.py - Tests du pool de hachage des mots de passe
+import threading
+
+import pytest
+from fastapi import status
+from passlib.hash import bcrypt
+
+import routes.auth
+import routes.user_routes
+from models.user_model import User
+from services.password_hasher import HashingBusy, HashingExecutor, pwd_context
+
+
+def test_legacy_bcrypt_rehashed_on_login(client, db_session):
+    """Test qu'un hachage bcrypt est remplacé par argon2 à la connexion"""
+    db_session.add(User(email="legacy@example.com", name="Legacy", hashed_password=bcrypt.hash("secret123")))
+    db_session.commit()
+
+    response = client.post("/login", json={"email": "legacy@example.com", "password": "secret123"})
+    assert response.status_code == status.HTTP_200_OK
+
+    db_session.expire_all()
+    hashed = db_session.query(User.hashed_password).filter(User.email == "legacy@example.com").scalar()
+    assert hashed.startswith("$argon2")
+    assert not pwd_context.needs_update(hashed)
+    # Le nouveau hachage reste valide
+    assert client.post("/login", json={"email": "legacy@example.com", "password": "secret123"}).status_code == 200
+
+
+def test_executor_rejects_when_queue_full():
+    """Test que le pool refuse les demandes au-delà de sa file"""
+    executor = HashingExecutor(workers=1, queue_limit=1)
+    release = threading.Event()
+    try:
+        first = executor.submit(release.wait)
+        second = executor.submit(release.wait)
+        with pytest.raises(HashingBusy):
+            executor.submit(release.wait)
+        assert executor.stats()["rejected"] == 1
+        release.set()
+        first.result()
+        second.result()
+        # De nouveau disponible une fois la file vidée
+        assert executor.hash_sync("pw").startswith("$argon2")
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_login_returns_503_when_busy(client, test_user_data, monkeypatch):
+    """Test que /login répond 503 (Retry-After) quand le pool est saturé"""
+    client.post("/register", json=test_user_data)
+
+    async def busy(*args):
+        raise HashingBusy()
+
+    monkeypatch.setattr(routes.auth.password_hasher, "verify_and_update", busy)
+    response = client.post("/login", json={"email": test_user_data["email"], "password": test_user_data["password"]})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_password_update_returns_503_when_busy(client, auth_token, monkeypatch):
+    """Test que PUT /user/me répond aussi 503 (Retry-After) quand le pool est saturé"""
+    async def busy(*args):
+        raise HashingBusy()
+
+    monkeypatch.setattr(routes.user_routes.password_hasher, "hash", busy)
+    response = client.put("/user/me", json={"password": "newpassword123"}, headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
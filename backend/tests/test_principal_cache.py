@@ -0,0 +1,61 @@
+# tests/test_principal_cache.py - Tests pour le cache des utilisateurs authentifiés
+import time
+from fastapi import status
+
+from services.principal_cache import Principal, PrincipalCache, principal_cache
+
+
+def test_cache_lru_eviction():
+    """Test que l'entrée la moins récemment utilisée est évincée"""
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    cache.put("a", Principal(id=1, email="a@x", name="A"))
+    cache.put("b", Principal(id=2, email="b@x", name="B"))
+    assert cache.get("a") is not None
+    cache.put("c", Principal(id=3, email="c@x", name="C"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_respects_token_expiry():
+    """Test qu'un token expiré n'est pas mis en cache"""
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    cache.put("expired", Principal(id=1, email="a@x", name="A"), token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+
+def test_cache_hits_on_repeated_requests(client, auth_token):
+    """Test que les requêtes suivantes sont servies par le cache"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.get("/user/me", headers=headers)
+    before = principal_cache.stats()["hits"]
+
+    response = client.get("/user/me", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert principal_cache.stats()["hits"] == before + 1
+
+
+def test_profile_update_invalidates_cache(client, auth_token):
+    """Test que la mise à jour du profil invalide le cache"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.get("/user/me", headers=headers)
+
+    client.put("/user/me", json={"name": "Nouveau Nom"}, headers=headers)
+    response = client.get("/user/me", headers=headers)
+
+    assert response.json()["name"] == "Nouveau Nom"
+
+
+def test_set_fcm_token_invalidates_cache(client, auth_token):
+    """Test que /set-fcm-token invalide le cache"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.get("/user/me", headers=headers)
+    assert principal_cache.stats()["size"] == 1
+
+    response = client.post("/set-fcm-token", json={"fcm_token": "abc"}, headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert principal_cache.stats()["size"] == 0
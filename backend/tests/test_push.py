@@ -0,0 +1,74 @@
+# tests/test_push.py - Tests de l'envoi des rappels push (transport en mémoire)
+import asyncio
+import logging
+import time
+
+from models.user_model import User
+from services.push_service import FakeTransport, TokenBucket, fan_out
+from tests.conftest import TestingSessionLocal
+
+
+def _seed_users(db_session, count: int):
+    db_session.add_all([
+        User(email=f"u{i}@example.com", name=f"U{i}", hashed_password="x", fcm_token=f"tok-{i}" if i % 4 else None)
+        for i in range(count)
+    ])
+    db_session.commit()
+
+
+def test_fan_out_reaches_every_token(db_session):
+    """Test que chaque utilisateur avec un fcm_token reçoit le rappel, paquet par paquet"""
+    _seed_users(db_session, 40)
+    transport = FakeTransport()
+
+    stats = asyncio.run(fan_out(TestingSessionLocal, transport, "t", "b", concurrency=5, rate=10000, chunk_size=7))
+
+    assert stats["users"] == 30 and stats["sent"] == 30
+    assert sorted(token for token, _, _ in transport.sent) == sorted(f"tok-{i}" for i in range(40) if i % 4)
+
+
+def test_fan_out_retries_and_prunes(db_session):
+    """Test des réessais sur erreur temporaire et de l'effacement des tokens invalides"""
+    _seed_users(db_session, 8)
+    transport = FakeTransport(invalid_tokens={"tok-1", "tok-2"}, transient_failures={"tok-3": 2, "tok-5": 5})
+
+    stats = asyncio.run(fan_out(TestingSessionLocal, transport, "t", "b", rate=10000, max_retries=3, backoff=0.001))
+
+    assert (stats["sent"], stats["invalid"], stats["failed"], stats["pruned"]) == (3, 2, 1, 2)
+    assert stats["retries"] == 2 + 3
+    db_session.expire_all()
+    tokens = {u.email: u.fcm_token for u in db_session.query(User)}
+    assert tokens["u1@example.com"] is None and tokens["u2@example.com"] is None
+    assert tokens["u3@example.com"] == "tok-3"
+
+
+def test_fan_out_logs_unexpected_errors(db_session, caplog):
+    """Test qu'une erreur inattendue du transport est comptée et journalisée avec l'utilisateur"""
+    _seed_users(db_session, 3)
+
+    class BrokenTransport(FakeTransport):
+        async def send(self, token, title, body):
+            if token == "tok-2":
+                raise ValueError("bad payload")
+            return await super().send(token, title, body)
+
+    with caplog.at_level(logging.ERROR, logger="services.push_service"):
+        stats = asyncio.run(fan_out(TestingSessionLocal, BrokenTransport(), "t", "b", rate=10000))
+
+    assert (stats["sent"], stats["failed"]) == (1, 1)
+    failures = [r for r in caplog.records if r.getMessage() == "push send failed"]
+    broken = db_session.query(User).filter(User.fcm_token == "tok-2").one()
+    assert len(failures) == 1 and failures[0].user_id == broken.id and failures[0].exc_info
+
+
+def test_token_bucket_limits_rate():
+    """Test que le seau à jetons borne le débit"""
+    async def run():
+        bucket = TokenBucket(rate=200, burst=10)
+        start = time.perf_counter()
+        for _ in range(50):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    # 10 jetons immédiats puis 40 à 200/s : au moins 0,2 s
+    assert asyncio.run(run()) >= 0.18
@@ -0,0 +1,67 @@
+# tests/test_query_profiler.py - Tests du profileur SQL et budgets de requêtes par endpoint
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from services.query_profiler import capture_queries
+from tests.conftest import TestingSessionLocal
+
+
+def _seed(client, headers, days=5):
+    today = datetime.now().date()
+    for i in range(days):
+        client.post("/v1/metrics", json={
+            "date": (today - timedelta(days=i)).isoformat(), "sales": 100.0, "cash": 50.0
+        }, headers=headers)
+
+
+def test_profile_headers(client, auth_token):
+    """Test des en-têtes X-Query-Count / X-DB-Time / X-Query-Repeated"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    _seed(client, headers)
+
+    response = client.get("/v1/dashboard", headers=headers)
+
+    assert int(response.headers["x-query-count"]) >= 1
+    assert float(response.headers["x-db-time"]) >= 0
+    assert response.headers["x-query-repeated"] == "0"
+
+
+def test_repeated_statements_flagged(db):
+    """Test de la détection d'une même instruction répétée (N+1)"""
+    with capture_queries() as profile:
+        with TestingSessionLocal() as session:
+            for user_id in range(4):
+                session.execute(text("SELECT id FROM users WHERE id = :id"), {"id": user_id})
+            session.execute(text("SELECT 1"))
+
+    assert profile.count == 5
+    repeated = profile.repeated(3)
+    assert len(repeated) == 1 and repeated[0][1] == 4
+    assert repeated[0][0].startswith("SELECT id FROM users WHERE id = ")
+
+
+def test_assert_max_queries_fails_over_budget(db, assert_max_queries):
+    """Test que le helper échoue (avec la liste des instructions) au-delà du budget"""
+    with pytest.raises(AssertionError, match="2 queries executed, at most 1 expected"):
+        with assert_max_queries(1):
+            with TestingSessionLocal() as session:
+                session.execute(text("SELECT 1"))
+                session.execute(text("SELECT 2"))
+
+
+# Budgets de requêtes des endpoints les plus appelés : un N+1 réintroduit fait échouer le test.
+@pytest.mark.parametrize("url, budget", [
+    ("/v1/dashboard", 2),
+    ("/v1/graphs", 2),
+    ("/v1/metrics?range=30d", 2),
+    ("/notifications", 2),
+    ("/notifications/unread-count", 1),
+])
+def test_endpoint_query_budget(client, auth_token, assert_max_queries, url, budget):
+    """Test du nombre maximal de requêtes SQL par endpoint"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    _seed(client, headers, days=10)
+    with assert_max_queries(budget):
+        assert client.get(url, headers=headers).status_code == 200
@@ -0,0 +1,87 @@
+# tests/test_rollups.py - Tests pour les totaux pré-calculés (metric_rollups)
+from datetime import date, timedelta
+
+from fastapi import status
+
+from models.metric_model import DailyMetric
+from models.rollup_model import MetricRollup
+from models.user_model import User
+from services import rollup_service
+from services.query_profiler import capture_queries
+from services.rollup_service import rebuild_rollups, verify_rollups
+
+
+def test_upsert_updates_rollups(db_session, post_metric):
+    """Test que chaque saisie met à jour semaine, mois et année"""
+    post_metric("2025-01-30", 100.0, 10.0)
+    post_metric("2025-02-03", 50.0, 5.0)
+    # Correction de la saisie du 30 janvier
+    post_metric("2025-01-30", 120.0, 12.0)
+
+    rollups = {
+        (r.period_kind, r.period_start): (r.sales, r.cash, r.count)
+        for r in db_session.query(MetricRollup).all()
+    }
+    assert rollups[("week", "2025-01-27")] == (120.0, 12.0, 1)
+    assert rollups[("week", "2025-02-03")] == (50.0, 5.0, 1)
+    assert rollups[("month", "2025-01-01")] == (120.0, 12.0, 1)
+    assert rollups[("month", "2025-02-01")] == (50.0, 5.0, 1)
+    assert rollups[("year", "2025-01-01")] == (170.0, 17.0, 2)
+    assert verify_rollups(db_session) == []
+
+
+def test_series_reads_rollups_and_partial_edges(client, auth_token, post_metric):
+    """Test que la série combine rollups (périodes complètes) et bords partiels"""
+    post_metric("2024-12-31", 7.0, 7.0)
+    post_metric("2025-01-15", 100.0, 10.0)
+    post_metric("2025-03-20", 25.0, 2.5)
+
+    response = client.get(
+        "/v1/series?from=2024-12-31&to=2025-03-10&bucket=month",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    points = response.json()["points"]
+    assert [(p["periodStart"], p["sales"]) for p in points] == [
+        ("2024-12-01", 7.0),
+        ("2025-01-01", 100.0),
+        ("2025-02-01", 0.0),
+        ("2025-03-01", 0.0),  # le 20 mars est hors de la plage demandée
+    ]
+
+
+def test_rebuild_and_verify(db_session, post_metric):
+    """Test que rebuild corrige des rollups faux et que verify les détecte"""
+    post_metric("2025-05-05", 10.0, 1.0)
+    post_metric("2025-06-06", 20.0, 2.0)
+
+    db_session.query(MetricRollup).filter(MetricRollup.period_kind == "year").update({"sales": 0.0})
+    db_session.commit()
+    assert len(verify_rollups(db_session)) == 1
+
+    rebuild_rollups(db_session)
+    assert verify_rollups(db_session) == []
+
+
+def test_rebuild_writes_in_batches(db_session, monkeypatch):
+    """Test que rebuild écrit les rollups par paquets bornés (limite de variables de SQLite)"""
+    monkeypatch.setattr(rollup_service, "ROLLUP_BATCH_SIZE", 10)
+    user = User(email="batch@example.com", name="Batch", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    start = date(2023, 1, 2)
+    db_session.add_all([
+        DailyMetric(user_id=user.id, date=start + timedelta(days=i), sales=float(i), cash=1.0)
+        for i in range(400)
+    ])
+    db_session.commit()
+
+    with capture_queries() as profile:
+        count = rebuild_rollups(db_session)
+
+    weeks, months, years = 58, 14, 2
+    assert count == weeks + months + years
+    inserts = sum(n for sql, n in profile.statements.items() if sql.startswith("INSERT INTO metric_rollups"))
+    assert inserts == 6 + 2 + 1
+    assert verify_rollups(db_session) == []
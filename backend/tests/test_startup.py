@@ -0,0 +1,116 @@
+# tests/test_startup.py - Tests du démarrage : importer run.py ne démarre rien, le lifespan démarre tout
+import json
+import logging
+import os
+import subprocess
+import sys
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import run
+import utils.structured_logging
+from run import create_app
+from settings import Settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Budget large (machines de CI lentes) ; la cible réelle est run.STARTUP_TARGET_S (benchmarks.startup_time).
+STARTUP_BUDGET_S = float(os.getenv("STARTUP_BUDGET_S", "5"))
+
+
+def _run_python(code: str, cwd: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "DB_FILE": "compta.db", "DB_PROFILE": "sqlite", "METRICS_TOKEN": ""}
+    completed = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """Importer run.py construit l'app sans base, sans thread et sans dépendance lourde"""
+    result = _run_python("""
+import json, sys, threading, time
+started = time.perf_counter()
+import run
+elapsed = time.perf_counter() - started
+threads = threading.active_count()
+heavy = [m for m in ("numpy", "apscheduler") if m in sys.modules]
+# Sans `with`, TestClient n'exécute pas le lifespan : l'app répond déjà, sans base.
+from fastapi.testclient import TestClient
+client = TestClient(run.app)
+print(json.dumps({
+    "elapsed": elapsed,
+    "threads": threads,
+    "heavy": heavy,
+    "statuses": [client.get("/").status_code, client.get("/metrics").status_code]
+}))
+""", str(tmp_path))
+
+    assert result["threads"] == 1
+    assert result["heavy"] == []
+    assert not (tmp_path / "compta.db").exists()
+    assert result["statuses"] == [200, 200]
+    assert result["elapsed"] < STARTUP_BUDGET_S
+
+
+def test_lifespan_runs_startup_work(tmp_path):
+    """Le lifespan crée les tables, démarre scheduler et worker, puis les arrête"""
+    result = _run_python("""
+import asyncio, json, threading
+import run
+
+async def main():
+    async with run.app.router.lifespan_context(run.app):
+        from models.database import engine
+        from sqlalchemy import inspect
+        from services.notification_worker import notification_worker
+        return {
+            "tables": inspect(engine).get_table_names(),
+            "threads": threading.active_count(),
+            "worker": notification_worker.stats()["running"]
+        }
+
+started = asyncio.run(main())
+from services.notification_worker import notification_worker
+print(json.dumps({**started, "worker_after": notification_worker.stats()["running"]}))
+""", str(tmp_path))
+
+    assert (tmp_path / "compta.db").exists()
+    assert {"users", "daily_metrics", "job_runs"} <= set(result["tables"])
+    assert result["worker"] is True
+    assert result["threads"] > 1
+    assert result["worker_after"] is False
+
+
+def test_create_app_for_tests_has_no_side_effects(db):
+    """Settings.for_tests() : le lifespan ne démarre ni scheduler ni worker"""
+    from services.notification_worker import notification_worker
+
+    app = create_app(Settings.for_tests())
+    with TestClient(app) as client:
+        assert client.get("/").status_code == 200
+        assert notification_worker.stats()["running"] is False
+
+
+def test_failed_startup_stops_logging(monkeypatch):
+    """Un échec du démarrage (e.g., migrations) arrête quand même la journalisation déjà lancée"""
+    def broken_schema():
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(run, "_setup_schema", broken_schema)
+    app = create_app(replace(Settings.for_tests(), configure_logging=True, setup_schema=True))
+    try:
+        with pytest.raises(RuntimeError):
+            with TestClient(app):
+                pass
+        assert utils.structured_logging._listener is None
+    finally:
+        utils.structured_logging.shutdown_logging()
+        logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.mark.parametrize("value, expected", [("a.com, b.com", ["a.com", "b.com"]), ("", ["*"])])
+def test_settings_from_env_cors(monkeypatch, value, expected):
+    """CORS_ORIGINS : liste séparée par des virgules, * par défaut"""
+    monkeypatch.setenv("CORS_ORIGINS", value)
+    assert Settings.from_env().cors_origins == expected
@@ -0,0 +1,57 @@
+# tests/test_telemetry.py - Tests des mesures internes (GET /metrics)
+from datetime import datetime
+
+from fastapi import status
+
+from services.telemetry import Histogram, registry, HTTP_REQUESTS, DB_QUERY_DURATION, DB_POOL_WAIT
+
+
+def test_histogram_prometheus_format():
+    """Test du format texte d'un histogramme (tranches cumulées, somme, nombre)"""
+    histogram = Histogram("test_latency_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, route="/x")
+
+    lines = histogram.render()
+    assert 'compta_test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'compta_test_latency_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'compta_test_latency_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'compta_test_latency_seconds_sum{route="/x"} 2.55' in lines
+    assert 'compta_test_latency_seconds_count{route="/x"} 3' in lines
+
+
+def test_metrics_endpoint(client, auth_token):
+    """Test de l'export : requêtes par route (modèle de route), SQL, pool et statistiques des composants"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    before = HTTP_REQUESTS.value(method="PUT", route="/notifications/{notification_id}/read", status="404")
+    queries = DB_QUERY_DURATION.count(operation="select")
+    checkouts = DB_POOL_WAIT.count()
+
+    client.post("/v1/metrics", json={"date": datetime.now().strftime("%Y-%m-%d"), "sales": 10.0, "cash": 5.0}, headers=headers)
+    client.get("/v1/dashboard", headers=headers)
+    client.put("/notifications/999/read", headers=headers)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'compta_http_requests_total{method="GET",route="/v1/dashboard",status="200"}' in body
+    assert 'compta_http_request_duration_seconds_count{method="POST",route="/v1/metrics"}' in body
+    assert HTTP_REQUESTS.value(method="PUT", route="/notifications/{notification_id}/read", status="404") == before + 1
+    assert DB_QUERY_DURATION.count(operation="select") > queries
+    assert DB_POOL_WAIT.count() > checkouts
+    assert "compta_principal_cache_hits " in body
+    assert "compta_password_hasher_completed " in body
+    assert "compta_notification_worker_processed " in body
+
+
+def test_job_stats_by_label():
+    """Test de l'export des statistiques par tâche (label job)"""
+    registry.register_stats("test_job", lambda: {"daily": {"runs": 2, "last_status": "succeeded"}}, label="job")
+    try:
+        body = registry.render()
+    finally:
+        registry.unregister_stats("test_job")
+    assert 'compta_test_job_runs{job="daily"} 2' in body
+    assert "last_status" not in body
@@ -0,0 +1,113 @@
+# tests/test_tokens.py - Tests des JWT (types de token, rotation des clés, anciens tokens)
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from fastapi import status
+
+import utils.jwt_token
+from utils.jwt_token import KeyRing, decode_token, key_ring
+
+
+def _login(client, test_user_data):
+    client.post("/register", json=test_user_data)
+    return client.post("/login", json={
+        "email": test_user_data["email"],
+        "password": test_user_data["password"]
+    }).json()
+
+
+def test_token_claims(client, test_user_data):
+    """Test que les tokens portent uid, typ et kid"""
+    tokens = _login(client, test_user_data)
+    claims = decode_token(tokens["access_token"])
+    assert isinstance(claims["uid"], int) and claims["typ"] == "access"
+    assert jwt.get_unverified_header(tokens["access_token"])["kid"] == key_ring.active_kid
+
+
+def test_access_and_refresh_not_interchangeable(client, test_user_data):
+    """Test qu'un access token est refusé par /refresh et un refresh token par les routes protégées"""
+    tokens = _login(client, test_user_data)
+
+    response = client.post("/refresh", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    for path in ("/user/me", "/v1/metrics", "/notifications/unread-count"):
+        response = client.get(path, headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED, path
+
+
+def test_key_rotation(client, test_user_data):
+    """Test de la rotation : anciens tokens valides tant que leur clé reste dans le trousseau"""
+    tokens = _login(client, test_user_data)
+    old_kid, old_secret = key_ring.signing_key()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    try:
+        key_ring.add_key("k-next", "another-secret-for-tests", activate=True)
+        assert client.get("/v1/metrics", headers=headers).status_code == status.HTTP_200_OK
+
+        fresh = client.post("/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        }).json()
+        assert jwt.get_unverified_header(fresh["access_token"])["kid"] == "k-next"
+
+        key_ring.remove_key(old_kid)
+        assert client.get("/v1/metrics", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get("/v1/metrics", headers={"Authorization": f"Bearer {fresh['access_token']}"}).status_code == 200
+    finally:
+        key_ring.add_key(old_kid, old_secret.decode(), activate=True)
+        key_ring.remove_key("k-next")
+
+
+def test_retired_key_evicts_cached_principal(client, test_user_data):
+    """Test qu'un token déjà en cache (via /user/me) est refusé une fois sa clé retirée"""
+    tokens = _login(client, test_user_data)
+    old_kid, old_secret = key_ring.signing_key()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/user/me", headers=headers).status_code == status.HTTP_200_OK
+    try:
+        key_ring.add_key("k-next", "another-secret-for-tests", activate=True)
+        key_ring.remove_key(old_kid)
+        assert client.get("/user/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get("/v1/metrics", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+    finally:
+        key_ring.add_key(old_kid, old_secret.decode(), activate=True)
+        key_ring.remove_key("k-next")
+
+
+def _legacy_token(email: str, secret: str) -> str:
+    return jwt.encode({"sub": email, "exp": datetime.utcnow() + timedelta(days=1)}, secret, algorithm="HS256")
+
+
+def test_legacy_token_accepted(client, test_user_data, monkeypatch):
+    """Test qu'un token émis avant l'ajout de uid/typ/kid reste accepté si JWT_LEGACY_SECRET est défini"""
+    monkeypatch.setattr(utils.jwt_token, "JWT_LEGACY_SECRET", "legacy-secret-for-tests")
+    _login(client, test_user_data)
+    headers = {"Authorization": f"Bearer {_legacy_token(test_user_data['email'], 'legacy-secret-for-tests')}"}
+    assert client.get("/user/me", headers=headers).json()["email"] == test_user_data["email"]
+    assert client.get("/v1/metrics", headers=headers).status_code == status.HTTP_200_OK
+
+
+def test_legacy_token_refused_without_secret(client, test_user_data, monkeypatch):
+    """Test que les tokens sans kid sont refusés quand JWT_LEGACY_SECRET n'est pas défini"""
+    monkeypatch.setattr(utils.jwt_token, "JWT_LEGACY_SECRET", None)
+    _login(client, test_user_data)
+    headers = {"Authorization": f"Bearer {_legacy_token(test_user_data['email'], 'any-secret')}"}
+    assert client.get("/user/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_key_ring_requires_configuration(monkeypatch):
+    """Test que JWT_KEYS est obligatoire, sauf clé jetable explicite (JWT_DEV_KEYS=1)"""
+    monkeypatch.delenv("JWT_KEYS", raising=False)
+    monkeypatch.delenv("JWT_ACTIVE_KID", raising=False)
+    monkeypatch.setenv("JWT_DEV_KEYS", "0")
+    with pytest.raises(ValueError):
+        KeyRing.from_env()
+
+    monkeypatch.setenv("JWT_DEV_KEYS", "1")
+    first, second = KeyRing.from_env().signing_key(), KeyRing.from_env().signing_key()
+    assert first[0] == "dev" and first[1] != second[1]
+
+    monkeypatch.setenv("JWT_KEYS", "k1:secret-one,k2:secret-two")
+    monkeypatch.setenv("JWT_ACTIVE_KID", "k2")
+    assert KeyRing.from_env().signing_key() == ("k2", b"secret-two")
@@ -0,0 +1,41 @@
+# utils/columnar.py - Format colonnes compact pour les séries (graphiques mobiles).
+# Pour un débutant : au lieu d'une liste d'objets qui répète chaque nom de champ,
+# {"metrics": [{"id": 1, "date": "...", "sales": 10.0, "cash": 5.0, "deltas": null}, ...]},
+# on envoie des tableaux parallèles : {"dates": [...], "sales": [...], "cash": [...]}.
+# Le client le demande par l'en-tête Accept :
+# - application/vnd.compta.columnar+json : JSON (sérialisé avec orjson)
+# - application/vnd.compta.columnar+msgpack : MessagePack (binaire, encore plus compact)
+
+from typing import Optional
+
+import msgpack
+import orjson
+from fastapi import Response
+
+COLUMNAR_JSON = "application/vnd.compta.columnar+json"
+COLUMNAR_MSGPACK = "application/vnd.compta.columnar+msgpack"
+
+
+# Format colonnes demandé par l'en-tête Accept, ou None (réponse JSON classique).
+def columnar_media_type(accept: Optional[str]) -> Optional[str]:
+    accept = accept or ""
+    if COLUMNAR_MSGPACK in accept:
+        return COLUMNAR_MSGPACK
+    if COLUMNAR_JSON in accept:
+        return COLUMNAR_JSON
+    return None
+
+
+# Sérialise des colonnes dans le format demandé.
+def columnar_response(columns: dict, media_type: str, headers: dict = None) -> Response:
+    if media_type == COLUMNAR_MSGPACK:
+        body = msgpack.packb(columns, use_bin_type=True)
+    else:
+        body = orjson.dumps(columns)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+# Sérialise des colonnes contenant des tableaux NumPy (NaN -> null) en JSON.
+def numpy_json_response(columns: dict, headers: dict = None) -> Response:
+    body = orjson.dumps(columns, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(content=body, media_type="application/json", headers=headers)
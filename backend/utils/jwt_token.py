@@ -1,35 +1,140 @@
-# utils/jwt_token.py - Gère création/décodage JWT.
-# Pour un débutant : Sépare la logique JWT pour réutilisation.
+# utils/jwt_token.py - Émission et vérification des JWT (module unique pour toute l'API).
+# Pour un débutant : chaque token porte l'id numérique de l'utilisateur (uid), son email (sub),
+# son type (typ : access ou refresh) et, dans l'en-tête, l'identifiant de la clé qui l'a signé (kid).
+#
+# Rotation des clés sans interruption (variable JWT_KEYS = "kid:secret,kid:secret") :
+# 1. ajouter la nouvelle clé à JWT_KEYS (les tokens signés par l'ancienne restent valides) ;
+# 2. la rendre active avec JWT_ACTIVE_KID (nouveaux tokens signés par elle) ;
+# 3. retirer l'ancienne clé une fois ses tokens expirés (refresh : REFRESH_TOKEN_DAYS).
+# JWT_KEYS est obligatoire : sans lui, l'API refuse de démarrer. En développement et en test,
+# JWT_DEV_KEYS=1 génère à la place une clé aléatoire à chaque démarrage (tokens perdus au redémarrage).
+# Les tokens émis avant ce module (sans kid, ni uid, ni typ) ne sont acceptés que si
+# JWT_LEGACY_SECRET est défini (ancienne clé unique, à retirer une fois ces tokens expirés).
+
+import os
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
 
 # Importe JWT.
 import jwt
-# Importe datetime.
-from datetime import datetime, timedelta
-# Importe os.
-import os
 
-# Clé secrète et algo.
-SECRET_KEY = "a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6"  # Identique à auth_service.py.
 ALGORITHM = "HS256"
+ACCESS_TOKEN_DAYS = int(os.getenv("ACCESS_TOKEN_DAYS", "7"))  # Persistance agressive.
+REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", "90"))  # 3 mois.
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+# Ancienne clé unique (tokens sans kid) ; non définie : tokens sans kid refusés.
+JWT_LEGACY_SECRET = os.getenv("JWT_LEGACY_SECRET") or None
+
+
+# Trousseau de clés de signature, gardé en mémoire.
+class KeyRing:
+    def __init__(self, keys: Dict[str, str], active_kid: Optional[str] = None):
+        if not keys:
+            raise ValueError("JWT key ring is empty")
+        self._lock = threading.Lock()
+        self._keys = {kid: secret.encode() for kid, secret in keys.items()}
+        self.active_kid = active_kid or next(iter(keys))
+        if self.active_kid not in self._keys:
+            raise ValueError(f"Unknown JWT_ACTIVE_KID: {self.active_kid}")
+
+    @classmethod
+    def from_env(cls) -> "KeyRing":
+        raw = os.getenv("JWT_KEYS", "")
+        keys = {}
+        for entry in filter(None, (part.strip() for part in raw.split(","))):
+            kid, _, secret = entry.partition(":")
+            if not secret:
+                raise ValueError("JWT_KEYS entries must look like kid:secret")
+            keys[kid] = secret
+        if not keys:
+            if os.getenv("JWT_DEV_KEYS", "0") != "1":
+                raise ValueError("JWT_KEYS is not set (kid:secret,...); set JWT_DEV_KEYS=1 for a throwaway development key")
+            # Développement / tests : clé aléatoire propre au processus.
+            keys = {"dev": secrets.token_urlsafe(32)}
+        return cls(keys, os.getenv("JWT_ACTIVE_KID") or None)
+
+    # Clé active (signature) : (kid, secret).
+    def signing_key(self):
+        with self._lock:
+            return self.active_kid, self._keys[self.active_kid]
+
+    def get(self, kid: str) -> Optional[bytes]:
+        with self._lock:
+            return self._keys.get(kid)
+
+    # Ajoute (ou remplace) une clé ; activate=True signe les nouveaux tokens avec elle.
+    def add_key(self, kid: str, secret: str, activate: bool = False):
+        with self._lock:
+            self._keys[kid] = secret.encode()
+            if activate:
+                self.active_kid = kid
+
+    def remove_key(self, kid: str):
+        with self._lock:
+            if kid == self.active_kid:
+                raise ValueError("Cannot remove the active JWT key")
+            self._keys.pop(kid, None)
+
+
+# Trousseau partagé par le processus.
+key_ring = KeyRing.from_env()
+
+
+def _create_token(user_id: int, email: str, token_type: str, lifetime: timedelta) -> str:
+    kid, secret = key_ring.signing_key()
+    now = datetime.utcnow()
+    payload = {"sub": email, "uid": user_id, "typ": token_type, "iat": now, "exp": now + lifetime}
+    return jwt.encode(payload, secret, algorithm=ALGORITHM, headers={"kid": kid})
+
+
+# Crée access token - ACCESS_TOKEN_DAYS jours.
+def create_access_token(user_id: int, email: str) -> str:
+    return _create_token(user_id, email, ACCESS, timedelta(days=ACCESS_TOKEN_DAYS))
+
+
+# Crée refresh token - REFRESH_TOKEN_DAYS jours, accepté seulement par /refresh.
+def create_refresh_token(user_id: int, email: str) -> str:
+    return _create_token(user_id, email, REFRESH, timedelta(days=REFRESH_TOKEN_DAYS))
+
+
+# Clé de vérification d'un kid (None : ancien format sans kid) ; None si la clé n'est pas (ou plus) acceptée.
+def _verification_key(kid: Optional[str]):
+    if kid is None:
+        return JWT_LEGACY_SECRET
+    return key_ring.get(kid)
+
+
+# Vrai si les tokens signés par cette clé sont encore acceptés (e.g., après retrait d'une clé).
+def key_accepted(kid: Optional[str]) -> bool:
+    return _verification_key(kid) is not None
+
+
+# Kid de l'en-tête d'un token (None : ancien format) ; ne vérifie pas la signature.
+def token_kid(token: str) -> Optional[str]:
+    try:
+        return jwt.get_unverified_header(token).get("kid")
+    except jwt.PyJWTError:
+        return None
+
 
-# Crée access token.
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(hours=24)  # Expire 24h.
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
-# Crée refresh token.
-def create_refresh_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=30)  # 30j.
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
-# Décode token.
-def decode_token(token: str):
+# Décode et vérifie un token du type attendu ; retourne ses claims, ou None si invalide.
+# Les claims d'un token ancien format n'ont ni uid ni typ (accepté pour les deux usages).
+def decode_token(token: str, expected_type: str = ACCESS) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")  # Retourne email.
-    except:
-        return None
\ No newline at end of file
+        kid = jwt.get_unverified_header(token).get("kid")
+        secret = _verification_key(kid)
+        if secret is None:
+            return None
+        payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    if kid is not None and payload.get("typ") != expected_type:
+        return None
+    if payload.get("sub") is None:
+        return None
+    return payload
@@ -0,0 +1,134 @@
+# utils/structured_logging.py - Journalisation structurée (JSON) pour toute l'API.
+# Pour un débutant : chaque module crée son logger avec logging.getLogger(__name__) et écrit
+# logger.debug / info / warning / exception ; configure_logging() branche ensuite une seule
+# sortie pour tout le processus :
+# - une ligne JSON par événement (ts, level, logger, msg, request_id + champs passés dans extra=) ;
+# - l'écriture sur stdout se fait dans un thread dédié (QueueHandler -> QueueListener) :
+#   la requête ne fait que déposer l'événement dans une file, sans attendre la console ;
+# - les événements DEBUG sont échantillonnés (LOG_DEBUG_SAMPLE_RATE) pour rester utilisables en charge.
+#
+# Réglages (variables d'environnement) :
+# - LOG_LEVEL : niveau global (défaut INFO ; un logger.debug désactivé ne coûte qu'un test de niveau)
+# - LOG_LEVELS : niveaux par module, e.g. "services.dashboard_service=DEBUG,sqlalchemy.engine=WARNING"
+# - LOG_DEBUG_SAMPLE_RATE : part des événements DEBUG gardés, entre 0 et 1 (défaut 1)
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1"))
+
+# Identifiant de la requête en cours (posé par middleware/request_id.py).
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributs standard d'un LogRecord : tout le reste vient de extra= et part dans le JSON.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+# Parse "module=LEVEL,module=LEVEL" en dictionnaire.
+def parse_module_levels(raw: str) -> Dict[str, str]:
+    levels = {}
+    for entry in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, level = entry.partition("=")
+        if not level:
+            raise ValueError("LOG_LEVELS entries must look like module=LEVEL")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+# Formate un événement en une ligne JSON.
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                event[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            event["exc"] = record.exc_text
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+# Ajoute l'id de requête à l'événement (dans le thread de la requête, avant la file),
+# sauf s'il est déjà passé dans extra= (e.g., gestionnaire d'exceptions global).
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+# Garde une part `rate` des événements DEBUG ; les autres niveaux passent tous.
+class DebugSampler(logging.Filter):
+    def __init__(self, rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+# QueueHandler qui fige le message et la trace d'erreur sans les fusionner (formatés en JSON plus tard).
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+# Installe la sortie JSON non bloquante sur le logger racine (un nouvel appel remplace la précédente).
+def configure_logging(level: str = LOG_LEVEL, module_levels: Optional[Dict[str, str]] = None,
+                      debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE, stream=None):
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _StructuredQueueHandler(log_queue)
+    _queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    _queue_handler.addFilter(RequestIdFilter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(_queue_handler)
+    levels = parse_module_levels(LOG_LEVELS) if module_levels is None else module_levels
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    _listener.start()
+
+
+# Vide la file (événements en attente écrits) et retire la sortie installée.
+def shutdown_logging():
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None